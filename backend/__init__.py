@@ -1,5 +1,5 @@
 # Permite importar módulos desde backend
-from .db import engine, MetaData
+from .db import engine, MetaData, abrir_stream, iterar_consulta
 
 from .usuarios import (
     crear_usuario, autenticar_usuario, cambiar_password,
@@ -9,7 +9,8 @@ from .usuarios import (
 
 from .productos import (
     list_products, get_product, guardar_producto,
-    adjust_stock, update_product, eliminar_producto, editar_producto
+    adjust_stock, update_product, eliminar_producto, editar_producto,
+    pagina_productos, contar_productos
 )
 
 from .clientes import (
@@ -20,14 +21,16 @@ from .clientes import (
 from .ventas import (
     list_sales, get_sale, delete_sale,
     register_sale, generar_factura_pdf,
-    listar_ventas_dict, editar_venta_extra
+    listar_ventas_dict, editar_venta_extra,
+    pagina_lineas_venta, resumen_ventas, productos_mas_vendidos
 )
 
 from .deudas import (
     list_debts, get_debt, add_debt, update_debt,
     debts_by_client, delete_debt, pay_debt_producto,
-    list_detalle_deudas, list_clientes_con_deuda,
-    generar_factura_pago_deuda
+    list_detalle_deudas, pagina_detalle_deudas, resumen_detalle_deudas, list_clientes_con_deuda,
+    generar_factura_pago_deuda, emitir_comprobante_pago,
+    obtener_comprobante, antiguedad_deudas
 )
 
 from .categorias import (
@@ -36,7 +39,23 @@ from .categorias import (
     list_products_by_category
 )
 
-from .logs import registrar_log
+from .resumenes import refrescar_resumenes, ventas_por_categoria
+
+from .conciliacion import conciliar_deudas
+
+from .facturas import generar_facturas_lote, ids_ventas_para_facturar
+
+from .exportar import exportar_consulta, exportar_dataset
+
+from .paginacion import pagina_keyset, contar_filas
+
+from .db_async import resumen_dashboard
+from .cargador import cargar_en_paralelo
+
+from .sesiones import emitir_token, verificar_token, autorizar, invalidar_usuario
+
+from .logs import registrar_log, buscar_historial, pagina_historial, resumen_historial
+from .retencion_logs import archivar_logs, consultar_logs
 from .safe_db import safe_execute
 
 from .errors import (
@@ -1,58 +1,423 @@
-import os
-import shutil
-from datetime import datetime
-from pathlib import Path
+# backend/backup.py
+"""
+Respaldos de la base de datos.
+
+Cada respaldo es una carpeta backups/AAAAMMDD_HHMMSS con un archivo
+<tabla>.csv.gz por tabla y un manifest.json (filas, sha256, marcas de agua).
+
+- En PostgreSQL cada tabla se vuelca con COPY ... TO STDOUT directamente al
+  archivo comprimido, en paralelo y sobre una misma instantánea
+  (pg_export_snapshot), así que el respaldo es consistente entre tablas.
+- En modo local se usa un SELECT por lotes (backend.exportar).
 
-def backup_data_folder(dest_folder=None):
-    """
-    Realiza un backup completo de la carpeta 'data' en una subcarpeta 'backups' con timestamp.
-    Si el backup ya existe, lo sobrescribe.
-    """
-    base_dir = Path(__file__).resolve().parents[1]
-    data_dir = base_dir / "data"
-    backups_dir = base_dir / "backups"
-    backups_dir.mkdir(exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_name = f"backup_{timestamp}"
-    backup_path = backups_dir / backup_name
-    if backup_path.exists():
-        shutil.rmtree(backup_path)
-    shutil.copytree(data_dir, backup_path)
-    return str(backup_path)
-
-def restore_backup(backup_folder):
-    """
-    Restaura el backup seleccionado sobreescribiendo la carpeta 'data' con el contenido del backup.
-    """
-    base_dir = Path(__file__).resolve().parents[1]
-    data_dir = base_dir / "data"
-    backup_path = Path(backup_folder)
-    if not backup_path.exists() or not backup_path.is_dir():
-        raise FileNotFoundError(f"Backup no encontrado: {backup_folder}")
-    # Eliminar data actual
-    if data_dir.exists():
-        shutil.rmtree(data_dir)
-    # Copiar backup a data
-    shutil.copytree(backup_path, data_dir)
-    return str(data_dir)
+Respaldo incremental: las tablas de solo inserción (logs, comprobantes_pago)
+guardan únicamente las filas con id mayor que la marca del respaldo anterior,
+más las de los últimos BACKUP_VENTANA_MINUTOS antes de la fecha más reciente
+de ese respaldo. Los ids se asignan antes del commit, así que una fila con id
+menor que la marca puede confirmarse después del respaldo; la ventana la
+recoge en el siguiente y al restaurar se descartan los repetidos. El resto de
+tablas se copian completas porque sus filas se editan y borran.
+
+La restauración recorre la cadena completo → incrementales. En PostgreSQL
+cada tabla se carga en paralelo en una tabla de staging (_restaurar_<tabla>)
+y solo cuando todas cargaron bien se vacían las tablas reales y se copian
+desde el staging, por niveles de dependencia y en una única transacción: si
+algo falla, la base queda como estaba. En modo local todo ocurre en una
+sola transacción, tabla por tabla.
+
+Uso:
+    python -m backend.backup                 # respaldo completo
+    python -m backend.backup --incremental
+    python -m backend.backup --restaurar 20250101_030000
+"""
+
+import argparse
+import csv
+import gzip
+import hashlib
 import os
 import shutil
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Any, Dict, List, Optional
+from sqlalchemy import inspect, text
+from .db import engine
+from . import serializacion
+from .exportar import exportar_consulta
+from .logs import registrar_log
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+BACKUP_DIR = Path(os.getenv("BACKUP_DIR", str(BASE_DIR / "backups")))
+MANIFIESTO = "manifest.json"
+
+HILOS_BACKUP = int(os.getenv("BACKUP_HILOS", "4"))
+TAMANO_LOTE_RESTAURAR = 2000
+VENTANA_INCREMENTAL_MINUTOS = int(os.getenv("BACKUP_VENTANA_MINUTOS", "60"))
+
+# Tablas por nivel de dependencia: cada nivel solo referencia niveles anteriores.
+# El segundo valor es la columna de la marca incremental (None = copia completa).
+ORDEN_TABLAS = [
+    [("categorias", None), ("clientes", None), ("usuarios", None),
+     ("resumen_ventas_categoria", None)],
+    [("productos", None), ("ventas", None)],
+    [("deudas", None), ("logs", "id"), ("comprobantes_pago", "numero")],
+    [("deudas_detalle", None)],
+]
+
+CLAVES = {t: clave for nivel in ORDEN_TABLAS for t, clave in nivel if clave}
+
+# Secuencias que no son de una columna serial "id"
+SECUENCIAS = {"comprobantes_pago": ("numero", "comprobantes_pago_seq")}
+
+
+def _es_postgres() -> bool:
+    return engine.dialect.name == "postgresql"
+
+
+def _sha256(ruta: Path) -> str:
+    h = hashlib.sha256()
+    with ruta.open("rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+# ---------------------------
+# Manifiestos
+# ---------------------------
+def listar_backups() -> List[Dict[str, Any]]:
+    """Manifiestos de todos los respaldos, del más antiguo al más reciente."""
+    if not BACKUP_DIR.exists():
+        return []
+    manifiestos = []
+    for carpeta in sorted(BACKUP_DIR.iterdir()):
+        ruta = carpeta / MANIFIESTO
+        if ruta.exists():
+            with ruta.open("r", encoding="utf-8") as f:
+                manifiestos.append(serializacion.load(f))
+    return manifiestos
+
+
+def _leer_manifiesto(nombre: str) -> Dict[str, Any]:
+    ruta = BACKUP_DIR / nombre / MANIFIESTO
+    if not ruta.exists():
+        raise FileNotFoundError(f"Backup no encontrado: {nombre}")
+    with ruta.open("r", encoding="utf-8") as f:
+        return serializacion.load(f)
+
+
+def _cadena(nombre: str) -> List[Dict[str, Any]]:
+    """Manifiestos desde el último respaldo completo hasta `nombre`, en orden."""
+    cadena = [_leer_manifiesto(nombre)]
+    while cadena[0]["tipo"] != "completo":
+        cadena.insert(0, _leer_manifiesto(cadena[0]["base"]))
+    return cadena
+
+
+# ---------------------------
+# Volcado de tablas
+# ---------------------------
+def _abrir_conexion(snapshot: Optional[str]):
+    if not _es_postgres():
+        return engine.connect()
+    conn = engine.connect().execution_options(isolation_level="REPEATABLE READ")
+    if snapshot:
+        conn.execute(text("SET TRANSACTION SNAPSHOT :s"), {"s": snapshot})
+    return conn
+
+
+def _filtro_incremental(clave: str, desde: Dict[str, Any]) -> str:
+    """Filas nuevas desde la marca `desde` del respaldo anterior, con ventana de solape."""
+    filtro = f" WHERE {clave} > {int(desde['id'])}"
+    if desde.get("fecha"):
+        corte = datetime.fromisoformat(str(desde["fecha"])) - timedelta(minutes=VENTANA_INCREMENTAL_MINUTOS)
+        filtro += f" OR fecha >= '{corte.isoformat(sep=' ')}'"
+    return filtro
+
+
+def _volcar_tabla(tabla: str, clave: Optional[str], desde: Optional[Dict[str, Any]],
+                  carpeta: Path, snapshot: Optional[str]) -> Dict[str, Any]:
+    archivo = carpeta / f"{tabla}.csv.gz"
+    filtro = _filtro_incremental(clave, desde) if clave and desde is not None else ""
+    select = f"SELECT * FROM {tabla}{filtro}" + (f" ORDER BY {clave}" if clave else "")
+
+    conn = _abrir_conexion(snapshot)
+    try:
+        marca = None
+        if clave:
+            fila = conn.execute(text(f"SELECT MAX({clave}), MAX(fecha) FROM {tabla}")).first()
+            marca = {"id": fila[0] if fila[0] is not None else (desde or {}).get("id", 0),
+                     "fecha": str(fila[1]) if fila[1] else (desde or {}).get("fecha")}
+
+        if _es_postgres():
+            cursor = conn.connection.cursor()
+            with gzip.open(archivo, "wb") as f:
+                cursor.copy_expert(f"COPY ({select}) TO STDOUT WITH (FORMAT csv, HEADER true)", f)
+            filas = cursor.rowcount
+            cursor.close()
+        else:
+            filas = conn.execute(text(f"SELECT COUNT(*) FROM {tabla}{filtro}")).scalar()
+            exportar_consulta(select, formato="csv.gz", destino=archivo)
+    finally:
+        conn.close()
+
+    return {
+        "archivo": archivo.name,
+        "modo": "incremental" if clave and desde is not None else "completo",
+        "filas": filas,
+        "bytes": archivo.stat().st_size,
+        "sha256": _sha256(archivo),
+        "marca": marca,
+    }
+
+
+def crear_backup(incremental: bool = False, hilos: int = HILOS_BACKUP, usuario: str = None) -> Dict[str, Any]:
+    """
+    Crea un respaldo y devuelve su manifiesto. Si se pide incremental pero
+    no hay respaldo previo, se hace uno completo.
+    """
+    anteriores = listar_backups()
+    base = anteriores[-1] if incremental and anteriores else None
+
+    t0 = datetime.now()
+    nombre = t0.strftime("%Y%m%d_%H%M%S")
+    carpeta = BACKUP_DIR / nombre
+    carpeta.mkdir(parents=True, exist_ok=False)
+
+    existentes = set(inspect(engine).get_table_names())
+    tablas = [(t, clave) for nivel in ORDEN_TABLAS for t, clave in nivel if t in existentes]
+
+    principal = None
+    snapshot = None
+    try:
+        if _es_postgres():
+            # Transacción abierta durante todo el volcado para mantener viva la instantánea
+            principal = _abrir_conexion(None)
+            snapshot = principal.execute(text("SELECT pg_export_snapshot()")).scalar()
+
+        with ThreadPoolExecutor(max_workers=max(1, hilos)) as pool:
+            futuros = {}
+            for tabla, clave in tablas:
+                desde = None
+                if base and clave and (base["tablas"].get(tabla) or {}).get("marca"):
+                    desde = base["tablas"][tabla]["marca"]
+                futuros[tabla] = pool.submit(_volcar_tabla, tabla, clave, desde, carpeta, snapshot)
+            resultado_tablas = {t: f.result() for t, f in futuros.items()}
+    except Exception:
+        shutil.rmtree(carpeta, ignore_errors=True)
+        raise
+    finally:
+        if principal is not None:
+            principal.close()
+
+    manifiesto = {
+        "nombre": nombre,
+        "tipo": "incremental" if base else "completo",
+        "base": base["nombre"] if base else None,
+        "creado": t0.isoformat(timespec="seconds"),
+        "segundos": round((datetime.now() - t0).total_seconds(), 2),
+        "motor": engine.dialect.name,
+        "tablas": resultado_tablas,
+    }
+    with (carpeta / MANIFIESTO).open("w", encoding="utf-8") as f:
+        serializacion.dump(manifiesto, f)
+
+    registrar_log(usuario or "sistema", "crear_backup", {
+        "nombre": nombre,
+        "tipo": manifiesto["tipo"],
+        "filas": sum(t["filas"] or 0 for t in resultado_tablas.values()),
+        "segundos": manifiesto["segundos"],
+    })
+    return manifiesto
+
+
+# ---------------------------
+# Restauración
+# ---------------------------
+def _cargar_archivo(conn, tabla: str, archivo: Path,
+                    clave: Optional[str] = None, vistas: Optional[set] = None) -> int:
+    """
+    Carga un archivo en `tabla`. En modo local, si se pasan `clave` y
+    `vistas`, se saltan las filas cuya clave ya se cargó (solape de los
+    incrementales); en PostgreSQL eso se hace al copiar desde el staging.
+    """
+    with gzip.open(archivo, "rt", encoding="utf-8-sig", newline="") as f:
+        columnas = next(csv.reader(f), None)
+    if not columnas:
+        return 0
+    lista = ", ".join(columnas)
+
+    if _es_postgres():
+        cursor = conn.connection.cursor()
+        with gzip.open(archivo, "rb") as f:
+            cursor.copy_expert(f"COPY {tabla} ({lista}) FROM STDIN WITH (FORMAT csv, HEADER true)", f)
+        filas = cursor.rowcount
+        cursor.close()
+        return filas
+
+    insert = text(f"INSERT INTO {tabla} ({lista}) VALUES ({', '.join(':' + c for c in columnas)})")
+    filas = 0
+    with gzip.open(archivo, "rt", encoding="utf-8-sig", newline="") as f:
+        lector = csv.DictReader(f)
+        lote = []
+        for fila in lector:
+            if vistas is not None:
+                if fila[clave] in vistas:
+                    continue
+                vistas.add(fila[clave])
+            lote.append({c: (v if v != "" else None) for c, v in fila.items()})
+            if len(lote) >= TAMANO_LOTE_RESTAURAR:
+                conn.execute(insert, lote)
+                filas += len(lote)
+                lote = []
+        if lote:
+            conn.execute(insert, lote)
+            filas += len(lote)
+    return filas
+
+
+def _restaurar_tabla(tabla: str, archivos: List[Path]) -> int:
+    with engine.begin() as conn:
+        return sum(_cargar_archivo(conn, tabla, a) for a in archivos)
+
+
+def _staging(tabla: str) -> str:
+    return f"_restaurar_{tabla}"
+
+
+def _archivos_tabla(cadena: List[Dict[str, Any]], tabla: str) -> List[Path]:
+    """Última copia completa de la tabla más los incrementales posteriores."""
+    archivos = []
+    for m in cadena:
+        info = m["tablas"].get(tabla)
+        if not info:
+            continue
+        if info["modo"] == "completo":
+            archivos = []
+        archivos.append(BACKUP_DIR / m["nombre"] / info["archivo"])
+    return archivos
+
+
+def _reajustar_secuencias(conn, tablas: List[str]) -> None:
+    inspector = inspect(engine)
+    for tabla in tablas:
+        if tabla in SECUENCIAS:
+            columna, secuencia = SECUENCIAS[tabla]
+            conn.execute(text(
+                f"SELECT setval('{secuencia}', COALESCE((SELECT MAX({columna}) FROM {tabla}), 0) + 1, false)"
+            ))
+        elif "id" in {c["name"] for c in inspector.get_columns(tabla)}:
+            conn.execute(text(f"""
+                SELECT setval(pg_get_serial_sequence(:t, 'id'),
+                              COALESCE((SELECT MAX(id) FROM {tabla}), 0) + 1, false)
+            """), {"t": tabla})
+
+
+def _restaurar_postgres(cadena: List[Dict[str, Any]], todas: List[str], hilos: int) -> Dict[str, int]:
+    """
+    Carga cada tabla en su staging (en paralelo: no tienen claves foráneas)
+    y después sustituye el contenido de las tablas reales en una transacción.
+    """
+    try:
+        with engine.begin() as conn:
+            for tabla in todas:
+                conn.execute(text(f"DROP TABLE IF EXISTS {_staging(tabla)}"))
+                conn.execute(text(f"CREATE UNLOGGED TABLE {_staging(tabla)} (LIKE {tabla} INCLUDING DEFAULTS)"))
+
+        with ThreadPoolExecutor(max_workers=max(1, hilos)) as pool:
+            futuros = {t: pool.submit(_restaurar_tabla, _staging(t), _archivos_tabla(cadena, t)) for t in todas}
+            filas = {t: f.result() for t, f in futuros.items()}
+
+        with engine.begin() as conn:
+            conn.execute(text(f"TRUNCATE {', '.join(todas)} CASCADE"))
+            # `todas` va por niveles de dependencia: las referencias ya existen
+            for tabla in todas:
+                if tabla in CLAVES:
+                    # La ventana de los incrementales repite filas: una por clave
+                    conn.execute(text(
+                        f"INSERT INTO {tabla} SELECT DISTINCT ON ({CLAVES[tabla]}) * FROM {_staging(tabla)}"
+                    ))
+                else:
+                    conn.execute(text(f"INSERT INTO {tabla} SELECT * FROM {_staging(tabla)}"))
+            _reajustar_secuencias(conn, todas)
+    finally:
+        with engine.begin() as conn:
+            for tabla in todas:
+                conn.execute(text(f"DROP TABLE IF EXISTS {_staging(tabla)}"))
+    return filas
+
+
+def restaurar_backup(nombre: Optional[str] = None, hilos: int = HILOS_BACKUP,
+                     usuario: str = None) -> Dict[str, int]:
+    """
+    Restaura el respaldo `nombre` (el más reciente si es None) sustituyendo
+    el contenido de las tablas respaldadas. Devuelve las filas cargadas por tabla.
+    """
+    if nombre is None:
+        anteriores = listar_backups()
+        if not anteriores:
+            raise FileNotFoundError("No hay respaldos disponibles")
+        nombre = anteriores[-1]["nombre"]
+
+    cadena = _cadena(nombre)
+    for m in cadena:
+        for tabla, info in m["tablas"].items():
+            ruta = BACKUP_DIR / m["nombre"] / info["archivo"]
+            if _sha256(ruta) != info["sha256"]:
+                raise ValueError(f"Archivo dañado en el respaldo {m['nombre']}: {info['archivo']}")
+
+    respaldadas = set(cadena[-1]["tablas"])
+    niveles = [[t for t, _ in nivel if t in respaldadas] for nivel in ORDEN_TABLAS]
+    todas = [t for nivel in niveles for t in nivel]
+
+    if not _es_postgres():
+        filas = {}
+        with engine.begin() as conn:
+            for tabla in reversed(todas):
+                conn.execute(text(f"DELETE FROM {tabla}"))
+            for tabla in todas:
+                clave = CLAVES.get(tabla)
+                vistas = set() if clave else None
+                filas[tabla] = sum(
+                    _cargar_archivo(conn, tabla, a, clave, vistas) for a in _archivos_tabla(cadena, tabla)
+                )
+    else:
+        filas = _restaurar_postgres(cadena, todas, hilos)
+
+    registrar_log(usuario or "sistema", "restaurar_backup", {"nombre": nombre, "filas": filas})
+    return filas
+
+
+def purgar_backups(completos_a_conservar: int = 7) -> List[str]:
+    """Borra los respaldos anteriores al N-ésimo respaldo completo más reciente."""
+    backups = listar_backups()
+    completos = [i for i, m in enumerate(backups) if m["tipo"] == "completo"]
+    if len(completos) <= completos_a_conservar:
+        return []
+    corte = completos[-completos_a_conservar]
+    borrados = []
+    for m in backups[:corte]:
+        shutil.rmtree(BACKUP_DIR / m["nombre"], ignore_errors=True)
+        borrados.append(m["nombre"])
+    return borrados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Respaldos de la base de datos")
+    parser.add_argument("--incremental", action="store_true")
+    parser.add_argument("--restaurar", metavar="NOMBRE", nargs="?", const="")
+    parser.add_argument("--hilos", type=int, default=HILOS_BACKUP)
+    parser.add_argument("--conservar", type=int, default=7, help="Respaldos completos a conservar")
+    args = parser.parse_args()
 
-def backup_data_folder(dest_folder=None):
-    """
-    Realiza un backup completo de la carpeta 'data' en una subcarpeta 'backups' con timestamp.
-    Si el backup ya existe, lo sobrescribe.
-    """
-    base_dir = Path(__file__).resolve().parents[1]
-    data_dir = base_dir / "data"
-    backups_dir = base_dir / "backups"
-    backups_dir.mkdir(exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_name = f"backup_{timestamp}"
-    backup_path = backups_dir / backup_name
-    if backup_path.exists():
-        shutil.rmtree(backup_path)
-    shutil.copytree(data_dir, backup_path)
-    return str(backup_path)
+    if args.restaurar is not None:
+        cargadas = restaurar_backup(args.restaurar or None, hilos=args.hilos)
+        for tabla, n in cargadas.items():
+            print(f"♻️ {tabla}: {n} filas")
+    else:
+        m = crear_backup(incremental=args.incremental, hilos=args.hilos)
+        total = sum(t["filas"] or 0 for t in m["tablas"].values())
+        print(f"💾 Backup {m['tipo']} {m['nombre']}: {total} filas en {m['segundos']}s")
+        for borrado in purgar_backups(args.conservar):
+            print(f"🗑️ Eliminado {borrado}")
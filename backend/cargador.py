@@ -0,0 +1,71 @@
+# backend/cargador.py
+"""
+Carga en paralelo de los datasets del panel principal.
+
+productos, clientes, ventas y deudas son lecturas independientes; en vez de
+hacer los cuatro viajes a Neon uno detrás de otro, cada una corre en un hilo
+con su propia conexión del pool de backend.db. El tiempo total queda cerca
+del de la consulta más lenta.
+
+Cada dataset se devuelve como DataFrame con tipos fijos (list_*(as_frame=True),
+ver backend.frames) y con el tiempo que tardó su fuente.
+
+Funciones públicas:
+- cargar_en_paralelo(fuentes=None, max_hilos=None)
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional, Tuple
+import pandas as pd
+from .db import engine
+from . import productos, clientes, ventas, deudas
+
+logger = logging.getLogger("electrogalindez.cargador")
+
+# Cada fuente acepta as_frame=True y devuelve un DataFrame tipado (backend.frames)
+FUENTES: Dict[str, Callable[..., pd.DataFrame]] = {
+    "productos": productos.list_products,
+    "clientes": clientes.list_clients,
+    "ventas": ventas.list_sales,
+    "deudas": deudas.list_debts,
+}
+
+
+def _cargar(fuente: Callable[..., pd.DataFrame]) -> Tuple[pd.DataFrame, float]:
+    t0 = time.perf_counter()
+    df = fuente(as_frame=True)
+    return df, (time.perf_counter() - t0) * 1000
+
+
+def cargar_en_paralelo(fuentes: Optional[Iterable[str]] = None,
+                       max_hilos: Optional[int] = None) -> Tuple[Dict[str, pd.DataFrame], Dict[str, float]]:
+    """
+    Carga las `fuentes` pedidas (por defecto todas las de FUENTES) a la vez.
+
+    max_hilos: por defecto uno por fuente, sin superar el tamaño del pool
+    del motor para no quedarse esperando conexiones.
+
+    Devuelve ({nombre: DataFrame}, {nombre: milisegundos}); en los tiempos
+    "total" es el tiempo de pared de toda la carga.
+    """
+    nombres = list(fuentes or FUENTES)
+    desconocidas = [n for n in nombres if n not in FUENTES]
+    if desconocidas:
+        raise KeyError(f"Fuentes desconocidas: {desconocidas}. Usa alguna de {list(FUENTES)}")
+
+    if max_hilos is None:
+        tamano_pool = getattr(engine.pool, "size", lambda: len(nombres))()
+        max_hilos = max(1, min(len(nombres), tamano_pool))
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_hilos, thread_name_prefix="cargador") as pool:
+        futuros = {n: pool.submit(_cargar, FUENTES[n]) for n in nombres}
+        resultados = {n: f.result() for n, f in futuros.items()}
+
+    frames = {n: df for n, (df, _) in resultados.items()}
+    tiempos = {n: round(ms, 1) for n, (_, ms) in resultados.items()}
+    tiempos["total"] = round((time.perf_counter() - t0) * 1000, 1)
+    logger.info("Carga en paralelo: %s", tiempos)
+    return frames, tiempos
@@ -2,6 +2,8 @@ from typing import Dict, Any, Optional
 from sqlalchemy import text
 from .db import engine
 from .logs import registrar_log
+from .conciliacion import marcar_clientes
+from .frames import leer_frame, TIPOS
 
 def get_client(cliente_id: str) -> Optional[Dict[str, Any]]:
     """Obtiene un cliente por ID"""
@@ -116,16 +118,20 @@ def update_debt(cliente_id: str, monto: float, usuario: str = "sistema") -> Dict
                 SET deuda_total = GREATEST(deuda_total + :monto, 0)
                 WHERE id = :id
             """), {"id": cliente_id, "monto": monto})
+            marcar_clientes(conn, [cliente_id])
         registrar_log(usuario, "update_debt", {"id": cliente_id, "monto": monto})
         return get_client(cliente_id)
     except Exception as e:
         registrar_log(usuario, "error_update_debt", {"id": cliente_id, "monto": monto, "error": str(e)})
         raise
 
-def list_clients() -> list[Dict[str, Any]]:
-    """Lista todos los clientes con campos esenciales"""
+def list_clients(as_frame: bool = False):
+    """Lista todos los clientes con campos esenciales (DataFrame tipado si as_frame=True)"""
+    query = "SELECT id, nombre, telefono, ci, chapa, direccion, deuda_total FROM clientes ORDER BY nombre"
+    if as_frame:
+        return leer_frame(query, tipos=TIPOS["clientes"])
     with engine.connect() as conn:
-        result = conn.execute(text("SELECT id, nombre, telefono, ci, chapa, direccion, deuda_total FROM clientes ORDER BY nombre"))
+        result = conn.execute(text(query))
         return [dict(r._mapping) for r in result]
 
 def edit_client(cliente_id: str, nombre: Optional[str] = None, telefono: Optional[str] = None,
@@ -0,0 +1,171 @@
+# backend/conciliacion.py
+"""
+Conciliación de clientes.deuda_total.
+
+deuda_total es un saldo desnormalizado que se ajusta con update_debt(±monto)
+y se recorta con GREATEST(..., 0), así que cualquier desajuste queda oculto.
+Aquí el saldo esperado se recalcula en una sola consulta agregada a partir de
+las deudas:
+  - deuda con detalles  → suma de cantidad * precio_unitario de los detalles pendientes
+  - deuda sin detalles  → monto_total si la deuda sigue pendiente
+y se compara con el valor guardado en clientes.
+
+Cada cambio de saldo marca al cliente en conciliacion_pendientes; el modo
+incremental solo revisa esos clientes y luego limpia las marcas.
+
+Funciones públicas:
+- marcar_clientes(conn, cliente_ids)
+- conciliar_deudas(corregir=False, solo_tocados=False, tolerancia=0.01, usuario=None)
+"""
+
+import time
+from typing import Any, Dict, Iterable
+from sqlalchemy import text
+from .db import engine
+from .migraciones import asegurar_esquema
+from .logs import registrar_log
+
+# Saldo esperado por cliente; :todos=false limita el cálculo a :ids
+SALDO_ESPERADO_SQL = """
+    SELECT c.id, c.nombre,
+           COALESCE(c.deuda_total, 0) AS registrado,
+           COALESCE(s.esperado, 0) AS esperado
+    FROM clientes c
+    LEFT JOIN (
+        SELECT d.cliente_id,
+               SUM(
+                   CASE
+                       WHEN COALESCE(dd.lineas, 0) = 0 THEN
+                           CASE WHEN d.estado = 'pendiente' THEN d.monto_total ELSE 0 END
+                       ELSE dd.pendiente
+                   END
+               ) AS esperado
+        FROM deudas d
+        LEFT JOIN (
+            SELECT deuda_id, COUNT(*) AS lineas,
+                   SUM(CASE WHEN estado = 'pendiente' THEN cantidad * precio_unitario ELSE 0 END) AS pendiente
+            FROM deudas_detalle
+            GROUP BY deuda_id
+        ) dd ON dd.deuda_id = d.id
+        WHERE :todos OR d.cliente_id = ANY(CAST(:ids AS INT[]))
+        GROUP BY d.cliente_id
+    ) s ON s.cliente_id = c.id
+    WHERE (:todos OR c.id = ANY(CAST(:ids AS INT[])))
+      AND ABS(COALESCE(c.deuda_total, 0) - COALESCE(s.esperado, 0)) > :tolerancia
+"""
+
+
+# ---------------------------
+# Marcas de clientes tocados
+# ---------------------------
+def asegurar_tablas():
+    """La tabla conciliacion_pendientes la crea la migración 2 (backend.migraciones)."""
+    asegurar_esquema(2)
+
+
+def marcar_clientes(conn, cliente_ids: Iterable[Any]) -> None:
+    """Marca clientes para la próxima conciliación incremental (en la transacción `conn`)."""
+    ids = sorted({int(c) for c in cliente_ids if c is not None})
+    if not ids:
+        return
+    asegurar_tablas()
+    conn.execute(text("""
+        INSERT INTO conciliacion_pendientes (cliente_id, marcado)
+        SELECT unnest(CAST(:ids AS INT[])), NOW()
+        ON CONFLICT (cliente_id) DO UPDATE SET marcado = EXCLUDED.marcado
+    """), {"ids": ids})
+
+
+# ---------------------------
+# Conciliación
+# ---------------------------
+def conciliar_deudas(corregir: bool = False, solo_tocados: bool = False,
+                     tolerancia: float = 0.01, usuario: str = None) -> Dict[str, Any]:
+    """
+    Compara deuda_total con el saldo recalculado.
+
+    corregir: si es True, las diferencias se corrigen con un único UPDATE.
+    solo_tocados: revisar solo los clientes marcados desde la última ejecución.
+
+    Devuelve {"revisados", "diferencias": [{id, nombre, registrado, esperado,
+    diferencia}], "corregidos", "segundos"}.
+    """
+    asegurar_tablas()
+    t0 = time.perf_counter()
+
+    with engine.begin() as conn:
+        if solo_tocados:
+            marcas = conn.execute(text(
+                "SELECT cliente_id, marcado FROM conciliacion_pendientes FOR UPDATE SKIP LOCKED"
+            )).all()
+            ids = [m.cliente_id for m in marcas]
+            revisados = len(ids)
+        else:
+            marcas = []
+            ids = []
+            revisados = conn.execute(text("SELECT COUNT(*) FROM clientes")).scalar()
+
+        params = {"todos": not solo_tocados, "ids": ids, "tolerancia": tolerancia}
+        if solo_tocados and not ids:
+            filas = []
+        elif corregir:
+            filas = conn.execute(text(f"""
+                UPDATE clientes c
+                SET deuda_total = x.esperado
+                FROM ({SALDO_ESPERADO_SQL}) x
+                WHERE c.id = x.id
+                RETURNING x.id, x.nombre, x.registrado, x.esperado
+            """), params).mappings().all()
+        else:
+            filas = conn.execute(text(SALDO_ESPERADO_SQL + " ORDER BY c.nombre"), params).mappings().all()
+
+        if marcas:
+            # Solo se borran las marcas leídas; las que llegaron después se conservan
+            conn.execute(text("""
+                DELETE FROM conciliacion_pendientes p
+                USING (SELECT unnest(CAST(:ids AS INT[])) AS cliente_id,
+                              unnest(CAST(:marcados AS TIMESTAMP[])) AS marcado) m
+                WHERE p.cliente_id = m.cliente_id AND p.marcado <= m.marcado
+            """), {"ids": ids, "marcados": [m.marcado for m in marcas]})
+
+    diferencias = [
+        {
+            "id": f["id"],
+            "nombre": f["nombre"],
+            "registrado": float(f["registrado"]),
+            "esperado": float(f["esperado"]),
+            "diferencia": round(float(f["registrado"]) - float(f["esperado"]), 2),
+        }
+        for f in filas
+    ]
+    resultado = {
+        "revisados": revisados,
+        "diferencias": diferencias,
+        "corregidos": len(diferencias) if corregir else 0,
+        "segundos": round(time.perf_counter() - t0, 4),
+    }
+
+    if diferencias:
+        registrar_log(usuario or "sistema", "conciliar_deudas", {
+            "modo": "incremental" if solo_tocados else "completo",
+            "corregir": corregir,
+            "revisados": revisados,
+            "diferencias": len(diferencias),
+            "descuadre_total": round(sum(d["diferencia"] for d in diferencias), 2),
+        })
+    return resultado
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Conciliar clientes.deuda_total")
+    parser.add_argument("--corregir", action="store_true")
+    parser.add_argument("--incremental", action="store_true", help="Solo clientes tocados desde la última ejecución")
+    args = parser.parse_args()
+
+    r = conciliar_deudas(corregir=args.corregir, solo_tocados=args.incremental)
+    print(f"🔎 {r['revisados']} clientes revisados en {r['segundos']}s, {len(r['diferencias'])} con diferencias")
+    for d in r["diferencias"]:
+        print(f"  {d['id']:>6} {d['nombre'][:30]:<30} guardado {d['registrado']:>12,.2f} "
+              f"esperado {d['esperado']:>12,.2f} ({d['diferencia']:+,.2f})")
@@ -1,5 +1,12 @@
+import logging
 import os
-from sqlalchemy import create_engine, MetaData, text
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from functools import lru_cache
+from sqlalchemy import create_engine, MetaData, text, event
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 from contextlib import contextmanager
@@ -23,6 +30,175 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Objeto MetaData global
 metadata = MetaData()
 
+# ---------------------------
+# Instrumentación de consultas
+# ---------------------------
+# Cada sentencia se guarda (texto normalizado, duración, filas, función que
+# la lanzó) en un buffer circular en memoria; las que superan SQL_LENTA_MS
+# se registran además con logging. La función llamadora solo se busca en la
+# pila para las sentencias lentas o capturadas por el perfilador; el resto
+# se guarda con "?" para no recorrer frames en cada consulta.
+PERFIL_SQL = os.getenv("SQL_PERFIL", "1") != "0"
+SQL_LENTA_MS = float(os.getenv("SQL_LENTA_MS", "500"))
+TAMANO_BUFFER_SQL = int(os.getenv("SQL_BUFFER", "5000"))
+PROFUNDIDAD_LLAMADORA = 40
+
+logger = logging.getLogger("electrogalindez.sql")
+
+_consultas = deque(maxlen=TAMANO_BUFFER_SQL)
+_lentas = deque(maxlen=200)
+_consultas_lock = threading.Lock()
+
+# Captura por hilo (cada rerun de Streamlit corre en su propio hilo)
+_captura = threading.local()
+
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+_RE_CADENAS = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMEROS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_LISTAS = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+_RE_ESPACIOS = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def normalizar_sql(sentencia: str) -> str:
+    """Quita literales y espacios para agrupar sentencias equivalentes."""
+    s = _RE_CADENAS.sub("?", sentencia)
+    s = _RE_NUMEROS.sub("?", s)
+    s = _RE_LISTAS.sub("(?, ...)", s)
+    return _RE_ESPACIOS.sub(" ", s).strip()
+
+
+def _funcion_llamadora() -> str:
+    """
+    Primera función de backend (fuera de db.py) en la pila de llamadas.
+    Recorre como mucho PROFUNDIDAD_LLAMADORA frames.
+    """
+    frame = sys._getframe(2)
+    respaldo = None
+    for _ in range(PROFUNDIDAD_LLAMADORA):
+        if frame is None:
+            break
+        archivo = frame.f_code.co_filename
+        if archivo.startswith(_BACKEND_DIR) and not archivo.endswith("db.py"):
+            modulo = os.path.splitext(os.path.basename(archivo))[0]
+            return f"{modulo}.{frame.f_code.co_name}"
+        if respaldo is None and "sqlalchemy" not in archivo and not archivo.endswith("db.py"):
+            respaldo = f"{os.path.basename(archivo)}:{frame.f_code.co_name}"
+        frame = frame.f_back
+    return respaldo or "?"
+
+
+if PERFIL_SQL:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+        # En el contexto de la ejecución y no en conn.info: si la sentencia
+        # falla, after_cursor_execute no corre y conn.info sobrevive en el pool
+        context._inicio_sql = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+        inicio = getattr(context, "_inicio_sql", None)
+        if inicio is None:
+            return
+        ms = (time.perf_counter() - inicio) * 1000
+        lenta = ms >= SQL_LENTA_MS
+        destino = getattr(_captura, "registros", None)
+        funcion = _funcion_llamadora() if lenta or destino is not None else "?"
+        registro = (normalizar_sql(statement), ms, cursor.rowcount, funcion, time.time())
+        with _consultas_lock:
+            _consultas.append(registro)
+            if lenta:
+                _lentas.append(registro)
+        if destino is not None:
+            destino.append(registro)
+        if lenta:
+            logger.warning("Consulta lenta (%.0f ms, %s filas) en %s: %s",
+                           ms, registro[2], registro[3], registro[0][:300])
+
+
+def _percentil(valores_ordenados, p):
+    if not valores_ordenados:
+        return 0.0
+    i = min(len(valores_ordenados) - 1, int(round(p / 100 * (len(valores_ordenados) - 1))))
+    return valores_ordenados[i]
+
+
+def resumen_consultas(top: int = 20):
+    """
+    Sentencias del buffer agrupadas por texto normalizado y ordenadas por
+    tiempo total: llamadas, total/medio/p50/p95/p99/máx en ms, filas y la
+    función que más la lanza (entre las ejecuciones en que se resolvió).
+    """
+    with _consultas_lock:
+        registros = list(_consultas)
+
+    grupos = {}
+    for sql, ms, filas, funcion, _ in registros:
+        g = grupos.setdefault(sql, {"tiempos": [], "filas": 0, "funciones": Counter()})
+        g["tiempos"].append(ms)
+        g["filas"] += max(filas or 0, 0)
+        g["funciones"][funcion] += 1
+
+    resumen = []
+    for sql, g in grupos.items():
+        tiempos = sorted(g["tiempos"])
+        total = sum(tiempos)
+        resumen.append({
+            "sentencia": sql,
+            "funcion": next((f for f, _ in g["funciones"].most_common() if f != "?"), "?"),
+            "llamadas": len(tiempos),
+            "total_ms": round(total, 1),
+            "media_ms": round(total / len(tiempos), 2),
+            "p50_ms": round(_percentil(tiempos, 50), 2),
+            "p95_ms": round(_percentil(tiempos, 95), 2),
+            "p99_ms": round(_percentil(tiempos, 99), 2),
+            "max_ms": round(tiempos[-1], 2),
+            "filas": g["filas"],
+        })
+    resumen.sort(key=lambda r: r["total_ms"], reverse=True)
+    return resumen[:top]
+
+
+def consultas_lentas():
+    """Últimas sentencias que superaron SQL_LENTA_MS, más recientes primero."""
+    with _consultas_lock:
+        registros = list(_lentas)
+    return [
+        {"fecha": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(t)), "ms": round(ms, 1),
+         "filas": filas, "funcion": funcion, "sentencia": sql}
+        for sql, ms, filas, funcion, t in reversed(registros)
+    ]
+
+
+def iniciar_captura():
+    """Empieza a recoger las sentencias del hilo actual; devuelve la lista destino."""
+    _captura.registros = []
+    return _captura.registros
+
+
+def detener_captura():
+    """Deja de recoger y devuelve lo capturado: (sentencia, ms, filas, funcion, timestamp)."""
+    registros = getattr(_captura, "registros", None) or []
+    _captura.registros = None
+    return registros
+
+
+@contextmanager
+def capturar_consultas():
+    """Recoge en una lista las sentencias ejecutadas por el hilo actual dentro del bloque."""
+    registros = iniciar_captura()
+    try:
+        yield registros
+    finally:
+        detener_captura()
+
+
+def reiniciar_metricas():
+    """Vacía el buffer de consultas y el de consultas lentas."""
+    with _consultas_lock:
+        _consultas.clear()
+        _lentas.clear()
+
 # ---------------------------
 # Context manager para conexión
 # ---------------------------
@@ -44,6 +220,59 @@ def get_connection():
     finally:
         session.close()
 
+# ---------------------------
+# Lectura en streaming (cursor del servidor)
+# ---------------------------
+# Para recorridos de tablas completas (exportaciones, trabajos de
+# mantenimiento): las filas llegan por lotes y la memoria depende del
+# tamaño de lote, no del número de filas.
+TAMANO_LOTE_STREAM = int(os.getenv("DB_TAMANO_LOTE", "2000"))
+FORMATOS_STREAM = ("dicts", "lotes", "frames")
+
+
+@contextmanager
+def abrir_stream(query, params=None, tamano_lote: int = TAMANO_LOTE_STREAM):
+    """
+    Abre `query` con stream_results/yield_per y entrega (columnas, lotes),
+    donde `lotes` itera listas de tuplas. Cursor y conexión se cierran al salir.
+    """
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=tamano_lote).execute(
+            text(query) if isinstance(query, str) else query, params or {}
+        )
+        try:
+            yield list(result.keys()), ([tuple(f) for f in parte] for parte in result.partitions())
+        finally:
+            result.close()
+
+
+def iterar_consulta(query, params=None, tamano_lote: int = TAMANO_LOTE_STREAM, como: str = "dicts"):
+    """
+    Generador sobre el resultado de `query` leído en streaming.
+
+    como: "dicts"  → un dict por fila
+          "lotes"  → una lista de tuplas por lote
+          "frames" → un DataFrame por lote (requiere pandas)
+
+    Si se deja de iterar antes del final, la conexión se libera al cerrar
+    o recolectar el generador.
+    """
+    if como not in FORMATOS_STREAM:
+        raise ValueError(f"Formato no soportado: {como}. Usa uno de {list(FORMATOS_STREAM)}")
+    if como == "frames":
+        import pandas as pd
+
+    with abrir_stream(query, params, tamano_lote) as (columnas, lotes):
+        for lote in lotes:
+            if como == "dicts":
+                for fila in lote:
+                    yield dict(zip(columnas, fila))
+            elif como == "lotes":
+                yield lote
+            else:
+                yield pd.DataFrame.from_records(lote, columns=columnas, coerce_float=True)
+
+
 # ---------------------------
 # Función de prueba
 # ---------------------------
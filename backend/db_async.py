@@ -0,0 +1,217 @@
+# backend/db_async.py
+"""
+Capa de acceso asíncrona para lecturas (listados y agregados).
+
+Usa el AsyncEngine de SQLAlchemy sobre la misma base que backend.db:
+asyncpg para Postgres y aiosqlite para una base SQLite local. Así varias
+lecturas independientes se lanzan a la vez y el tiempo total es el de la
+consulta más lenta, no la suma de todas.
+
+El motor vive en un bucle de eventos propio (un hilo en segundo plano), de
+modo que el pool de conexiones se reutiliza entre reruns de Streamlit y el
+código síncrono de las páginas puede usarlo con ejecutar():
+
+    prods, clis = db_async.ejecutar(db_async.leer_en_paralelo(
+        db_async.list_products(), db_async.list_clients()
+    ))
+
+o directamente con resumen_dashboard(), que además vuelve al motor síncrono
+si los drivers asíncronos no están instalados.
+
+Funciones públicas:
+- disponible()
+- ejecutar(corrutina, timeout=None)
+- consultar(sql, params=None) / escalar(sql, params=None) / fila(sql, params=None)
+- leer_en_paralelo(*corrutinas)
+- list_products() / list_clients() / list_debts()
+- resumen_dashboard(hoy=None)
+"""
+
+import asyncio
+import importlib.util
+import os
+import threading
+from datetime import date, datetime, time
+from typing import Any, Dict, List, Optional
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from .db import engine, DATABASE_URL, PERFIL_SQL
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+TAMANO_POOL_ASYNC = int(os.getenv("DB_ASYNC_POOL", "5"))
+
+# Driver asíncrono por backend de la URL síncrona
+DRIVERS_ASYNC = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+_motor = None
+_bucle: Optional[asyncio.AbstractEventLoop] = None
+_lock = threading.Lock()
+
+
+# ---------------------------
+# Motor y bucle de eventos
+# ---------------------------
+def _url_async():
+    """URL del motor asíncrono y connect_args equivalentes a los de la URL síncrona."""
+    url = make_url(ASYNC_DATABASE_URL or DATABASE_URL)
+    backend = url.get_backend_name()
+    if backend not in DRIVERS_ASYNC:
+        raise RuntimeError(f"No hay driver asíncrono configurado para '{backend}'.")
+
+    connect_args = {}
+    query = dict(url.query)
+    if backend == "postgresql":
+        # asyncpg no entiende los parámetros de libpq de la URL de Neon
+        sslmode = query.pop("sslmode", None)
+        query.pop("channel_binding", None)
+        if sslmode and sslmode != "disable":
+            connect_args["ssl"] = "require"
+    return url.set(drivername=f"{backend}+{DRIVERS_ASYNC[backend]}", query=query), connect_args
+
+
+def disponible() -> bool:
+    """True si el driver asíncrono de la base configurada está instalado."""
+    try:
+        backend = make_url(ASYNC_DATABASE_URL or DATABASE_URL).get_backend_name()
+    except Exception:
+        return False
+    driver = DRIVERS_ASYNC.get(backend)
+    return driver is not None and importlib.util.find_spec(driver) is not None
+
+
+def _obtener_motor():
+    global _motor
+    if _motor is None:
+        if not disponible():
+            raise RuntimeError(
+                "La capa asíncrona requiere instalar 'asyncpg' (Postgres) o 'aiosqlite' (SQLite)."
+            )
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        url, connect_args = _url_async()
+        opciones = {"pool_pre_ping": True}
+        if url.get_backend_name() == "postgresql":
+            opciones.update(pool_size=TAMANO_POOL_ASYNC, max_overflow=TAMANO_POOL_ASYNC)
+        _motor = create_async_engine(url, connect_args=connect_args, **opciones)
+
+        if PERFIL_SQL:
+            # Mismas métricas que el motor síncrono (backend.db)
+            from .db import _antes_de_ejecutar, _despues_de_ejecutar
+            event.listen(_motor.sync_engine, "before_cursor_execute", _antes_de_ejecutar)
+            event.listen(_motor.sync_engine, "after_cursor_execute", _despues_de_ejecutar)
+    return _motor
+
+
+def _obtener_bucle() -> asyncio.AbstractEventLoop:
+    global _bucle
+    with _lock:
+        if _bucle is None:
+            _bucle = asyncio.new_event_loop()
+            threading.Thread(target=_bucle.run_forever, name="db-async", daemon=True).start()
+    return _bucle
+
+
+def ejecutar(corrutina, timeout: Optional[float] = None):
+    """Ejecuta `corrutina` en el bucle de la capa asíncrona y espera el resultado."""
+    return asyncio.run_coroutine_threadsafe(corrutina, _obtener_bucle()).result(timeout)
+
+
+# ---------------------------
+# Primitivas
+# ---------------------------
+async def consultar(sql: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    async with _obtener_motor().connect() as conn:
+        result = await conn.execute(text(sql), params or {})
+        return [dict(r._mapping) for r in result]
+
+
+async def fila(sql: str, params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    async with _obtener_motor().connect() as conn:
+        result = await conn.execute(text(sql), params or {})
+        r = result.mappings().first()
+        return dict(r) if r is not None else None
+
+
+async def escalar(sql: str, params: Optional[Dict[str, Any]] = None):
+    async with _obtener_motor().connect() as conn:
+        return (await conn.execute(text(sql), params or {})).scalar()
+
+
+async def leer_en_paralelo(*corrutinas) -> list:
+    """Lanza las lecturas a la vez (una conexión del pool cada una) y devuelve sus resultados en orden."""
+    return list(await asyncio.gather(*corrutinas))
+
+
+# ---------------------------
+# Listados
+# ---------------------------
+async def list_products() -> List[Dict[str, Any]]:
+    return await consultar("SELECT * FROM productos ORDER BY nombre")
+
+
+async def list_clients() -> List[Dict[str, Any]]:
+    return await consultar(
+        "SELECT id, nombre, telefono, ci, chapa, direccion, deuda_total FROM clientes ORDER BY nombre"
+    )
+
+
+async def list_debts() -> List[Dict[str, Any]]:
+    return await consultar("SELECT * FROM deudas ORDER BY fecha DESC")
+
+
+# ---------------------------
+# Agregados del dashboard
+# ---------------------------
+# Cada uno es independiente de los demás: se pueden lanzar en paralelo.
+AGREGADOS_DASHBOARD = {
+    "ventas": """
+        SELECT COALESCE(SUM(total) FILTER (WHERE fecha >= :hoy), 0) AS total_hoy,
+               COUNT(*) FILTER (WHERE fecha >= :hoy) AS ventas_hoy,
+               COALESCE(SUM(total) FILTER (WHERE fecha >= :inicio_mes), 0) AS total_mes,
+               COALESCE(SUM(total), 0) AS total,
+               COALESCE(SUM(saldo), 0) AS saldo
+        FROM ventas
+    """,
+    "deudas": """
+        SELECT COALESCE(SUM(monto_total) FILTER (WHERE estado = 'pendiente'), 0) AS pendiente
+        FROM deudas
+    """,
+    "productos": """
+        SELECT COUNT(*) AS productos, COUNT(*) FILTER (WHERE cantidad <= 5) AS stock_bajo
+        FROM productos
+    """,
+    "clientes": """
+        SELECT COUNT(*) AS clientes, COUNT(*) FILTER (WHERE deuda_total > 0) AS con_deuda
+        FROM clientes
+    """,
+}
+
+
+def _parametros_dashboard(hoy: Optional[date]) -> Dict[str, Any]:
+    # datetime y no date: asyncpg no convierte date al comparar con TIMESTAMP
+    hoy = datetime.combine(hoy or date.today(), time.min)
+    return {"hoy": hoy, "inicio_mes": hoy.replace(day=1)}
+
+
+async def resumen_dashboard_async(hoy: Optional[date] = None) -> Dict[str, Dict[str, Any]]:
+    params = _parametros_dashboard(hoy)
+    nombres = list(AGREGADOS_DASHBOARD)
+    filas = await leer_en_paralelo(*(fila(AGREGADOS_DASHBOARD[n], params) for n in nombres))
+    return dict(zip(nombres, filas))
+
+
+def resumen_dashboard(hoy: Optional[date] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    KPIs del panel principal: {"ventas": {...}, "deudas": {...}, "productos": {...}, "clientes": {...}}.
+    Las cuatro consultas van en paralelo si hay driver asíncrono; si no, en
+    secuencia con el motor síncrono.
+    """
+    if disponible():
+        return ejecutar(resumen_dashboard_async(hoy))
+
+    params = _parametros_dashboard(hoy)
+    with engine.connect() as conn:
+        return {
+            nombre: dict(conn.execute(text(sql), params).mappings().first())
+            for nombre, sql in AGREGADOS_DASHBOARD.items()
+        }
@@ -8,13 +8,18 @@ Funciones públicas:
 - pay_debt_producto(deuda_id, producto_id, monto_pago, usuario=None)
 - debts_by_client(cliente_id)
 - delete_debt(deuda_id, usuario=None)
+- antiguedad_deudas(corte=None)
 """
 
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from sqlalchemy import text
 from .db import engine
+from .migraciones import asegurar_esquema
 from .clientes import update_debt
+from .conciliacion import marcar_clientes
+from .paginacion import pagina_keyset
+from .frames import leer_frame, TIPOS
 from backend.ventas import get_sale
 from backend import ventas
 
@@ -22,10 +27,13 @@ from backend import ventas
 # ======================================================
 # 📜 Listar todas las deudas
 # ======================================================
-def list_debts() -> List[Dict[str, Any]]:
-    query = text("SELECT * FROM deudas ORDER BY fecha DESC")
+def list_debts(as_frame: bool = False):
+    """Todas las deudas; con as_frame=True como DataFrame tipado (backend.frames)."""
+    query = "SELECT * FROM deudas ORDER BY fecha DESC"
+    if as_frame:
+        return leer_frame(query, tipos=TIPOS["deudas"])
     with engine.connect() as conn:
-        result = conn.execute(query)
+        result = conn.execute(text(query))
         return [dict(row._mapping) for row in result]
 
 
@@ -154,6 +162,7 @@ def pay_debt_producto(deuda_id: int, producto_id: int, monto_pago: float, usuari
             SET estado=:estado
             WHERE id=:deuda_id
         """), {"estado": estado_deuda, "deuda_id": deuda_id})
+        marcar_clientes(conn, [deuda["cliente_id"]])
 
         # Actualizar venta asociada
         if total_restante <= 0:
@@ -243,16 +252,102 @@ def delete_debt(deuda_id: int, usuario: Optional[str] = None) -> bool:
 # ======================================================
 # 📊 Listar todos los detalles de deudas
 # ======================================================
-def list_detalle_deudas():
-    query = text("""
-        SELECT dd.id AS detalle_id, dd.deuda_id, dd.producto_id, dd.cantidad, dd.precio_unitario, dd.estado,
-               d.cliente_id, d.fecha, d.monto_total, d.estado AS estado_deuda
+# Ordenaciones permitidas (nunca se interpola texto del usuario)
+ORDENES_DETALLE = {
+    "fecha_desc": "d.fecha DESC, dd.id DESC",
+    "fecha_asc": "d.fecha ASC, dd.id ASC",
+    "cliente": "c.nombre ASC, d.fecha DESC, dd.id DESC",
+    "monto_desc": "dd.cantidad * dd.precio_unitario DESC, dd.id DESC",
+}
+
+# Los mismos órdenes sobre las columnas de salida, para pagina_detalle_deudas
+ORDENES_KEYSET_DETALLE = {
+    "fecha_desc": [("fecha", True), ("detalle_id", True)],
+    "fecha_asc": [("fecha", False), ("detalle_id", False)],
+    "cliente": [("cliente", False), ("fecha", True), ("detalle_id", True)],
+    "monto_desc": [("monto", True), ("detalle_id", True)],
+}
+
+DETALLE_SQL = """
+    SELECT dd.id AS detalle_id, dd.deuda_id, dd.producto_id, dd.cantidad, dd.precio_unitario, dd.estado,
+           dd.cantidad * dd.precio_unitario AS monto,
+           d.cliente_id, d.fecha, d.monto_total, d.estado AS estado_deuda,
+           COALESCE(c.nombre, 'Desconocido') AS cliente,
+           COALESCE(p.nombre, 'Producto') AS producto
+    FROM deudas_detalle dd
+    JOIN deudas d ON d.id = dd.deuda_id
+    LEFT JOIN clientes c ON c.id = d.cliente_id
+    LEFT JOIN productos p ON p.id = dd.producto_id
+"""
+
+
+def _filtros_detalle(estado=None, cliente_id=None, desde=None, hasta=None):
+    """WHERE común del listado de detalles; el rango de fechas es semiabierto."""
+    where = """
+        WHERE (CAST(:estado AS TEXT) IS NULL OR dd.estado = :estado)
+          AND (CAST(:cliente_id AS INT) IS NULL OR d.cliente_id = :cliente_id)
+          AND (CAST(:desde AS DATE) IS NULL OR d.fecha >= :desde)
+          AND (CAST(:hasta AS DATE) IS NULL OR d.fecha < CAST(:hasta AS DATE) + 1)
+    """
+    params = {"estado": estado, "cliente_id": cliente_id, "desde": desde, "hasta": hasta}
+    return where, params
+
+
+def list_detalle_deudas(estado: Optional[str] = None, cliente_id: Optional[int] = None,
+                        desde=None, hasta=None, orden: str = "fecha_desc",
+                        limite: Optional[int] = None, offset: int = 0, as_frame: bool = False):
+    """
+    Detalles de deudas con los nombres de cliente y producto ya resueltos.
+    Sin argumentos devuelve todos los detalles; con `limite` devuelve una página.
+    as_frame=True devuelve un DataFrame tipado en vez de una lista de dicts.
+    """
+    if orden not in ORDENES_DETALLE:
+        raise ValueError(f"Orden no soportado: {orden}. Usa uno de {list(ORDENES_DETALLE)}")
+
+    where, params = _filtros_detalle(estado, cliente_id, desde, hasta)
+    paginacion = ""
+    if limite is not None:
+        paginacion = "LIMIT :limite OFFSET :offset"
+        params.update({"limite": limite, "offset": offset})
+
+    query = text(f"""
+        {DETALLE_SQL}
+        {where}
+        ORDER BY {ORDENES_DETALLE[orden]}
+        {paginacion}
+    """)
+    if as_frame:
+        return leer_frame(query, params, tipos=TIPOS["detalle_deudas"])
+    with engine.connect() as conn:
+        return [dict(row._mapping) for row in conn.execute(query, params)]
+
+
+def pagina_detalle_deudas(estado: Optional[str] = None, cliente_id: Optional[int] = None,
+                          desde=None, hasta=None, orden: str = "fecha_desc",
+                          despues: Optional[tuple] = None, limite: int = 50):
+    """
+    Como list_detalle_deudas pero paginado por keyset: el coste de cada página
+    no crece con su posición. Devuelve (filas, siguiente).
+    """
+    if orden not in ORDENES_KEYSET_DETALLE:
+        raise ValueError(f"Orden no soportado: {orden}. Usa uno de {list(ORDENES_KEYSET_DETALLE)}")
+    where, params = _filtros_detalle(estado, cliente_id, desde, hasta)
+    return pagina_keyset(f"{DETALLE_SQL} {where}", params, ORDENES_KEYSET_DETALLE[orden], despues, limite)
+
+
+def resumen_detalle_deudas(estado: Optional[str] = None, cliente_id: Optional[int] = None,
+                           desde=None, hasta=None) -> Dict[str, Any]:
+    """Número de detalles y monto total con los mismos filtros que list_detalle_deudas."""
+    where, params = _filtros_detalle(estado, cliente_id, desde, hasta)
+    query = text(f"""
+        SELECT COUNT(*) AS total, COALESCE(SUM(dd.cantidad * dd.precio_unitario), 0) AS monto
         FROM deudas_detalle dd
         JOIN deudas d ON d.id = dd.deuda_id
-        ORDER BY d.fecha DESC
+        {where}
     """)
     with engine.connect() as conn:
-        return [dict(row._mapping) for row in conn.execute(query)]
+        row = conn.execute(query, params).mappings().first()
+        return {"total": row["total"], "monto": float(row["monto"])}
 
 
 # ======================================================
@@ -268,19 +363,154 @@ def list_clientes_con_deuda():
     """)
     with engine.connect() as conn:
         return [dict(row._mapping) for row in conn.execute(query)]
-    
+
+
+# ======================================================
+# ⏳ Antigüedad de deudas
+# ======================================================
+TRAMOS_ANTIGUEDAD = ["0-30 días", "31-60 días", "61-90 días", "90+ días"]
+
+
+def _asegurar_indices():
+    """El índice parcial de detalles pendientes lo crea la migración 2 (backend.migraciones)."""
+    asegurar_esquema(2)
+
+
+def consulta_antiguedad(corte=None):
+    """
+    SQL y parámetros del reporte de antigüedad: por cliente, monto y número
+    de líneas pendientes en cada tramo de días, más una fila final de totales.
+    """
+    query = """
+        WITH pendiente AS (
+            SELECT d.cliente_id,
+                   CAST(:corte AS DATE) - d.fecha::date AS dias,
+                   dd.cantidad * dd.precio_unitario AS monto
+            FROM deudas_detalle dd
+            JOIN deudas d ON d.id = dd.deuda_id
+            WHERE dd.estado = 'pendiente'
+        )
+        SELECT CASE WHEN GROUPING(p.cliente_id) = 1 THEN 'TOTAL'
+                    ELSE COALESCE(MAX(c.nombre), 'Desconocido') END AS "Cliente",
+               COALESCE(SUM(monto) FILTER (WHERE dias <= 30), 0) AS "0-30 días",
+               COALESCE(SUM(monto) FILTER (WHERE dias BETWEEN 31 AND 60), 0) AS "31-60 días",
+               COALESCE(SUM(monto) FILTER (WHERE dias BETWEEN 61 AND 90), 0) AS "61-90 días",
+               COALESCE(SUM(monto) FILTER (WHERE dias > 90), 0) AS "90+ días",
+               COALESCE(SUM(monto), 0) AS "Total",
+               COUNT(*) FILTER (WHERE dias <= 30) AS "Líneas 0-30",
+               COUNT(*) FILTER (WHERE dias BETWEEN 31 AND 60) AS "Líneas 31-60",
+               COUNT(*) FILTER (WHERE dias BETWEEN 61 AND 90) AS "Líneas 61-90",
+               COUNT(*) FILTER (WHERE dias > 90) AS "Líneas 90+",
+               COUNT(*) AS "Líneas",
+               MAX(dias) AS "Días máx."
+        FROM pendiente p
+        LEFT JOIN clientes c ON c.id = p.cliente_id
+        GROUP BY GROUPING SETS ((p.cliente_id), ())
+        ORDER BY GROUPING(p.cliente_id), "Total" DESC
+    """
+    return query, {"corte": corte or datetime.now().date()}
+
+
+def antiguedad_deudas(corte=None) -> List[Dict[str, Any]]:
+    """
+    Reporte de antigüedad de saldos a la fecha `corte` (hoy por defecto).
+    La última fila ("TOTAL") suma todos los clientes.
+    """
+    _asegurar_indices()
+    query, params = consulta_antiguedad(corte)
+    with engine.connect() as conn:
+        return [dict(row._mapping) for row in conn.execute(text(query), params)]
+
 
 from io import BytesIO
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
-from reportlab.platypus import Table, TableStyle
-from reportlab.lib.utils import ImageReader
-import os
-from datetime import datetime
+from reportlab.platypus import Table
+from .facturas import cargar_logo, ESTILO_TABLA, ANCHOS_TABLA
+
+# ======================================================
+# 🧾 Comprobantes de pago de deuda
+# ======================================================
+# Líneas de producto por hoja; con más líneas el comprobante se pagina
+LINEAS_POR_PAGINA = 6
+
+# Días que se conserva el PDF de un comprobante antes de purgarlo
+RETENCION_COMPROBANTES_DIAS = 180
+
+
+def _asegurar_comprobantes():
+    """La secuencia y la tabla de comprobantes las crea la migración 2 (backend.migraciones)."""
+    asegurar_esquema(2)
+
+
+def siguiente_numero_comprobante() -> int:
+    """Número consecutivo de comprobante tomado de una secuencia de la BD."""
+    _asegurar_comprobantes()
+    with engine.begin() as conn:
+        return conn.execute(text("SELECT nextval('comprobantes_pago_seq')")).scalar()
+
+
+def _dibujar_comprobante(c, numero, deuda_id, fecha_pago, cliente, filas, pagina, total_paginas,
+                         total_pagado, metodo_pago, observaciones, logo):
+    """Dibuja una copia de una página del comprobante en la mitad superior de la hoja."""
+    width, height = letter
+    line_height = 14
+    top = height - 40
+
+    # Logo y título
+    if logo:
+        c.drawImage(logo, 40, top - 45, width=70, height=50, preserveAspectRatio=True)
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(130, top - 10, "COMPROBANTE DE PAGO DE DEUDA")
+    c.setFont("Helvetica", 9)
+    if total_paginas > 1:
+        c.drawRightString(width - 40, top - 10, f"Página {pagina} de {total_paginas}")
+
+    # Datos del comprobante (izquierda)
+    c.setFont("Helvetica", 10)
+    y = top - 30
+    c.drawString(130, y, f"Comprobante N°: {numero}"); y -= line_height
+    c.drawString(130, y, f"No. de Deuda: {deuda_id if deuda_id is not None else 'N/A'}"); y -= line_height
+    c.drawString(130, y, f"Fecha de Pago: {fecha_pago}")
+
+    # Datos del cliente (derecha)
+    y = top - 30
+    c.drawString(330, y, f"Cliente: {cliente.get('nombre','N/A')}"); y -= line_height
+    c.drawString(330, y, f"CI / Documento: {cliente.get('ci','N/A')}"); y -= line_height
+    c.drawString(330, y, f"Teléfono: {cliente.get('telefono','N/A')}"); y -= line_height
+    c.drawString(330, y, f"Chapa: {cliente.get('chapa','N/A')}"); y -= line_height
+    c.drawString(330, y, f"Dirección: {str(cliente.get('direccion','N/A'))[:40]}")
+
+    # Tabla de productos de esta página
+    table_top = top - 110
+    table_data = [["Producto", "Cantidad", "Precio Unitario", "Monto Pagado"]] + filas
+    table = Table(table_data, colWidths=ANCHOS_TABLA)
+    table.setStyle(ESTILO_TABLA)
+    _, alto = table.wrapOn(c, width - 100, table_top)
+    table.drawOn(c, 50, table_top - alto)
+    y = table_top - alto - 18
+
+    if pagina < total_paginas:
+        c.setFont("Helvetica-Oblique", 9)
+        c.drawString(50, y, "Continúa en la página siguiente...")
+        return
+
+    # Totales y firmas solo en la última página
+    c.setFont("Helvetica", 10)
+    c.drawString(50, y, f"Total Pagado: ${total_pagado:.2f}")
+    c.drawString(250, y, f"Método de pago: {metodo_pago or 'N/A'}")
+    y -= line_height
+    if observaciones:
+        c.drawString(50, y, f"Observaciones: {str(observaciones)[:90]}")
+        y -= line_height
+
+    firma_y = y - 30
+    c.drawString(50, firma_y, "__________________________")
+    c.drawString(50, firma_y - 12, "Firma Cliente")
+    c.drawString(320, firma_y, "__________________________")
+    c.drawString(320, firma_y - 12, "Firma Vendedor / Responsable")
 
-# Contador simple global para número de deuda
-DEUDA_COUNTER = 1
 
 def generar_factura_pago_deuda(
     cliente,
@@ -289,108 +519,120 @@ def generar_factura_pago_deuda(
     usuario="desconocido",
     metodo_pago="Efectivo",
     observaciones="",
-    logo_path="assets/logo.png"
+    logo_path="assets/logo.png",
+    numero=None
 ):
     """
     Genera un PDF de factura de pago de deuda para un cliente,
     duplicada en la misma hoja (una copia para el cliente y otra para archivo interno).
+
+    Si hay más de LINEAS_POR_PAGINA productos, el comprobante ocupa varias hojas.
+    Si no se pasa `numero`, se toma el siguiente de la secuencia de la BD.
     """
-    global DEUDA_COUNTER
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=letter)
     width, height = letter
-    line_height = 15
 
-    # ---------------- Logo ----------------
-    logo = None
-    if os.path.exists(logo_path):
-        try:
-            logo = ImageReader(logo_path)
-        except Exception as e:
-            print(f"No se pudo cargar el logo: {e}")
-
-    # Generar número de deuda consecutivo si no se pasa
-    if deuda_id is None:
-        deuda_id = DEUDA_COUNTER
-        DEUDA_COUNTER += 1
+    if numero is None:
+        numero = siguiente_numero_comprobante()
 
     # Fecha de pago actual
     fecha_pago = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
 
-    def draw_factura(y_offset=0):
-        nonlocal c
-        current_y = height - 50 - y_offset
-
-        # Logo
-        if logo:
-            c.drawImage(logo, 40, current_y - 30, width=80, height=60, preserveAspectRatio=True)
-
-        # Título
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(150, current_y, "COMPROBANTE DE PAGO DE DEUDA")
-
-        # Info deuda
-        c.setFont("Helvetica", 10)
-        current_y -= 40
-        c.drawString(50, current_y, f"No. de Deuda: {str(deuda_id)}")
-        current_y -= line_height
-        c.drawString(50, current_y, f"Fecha de Pago: {fecha_pago}")
-        current_y -= line_height
-
-        # Info cliente
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(50, current_y, "Datos del Cliente:")
-        current_y -= line_height
-        c.setFont("Helvetica", 10)
-        c.drawString(50, current_y, f"Nombre: {cliente.get('nombre','N/A')}"); current_y -= line_height
-        c.drawString(50, current_y, f"CI / Documento: {cliente.get('ci','N/A')}"); current_y -= line_height
-        c.drawString(50, current_y, f"Dirección: {cliente.get('direccion','N/A')}"); current_y -= line_height
-        c.drawString(50, current_y, f"Teléfono: {cliente.get('telefono','N/A')}"); current_y -= line_height
-        c.drawString(50, current_y, f"Chapa: {cliente.get('chapa','N/A')}"); current_y -= line_height + 10
-
-        # Tabla productos
-        table_y = current_y
-        table_data = [["Producto", "Cantidad", "Precio Unitario", "Monto Pagado"]]
-        total_pagado = 0
-        for p in productos_pagados:
-            cantidad = float(p.get("cantidad") or 0)
-            precio = float(p.get("precio_unitario") or 0)
-            subtotal = cantidad * precio
-            total_pagado += subtotal
-            table_data.append([p.get("nombre",""), str(int(cantidad)), f"${precio:.2f}", f"${subtotal:.2f}"])
-
-        table = Table(table_data, colWidths=[200, 80, 100, 100])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0,0), (-1,0), colors.gray),
-            ('TEXTCOLOR',(0,0),(-1,0),colors.whitesmoke),
-            ('ALIGN',(1,1),(-1,-1),'CENTER'),
-            ('GRID', (0,0), (-1,-1), 1, colors.black),
-            ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold')
-        ]))
-        table.wrapOn(c, 50, table_y - 20)
-        table.drawOn(c, 50, table_y - len(table_data)*18)
-
-        # Totales
-        c.drawString(50, table_y - len(table_data)*18 - 20, f"Total Pagado: ${total_pagado:.2f}")
-        c.drawString(50, table_y - len(table_data)*18 - 40, f"Método de pago: {metodo_pago or 'N/A'}")
-        if observaciones:
-            c.drawString(50, table_y - len(table_data)*18 - 60, f"Observaciones: {observaciones}")
-
-        # Firmas
-        firma_y = table_y - len(table_data)*18 - 100
-        c.drawString(50, firma_y, "__________________________")
-        c.drawString(50, firma_y - 12, "Firma Cliente")
-        c.drawString(320, firma_y, "__________________________")
-        c.drawString(320, firma_y - 12, "Firma Vendedor / Responsable")
-
-    # ---------------- Dibujar dos facturas en la misma hoja ----------------
-    draw_factura(y_offset=0)
-    c.setStrokeColor(colors.gray)
-    c.setLineWidth(1)
-    c.line(40, height/2, width-40, height/2)  # línea divisoria
-    draw_factura(y_offset=height/2)
-
-    c.showPage()
+    filas = []
+    total_pagado = 0
+    for p in productos_pagados:
+        cantidad = float(p.get("cantidad") or 0)
+        precio = float(p.get("precio_unitario") or 0)
+        subtotal = cantidad * precio
+        total_pagado += subtotal
+        filas.append([p.get("nombre",""), str(int(cantidad)), f"${precio:.2f}", f"${subtotal:.2f}"])
+
+    paginas = [filas[i:i + LINEAS_POR_PAGINA] for i in range(0, len(filas), LINEAS_POR_PAGINA)] or [[]]
+    logo = cargar_logo(logo_path)
+
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+
+    for n, filas_pagina in enumerate(paginas, start=1):
+        nombre_form = f"comprobante_{numero}_{n}"
+        c.beginForm(nombre_form)
+        _dibujar_comprobante(
+            c, numero, deuda_id, fecha_pago, cliente, filas_pagina, n, len(paginas),
+            total_pagado, metodo_pago, observaciones, logo
+        )
+        c.endForm()
+
+        # ---------------- Dos copias en la misma hoja ----------------
+        c.doForm(nombre_form)
+        c.setStrokeColor(colors.gray)
+        c.setLineWidth(1)
+        c.line(40, height/2, width-40, height/2)  # línea divisoria
+        c.saveState()
+        c.translate(0, -height/2)
+        c.doForm(nombre_form)
+        c.restoreState()
+        c.showPage()
+
     c.save()
     buffer.seek(0)
     return buffer.getvalue()
+
+
+def purgar_comprobantes(dias: int = RETENCION_COMPROBANTES_DIAS) -> int:
+    """Elimina los PDFs de comprobantes más antiguos que `dias`. Devuelve cuántos borró."""
+    _asegurar_comprobantes()
+    with engine.begin() as conn:
+        return conn.execute(
+            text("DELETE FROM comprobantes_pago WHERE fecha < NOW() - make_interval(days => :dias)"),
+            {"dias": dias}
+        ).rowcount
+
+
+def emitir_comprobante_pago(
+    cliente,
+    productos_pagados,
+    deuda_id=None,
+    usuario="desconocido",
+    metodo_pago="Efectivo",
+    observaciones=""
+) -> Dict[str, Any]:
+    """
+    Numera, genera y guarda un comprobante de pago en la tabla comprobantes_pago.
+    Devuelve solo la referencia {"numero", "nombre"}; el PDF se recupera con
+    obtener_comprobante(numero).
+    """
+    if isinstance(usuario, dict):
+        usuario = usuario.get("username", "desconocido")
+
+    numero = siguiente_numero_comprobante()
+    pdf_bytes = generar_factura_pago_deuda(
+        cliente, productos_pagados, deuda_id=deuda_id, usuario=usuario,
+        metodo_pago=metodo_pago, observaciones=observaciones, numero=numero
+    )
+    nombre = f"ComprobantePago_{numero}.pdf"
+
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO comprobantes_pago (numero, deuda_id, cliente_id, usuario, nombre_archivo, fecha, pdf)
+            VALUES (:numero, :deuda_id, :cliente_id, :usuario, :nombre, NOW(), :pdf)
+        """), {
+            "numero": numero,
+            "deuda_id": deuda_id,
+            "cliente_id": cliente.get("id"),
+            "usuario": usuario,
+            "nombre": nombre,
+            "pdf": pdf_bytes
+        })
+
+    purgar_comprobantes()
+    return {"numero": numero, "nombre": nombre}
+
+
+def obtener_comprobante(numero: int) -> Optional[bytes]:
+    """Devuelve el PDF de un comprobante guardado, o None si ya fue purgado."""
+    _asegurar_comprobantes()
+    with engine.connect() as conn:
+        pdf = conn.execute(
+            text("SELECT pdf FROM comprobantes_pago WHERE numero = :numero"),
+            {"numero": numero}
+        ).scalar()
+    return bytes(pdf) if pdf is not None else None
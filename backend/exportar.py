@@ -0,0 +1,263 @@
+# backend/exportar.py
+"""
+Exportación de tablas grandes a Excel, CSV o Parquet sin pasar por pandas.
+
+Las filas se leen con un cursor del lado del servidor (backend.db.abrir_stream) en
+lotes de tamaño fijo y se escriben directamente al archivo de salida:
+- xlsx: xlsxwriter en modo constant_memory (una fila en memoria a la vez)
+- csv / csv.gz: módulo csv estándar (gzip opcional)
+- parquet: pyarrow.parquet.ParquetWriter, un row group por lote (opcional)
+
+Funciones públicas:
+- exportar_consulta(query, params, formato, ...)
+- exportar_dataset(nombre, formato, **params)
+"""
+
+import csv
+import gzip
+import os
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+from .db import abrir_stream
+
+FORMATOS = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "csv.gz": "application/gzip",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+TAMANO_LOTE = 2000
+
+EXPORT_DIR = Path(tempfile.gettempdir()) / "electrogalindez_exports"
+
+
+# ---------------------------
+# Consultas predefinidas
+# ---------------------------
+DATASETS: Dict[str, str] = {
+    "inventario": """
+        SELECT p.id AS "ID", p.nombre AS "Nombre", c.nombre AS "Categoría",
+               p.cantidad AS "Cantidad", p.precio AS "Precio"
+        FROM productos p
+        LEFT JOIN categorias c ON c.id = p.categoria_id
+        ORDER BY p.nombre
+    """,
+    "ventas": """
+        SELECT v.id AS "ID Venta", v.fecha AS "Fecha", cl.nombre AS "Cliente",
+               cl.telefono AS "Teléfono", item->>'nombre' AS "Producto",
+               (item->>'cantidad')::numeric AS "Cantidad",
+               (item->>'precio_unitario')::numeric AS "Precio Unitario",
+               (item->>'subtotal')::numeric AS "Subtotal",
+               v.total AS "Total Venta", v.pagado AS "Pagado",
+               GREATEST(v.total - v.pagado, 0) AS "Saldo Pendiente",
+               CASE WHEN v.pagado >= v.total THEN 'Pagada' ELSE 'Pendiente' END AS "Estado"
+        FROM ventas v
+        LEFT JOIN clientes cl ON cl.id = v.cliente_id
+        CROSS JOIN LATERAL json_array_elements(COALESCE(v.productos_vendidos::json, '[]'::json)) AS item
+        WHERE v.fecha::date BETWEEN :desde AND :hasta
+          AND (CAST(:estado AS TEXT) IS NULL
+               OR CASE WHEN v.pagado >= v.total THEN 'Pagada' ELSE 'Pendiente' END = :estado)
+        ORDER BY v.fecha DESC, v.id
+    """,
+    "deudas_pendientes": """
+        SELECT cl.nombre AS "Cliente", d.id AS "Deuda ID", p.nombre AS "Producto",
+               dd.cantidad AS "Cantidad", dd.precio_unitario AS "Precio Unitario",
+               dd.cantidad * dd.precio_unitario AS "Monto Total", d.fecha AS "Fecha"
+        FROM deudas_detalle dd
+        JOIN deudas d ON d.id = dd.deuda_id
+        LEFT JOIN clientes cl ON cl.id = d.cliente_id
+        LEFT JOIN productos p ON p.id = dd.producto_id
+        WHERE dd.estado = 'pendiente'
+        ORDER BY d.fecha DESC, cl.nombre
+    """,
+    "logs": """
+        SELECT fecha AS "Fecha", usuario AS "Usuario", accion AS "Acción", detalles AS "Detalles"
+        FROM logs
+        WHERE fecha >= :desde AND fecha < CAST(:hasta AS DATE) + 1
+        ORDER BY fecha DESC
+    """,
+}
+
+# Tipos Parquet de cada dataset (alias de pyarrow). El esquema del archivo
+# sale de aquí y no del primer lote: una columna vacía en ese lote tendría
+# tipo null y los lotes siguientes no se podrían convertir.
+TIPOS_PARQUET: Dict[str, Dict[str, str]] = {
+    "inventario": {
+        "ID": "int64", "Nombre": "string", "Categoría": "string", "Cantidad": "int64", "Precio": "double",
+    },
+    "ventas": {
+        "ID Venta": "int64", "Fecha": "timestamp[us]", "Cliente": "string", "Teléfono": "string",
+        "Producto": "string", "Cantidad": "double", "Precio Unitario": "double", "Subtotal": "double",
+        "Total Venta": "double", "Pagado": "double", "Saldo Pendiente": "double", "Estado": "string",
+    },
+    "deudas_pendientes": {
+        "Cliente": "string", "Deuda ID": "int64", "Producto": "string", "Cantidad": "double",
+        "Precio Unitario": "double", "Monto Total": "double", "Fecha": "timestamp[us]",
+    },
+    "logs": {"Fecha": "timestamp[us]", "Usuario": "string", "Acción": "string", "Detalles": "string"},
+}
+
+PARAMS_POR_DEFECTO: Dict[str, Dict[str, Any]] = {
+    "ventas": {"estado": None},
+}
+
+
+def _valor_celda(valor):
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, (dict, list)):
+        return str(valor)
+    return valor
+
+
+# ---------------------------
+# Escritores
+# ---------------------------
+def _escribir_xlsx(destino: Path, columnas, lotes, nombre_hoja: str,
+                   color_fila: Optional[Callable[[Dict[str, Any]], Optional[str]]]) -> int:
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(str(destino), {"constant_memory": True, "remove_timezone": True})
+    try:
+        hoja = workbook.add_worksheet(nombre_hoja[:31])
+        encabezado = workbook.add_format({"bold": True})
+        fecha_fmt = workbook.add_format({"num_format": "yyyy-mm-dd hh:mm:ss"})
+        formatos_color: Dict[str, Any] = {}
+
+        hoja.write_row(0, 0, columnas, encabezado)
+        fila_n = 0
+        for lote in lotes:
+            for fila in lote:
+                fila_n += 1
+                formato = None
+                if color_fila:
+                    color = color_fila(dict(zip(columnas, fila)))
+                    if color:
+                        formato = formatos_color.get(color)
+                        if formato is None:
+                            formato = formatos_color[color] = workbook.add_format({"bg_color": color})
+                # En constant_memory las filas deben escribirse en orden, celda a celda
+                for col_n, valor in enumerate(fila):
+                    valor = _valor_celda(valor)
+                    if isinstance(valor, (datetime, date)):
+                        hoja.write_datetime(fila_n, col_n, valor, formato or fecha_fmt)
+                    else:
+                        hoja.write(fila_n, col_n, valor, formato)
+        return fila_n
+    finally:
+        workbook.close()
+
+
+def _escribir_csv(destino: Path, columnas, lotes, comprimido: bool = False) -> int:
+    filas = 0
+    abrir = gzip.open if comprimido else open
+    with abrir(destino, "wt", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(columnas)
+        for lote in lotes:
+            writer.writerows([_valor_celda(v) for v in fila] for fila in lote)
+            filas += len(lote)
+    return filas
+
+
+def _esquema_parquet(pa, esquema, tipos: Optional[Dict[str, str]]):
+    """
+    Esquema del archivo a partir del del primer lote: las columnas de `tipos`
+    toman ese tipo y las que vinieron vacías (tipo null) pasan a string.
+    """
+    campos = []
+    for campo in esquema:
+        if tipos and campo.name in tipos:
+            campo = campo.with_type(pa.type_for_alias(tipos[campo.name]))
+        elif pa.types.is_null(campo.type):
+            campo = campo.with_type(pa.string())
+        campos.append(campo)
+    return pa.schema(campos)
+
+
+def _escribir_parquet(destino: Path, columnas, lotes, tipos: Optional[Dict[str, str]] = None) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("La exportación a Parquet requiere instalar 'pyarrow'.") from e
+
+    writer = None
+    filas = 0
+    try:
+        for lote in lotes:
+            datos = {c: [_valor_celda(f[i]) for f in lote] for i, c in enumerate(columnas)}
+            tabla = pa.Table.from_pydict(datos)
+            if writer is None:
+                esquema = _esquema_parquet(pa, tabla.schema, tipos)
+                writer = pq.ParquetWriter(str(destino), esquema, compression="zstd")
+            writer.write_table(tabla.cast(writer.schema, safe=False))
+            filas += len(lote)
+        if writer is None:
+            vacia = pa.table({c: [] for c in columnas})
+            pq.write_table(vacia.cast(_esquema_parquet(pa, vacia.schema, tipos)), str(destino))
+    finally:
+        if writer is not None:
+            writer.close()
+    return filas
+
+
+# ---------------------------
+# API pública
+# ---------------------------
+def exportar_consulta(
+    query,
+    params: Optional[Dict[str, Any]] = None,
+    formato: str = "xlsx",
+    nombre_hoja: str = "Reporte",
+    destino: Optional[os.PathLike] = None,
+    color_fila: Optional[Callable[[Dict[str, Any]], Optional[str]]] = None,
+    tamano_lote: int = TAMANO_LOTE,
+    tipos_parquet: Optional[Dict[str, str]] = None
+) -> Path:
+    """
+    Ejecuta `query` y escribe el resultado en un archivo del formato pedido.
+    Devuelve la ruta del archivo generado. La memoria usada depende del
+    tamaño de lote, no del número total de filas.
+
+    color_fila: función opcional (solo xlsx) que recibe la fila como dict y
+    devuelve un color de fondo ('#rrggbb') o None.
+    tipos_parquet: tipos de columna para Parquet ({columna: alias de pyarrow});
+    las columnas sin tipo y vacías en el primer lote se escriben como string.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: {formato}. Usa uno de {list(FORMATOS)}")
+
+    if destino is None:
+        EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+        fd, ruta = tempfile.mkstemp(suffix=f".{formato}", dir=str(EXPORT_DIR))
+        os.close(fd)
+        destino = ruta
+    destino = Path(destino)
+
+    try:
+        with abrir_stream(query, params, tamano_lote) as (columnas, lotes):
+            if formato == "xlsx":
+                _escribir_xlsx(destino, columnas, lotes, nombre_hoja, color_fila)
+            elif formato in ("csv", "csv.gz"):
+                _escribir_csv(destino, columnas, lotes, comprimido=formato == "csv.gz")
+            else:
+                _escribir_parquet(destino, columnas, lotes, tipos_parquet)
+    except Exception:
+        destino.unlink(missing_ok=True)
+        raise
+
+    return destino
+
+
+def exportar_dataset(nombre: str, formato: str = "xlsx", **params) -> Path:
+    """Exporta una de las consultas predefinidas en DATASETS."""
+    if nombre not in DATASETS:
+        raise KeyError(f"Dataset de exportación desconocido: {nombre}")
+    params = {**PARAMS_POR_DEFECTO.get(nombre, {}), **params}
+    return exportar_consulta(DATASETS[nombre], params, formato=formato, nombre_hoja=nombre,
+                             tipos_parquet=TIPOS_PARQUET.get(nombre))
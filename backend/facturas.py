@@ -0,0 +1,486 @@
+# backend/facturas.py
+"""
+Renderizado de facturas de venta en PDF.
+
+El logo y el estilo de la tabla se cargan una sola vez por proceso. Cada
+factura se dibuja una vez como Form XObject y se coloca dos veces en la hoja
+(copia cliente y copia archivo), y el PDF resultante queda en una caché LRU
+indexada por id de venta + hash de los datos que cambian el contenido.
+
+Funciones públicas:
+- generar_factura_pdf(venta, cliente, productos_vendidos, gestor_info=None, logo_path=...)
+- renderizar_factura(...)  (sin caché)
+- invalidar_factura(venta_id)
+- ids_ventas_para_facturar(desde=None, hasta=None, cliente_id=None)
+- generar_facturas_lote(venta_ids, salida="zip", procesos=None)
+"""
+
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Table, TableStyle
+from sqlalchemy import text
+from . import serializacion
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+LOGO_PATH = "assets/logo.png"
+
+LINE_HEIGHT = 15
+TASA_CUP = 120
+MAX_FACTURAS_CACHE = 128
+
+# Por debajo de este tamaño no compensa arrancar procesos
+MIN_LOTE_PARALELO = 20
+FACTURAS_POR_TAREA = 25
+
+ESTILO_TABLA = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.gray),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (1, 1), (-1, -1), 'CENTER'),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold')
+])
+ANCHOS_TABLA = [200, 80, 100, 100]
+
+_cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+# ---------------------------
+# Recursos precargados
+# ---------------------------
+@lru_cache(maxsize=8)
+def cargar_logo(logo_path: str = LOGO_PATH) -> Optional[ImageReader]:
+    """Carga el logo una vez por ruta; devuelve None si no existe."""
+    ruta = logo_path if os.path.isabs(logo_path) or os.path.exists(logo_path) else str(BASE_DIR / logo_path)
+    if not os.path.exists(ruta):
+        return None
+    try:
+        return ImageReader(ruta)
+    except Exception as e:
+        print(f"No se pudo cargar el logo: {e}")
+        return None
+
+
+def draw_multiline_text(c, text, x, y, max_width, line_height=12, font_name="Helvetica", font_size=10):
+    """
+    Dibuja texto ajustándolo automáticamente al ancho máximo permitido.
+    Devuelve la nueva coordenada Y después de escribir el texto.
+    """
+    c.setFont(font_name, font_size)
+
+    words = str(text).split()
+    lines = []
+    current_line = ""
+
+    for word in words:
+        test_line = f"{current_line} {word}".strip()
+        if c.stringWidth(test_line, font_name, font_size) <= max_width:
+            current_line = test_line
+        else:
+            lines.append(current_line)
+            current_line = word
+
+    if current_line:
+        lines.append(current_line)
+
+    for line in lines:
+        c.drawString(x, y, line)
+        y -= line_height
+
+    return y
+
+
+# ---------------------------
+# Layout
+# ---------------------------
+def _dibujar_factura(c, venta, cliente, productos_vendidos, gestor_info, logo):
+    """Dibuja una copia de la factura en la mitad superior de la hoja."""
+    width, height = letter
+    line_height = LINE_HEIGHT
+
+    # ---------------- Logo ----------------
+    if logo:
+        c.drawImage(logo, 40, height - 85, width=80, height=70, preserveAspectRatio=True)
+
+    # ------------- Empresa ----------------
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(130, height - 50, "Omar Galíndez Ramirez. CI: 85082506984")
+    c.setFont("Helvetica", 10)
+    c.drawString(130, height - 65, f"Factura N°: {venta.get('numero', venta.get('id',''))}")
+    c.drawString(130, height - 80, f"Fecha: {venta.get('fecha','')}")
+
+    # ------------- Columnas ----------------
+    col1_x = 40
+    col2_x = 320
+    row_y = height - 110
+
+    # Campos cliente, vacíos si no hay info
+    cliente_nombre = cliente.get("nombre") or ""
+    cliente_ci = cliente.get("ci") or ""
+    cliente_chapa = cliente.get("chapa") or ""
+    cliente_direccion = cliente.get("direccion") or ""
+    cliente_telefono = cliente.get("telefono") or ""
+
+    c.drawString(col1_x, row_y, f"Cliente: {cliente_nombre}"); row_y -= line_height
+    c.drawString(col1_x, row_y, f"Carnet/ID: {cliente_ci}"); row_y -= line_height
+    c.drawString(col1_x, row_y, f"Chapa: {cliente_chapa}"); row_y -= line_height
+    row_y = draw_multiline_text(
+        c,
+        f"Dirección: {cliente_direccion}",
+        col1_x,
+        row_y,
+        max_width=250,
+        line_height=line_height
+    )
+    c.drawString(col1_x, row_y, f"Teléfono: {cliente_telefono}"); row_y -= line_height
+
+    # Totales y pagos
+    total = float(venta.get("total") or 0)
+    pagado_usd = float(venta.get("pagado") or 0)
+    saldo = float(venta.get("saldo") or 0)
+    metodo_pago = venta.get("tipo_pago") or ""
+    vendedor = gestor_info.get("vendedor","") if gestor_info else ""
+    chofer = gestor_info.get("chofer","") if gestor_info else ""
+    chapa_vehiculo = gestor_info.get("chapa","") if gestor_info else ""
+    observaciones = venta.get("observaciones","")
+
+    pagado_cup = pagado_usd * TASA_CUP
+    pagado_str = f"(USD) {pagado_usd:,.2f} - (CUP) {pagado_cup:,.2f}"
+
+    row_y2 = height - 110
+    c.drawString(col2_x, row_y2, f"Total: ${total:.2f}"); row_y2 -= line_height
+    c.drawString(col2_x, row_y2, f"Pagado: {pagado_str}"); row_y2 -= line_height
+    c.drawString(col2_x, row_y2, f"Saldo pendiente: ${saldo:.2f}"); row_y2 -= line_height
+    c.drawString(col2_x, row_y2, f"Método de pago: {metodo_pago}"); row_y2 -= line_height
+    if observaciones:
+        row_y2 = draw_multiline_text(
+            c,
+            f"Observaciones: {observaciones}",
+            col2_x,
+            row_y2,
+            max_width=220,
+            line_height=line_height
+        )
+    c.drawString(col2_x, row_y2, f"Vendedor: {vendedor}"); row_y2 -= line_height
+    c.drawString(col2_x, row_y2, f"Chofer: {chofer}"); row_y2 -= line_height
+    c.drawString(col2_x, row_y2, f"Chapa: {chapa_vehiculo}"); row_y2 -= line_height
+
+    # ------------- Tabla de productos ----------------
+    table_y_start = row_y - 40
+    table_data = [["Producto", "Cantidad", "Precio Unitario", "Subtotal"]]
+    for p in productos_vendidos:
+        nombre = p.get("nombre","")
+        cantidad = float(p.get("cantidad") or 0)
+        precio_unitario = float(p.get("precio_unitario") or 0)
+        subtotal = cantidad * precio_unitario
+        table_data.append([nombre, str(int(cantidad)), f"${precio_unitario:.2f}", f"${subtotal:.2f}"])
+
+    table = Table(table_data, colWidths=ANCHOS_TABLA)
+    table.setStyle(ESTILO_TABLA)
+    table.wrapOn(c, 50, table_y_start - 20)
+    table.drawOn(c, 50, table_y_start - len(table_data)*18 - 20)
+
+    # ------------- Firma doble ----------------
+    firma_y = table_y_start - len(table_data)*18 - 60
+    c.drawString(40, firma_y -30, "__________________________")
+    c.drawString(40, firma_y - 40, "Firma Cliente")
+    c.drawString(320, firma_y -30 ,"__________________________")
+    c.drawString(320, firma_y - 40, "Firma Vendedor")
+
+
+def dibujar_hoja_factura(c, venta, cliente, productos_vendidos, gestor_info=None, logo=None):
+    """
+    Dibuja una hoja completa (dos copias) en el canvas `c` y cierra la página.
+    La factura se dibuja una sola vez como Form XObject y se reutiliza.
+    """
+    width, height = letter
+    nombre_form = f"factura_{venta.get('id', id(venta))}"
+
+    c.beginForm(nombre_form)
+    _dibujar_factura(c, venta, cliente, productos_vendidos, gestor_info, logo)
+    c.endForm()
+
+    # Copia superior
+    c.doForm(nombre_form)
+
+    # Línea divisoria
+    c.setStrokeColor(colors.gray)
+    c.setLineWidth(1)
+    c.line(40, height/2, width-40, height/2)
+
+    # Copia inferior: mismo layout desplazado media hoja
+    c.saveState()
+    c.translate(0, -height/2)
+    c.doForm(nombre_form)
+    c.restoreState()
+
+    c.showPage()
+
+
+def renderizar_factura(venta, cliente, productos_vendidos, gestor_info=None, logo_path=LOGO_PATH) -> bytes:
+    """Genera el PDF de una factura sin consultar la caché."""
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    dibujar_hoja_factura(c, venta, cliente, productos_vendidos, gestor_info, cargar_logo(logo_path))
+    c.save()
+    return buffer.getvalue()
+
+
+# ---------------------------
+# Caché de PDFs
+# ---------------------------
+def clave_factura(venta, cliente, productos_vendidos, gestor_info=None) -> tuple:
+    """
+    Clave de caché: id de venta + hash de todo lo que puede cambiar el PDF
+    (datos extra de la factura, importes pagados, cliente y líneas).
+    """
+    variable = {
+        "extra": {
+            "vendedor": (gestor_info or {}).get("vendedor"),
+            "chofer": (gestor_info or {}).get("chofer"),
+            "chapa": (gestor_info or {}).get("chapa"),
+            "observaciones": venta.get("observaciones"),
+        },
+        "importes": [venta.get("total"), venta.get("pagado"), venta.get("saldo"), venta.get("tipo_pago")],
+        "cliente": [cliente.get(k) for k in ("nombre", "ci", "chapa", "direccion", "telefono")],
+        "lineas": [[p.get("nombre"), p.get("cantidad"), p.get("precio_unitario")] for p in productos_vendidos],
+    }
+    digest = hashlib.sha1(serializacion.dumps(variable, ordenar=True).encode()).hexdigest()
+    return (str(venta.get("id")), digest)
+
+
+def generar_factura_pdf(venta, cliente, productos_vendidos, gestor_info=None, logo_path=LOGO_PATH) -> bytes:
+    """
+    Genera una factura profesional en PDF mostrando todos los productos de la venta,
+    duplicada en la misma hoja (para cliente y archivo interno).
+
+    venta: dict con info de la venta
+    cliente: dict con info del cliente
+    productos_vendidos: lista de dicts {nombre, cantidad, precio_unitario}
+    gestor_info: dict opcional con datos del vendedor/chofer
+    logo_path: ruta local a logo de la empresa
+
+    Reimprimir la misma factura con los mismos datos devuelve el PDF en caché.
+    """
+    clave = clave_factura(venta, cliente, productos_vendidos, gestor_info) + (logo_path,)
+
+    with _cache_lock:
+        pdf = _cache.get(clave)
+        if pdf is not None:
+            _cache.move_to_end(clave)
+            return pdf
+
+    pdf = renderizar_factura(venta, cliente, productos_vendidos, gestor_info, logo_path)
+
+    with _cache_lock:
+        _cache[clave] = pdf
+        while len(_cache) > MAX_FACTURAS_CACHE:
+            _cache.popitem(last=False)
+    return pdf
+
+
+def invalidar_factura(venta_id=None) -> None:
+    """Elimina de la caché las facturas de una venta (o todas si venta_id es None)."""
+    with _cache_lock:
+        if venta_id is None:
+            _cache.clear()
+            return
+        for clave in [k for k in _cache if k[0] == str(venta_id)]:
+            del _cache[clave]
+
+
+# ---------------------------
+# Facturación por lote
+# ---------------------------
+def ids_ventas_para_facturar(desde=None, hasta=None, cliente_id=None) -> List[int]:
+    """Ids de ventas en un rango de fechas y/o de un cliente."""
+    from .db import engine
+
+    query = text("""
+        SELECT id FROM ventas
+        WHERE (CAST(:desde AS DATE) IS NULL OR fecha::date >= :desde)
+          AND (CAST(:hasta AS DATE) IS NULL OR fecha::date <= :hasta)
+          AND (CAST(:cliente_id AS INT) IS NULL OR cliente_id = :cliente_id)
+        ORDER BY fecha, id
+    """)
+    with engine.connect() as conn:
+        return list(conn.execute(query, {"desde": desde, "hasta": hasta, "cliente_id": cliente_id}).scalars())
+
+
+def _gestor_info(venta: Dict[str, Any]) -> Dict[str, str]:
+    """Datos de vendedor/chofer guardados en la venta, con el formato de la página de ventas."""
+    vendedor = venta.get("vendedor") or ""
+    telefono = venta.get("telefono_vendedor") or ""
+    return {
+        "vendedor": f"{vendedor} (+53 {telefono})" if vendedor and telefono else vendedor,
+        "chofer": venta.get("chofer") or "",
+        "chapa": venta.get("chapa") or "",
+    }
+
+
+def cargar_datos_facturas(venta_ids: Iterable) -> List[Tuple[dict, dict, list, dict]]:
+    """
+    Carga ventas y clientes de un lote con dos consultas. Las líneas vienen
+    en ventas.productos_vendidos, así que no hace falta una tercera.
+    Devuelve tuplas (venta, cliente, productos_vendidos, gestor_info).
+    """
+    from .db import engine
+
+    ids = [int(i) for i in venta_ids]
+    if not ids:
+        return []
+
+    with engine.connect() as conn:
+        ventas = conn.execute(
+            text("SELECT * FROM ventas WHERE id = ANY(:ids) ORDER BY fecha, id"),
+            {"ids": ids}
+        ).mappings().all()
+
+        cliente_ids = list({v["cliente_id"] for v in ventas if v["cliente_id"] is not None})
+        clientes = {
+            c["id"]: dict(c)
+            for c in conn.execute(
+                text("SELECT id, nombre, telefono, ci, chapa, direccion FROM clientes WHERE id = ANY(:ids)"),
+                {"ids": cliente_ids}
+            ).mappings()
+        }
+
+    datos = []
+    for v in ventas:
+        venta = dict(v)
+        productos = venta.get("productos_vendidos") or []
+        if isinstance(productos, str):
+            try:
+                productos = serializacion.loads(productos)
+            except serializacion.JSONDecodeError:
+                productos = []
+        venta["productos_vendidos"] = productos
+        cliente = clientes.get(venta["cliente_id"], {})
+        datos.append((venta, cliente, productos, _gestor_info(venta)))
+    return datos
+
+
+def _renderizar_tarea(tarea) -> List[Tuple[Any, bytes]]:
+    """Trabajo de un proceso: renderiza varias facturas sueltas."""
+    lote, logo_path = tarea
+    return [
+        (venta.get("id"), renderizar_factura(venta, cliente, productos, gestor, logo_path))
+        for venta, cliente, productos, gestor in lote
+    ]
+
+
+def _renderizar_tarea_unida(tarea) -> bytes:
+    """Trabajo de un proceso: renderiza varias facturas en un solo PDF multipágina."""
+    lote, logo_path = tarea
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    logo = cargar_logo(logo_path)
+    for venta, cliente, productos, gestor in lote:
+        dibujar_hoja_factura(c, venta, cliente, productos, gestor, logo)
+    c.save()
+    return buffer.getvalue()
+
+
+def _unir_pdfs(partes: List[bytes]) -> bytes:
+    from pypdf import PdfWriter, PdfReader
+
+    writer = PdfWriter()
+    for parte in partes:
+        for pagina in PdfReader(BytesIO(parte)).pages:
+            writer.add_page(pagina)
+    salida = BytesIO()
+    writer.write(salida)
+    return salida.getvalue()
+
+
+def generar_facturas_lote(
+    venta_ids: Iterable,
+    salida: str = "zip",
+    procesos: Optional[int] = None,
+    logo_path: str = LOGO_PATH
+) -> Tuple[bytes, Dict[str, Any]]:
+    """
+    Genera las facturas de varias ventas a la vez.
+
+    salida="zip": un ZIP con un PDF por venta (Factura_<id>.pdf).
+    salida="pdf": un único PDF con una hoja por venta.
+
+    Los lotes grandes se reparten en un ProcessPoolExecutor. Devuelve
+    (bytes, estadisticas) con tiempos de consulta y render y el rendimiento
+    en facturas por segundo.
+    """
+    if salida not in ("zip", "pdf"):
+        raise ValueError("salida debe ser 'zip' o 'pdf'")
+
+    t0 = time.perf_counter()
+    datos = cargar_datos_facturas(venta_ids)
+    t_consulta = time.perf_counter() - t0
+
+    tareas = [
+        (datos[i:i + FACTURAS_POR_TAREA], logo_path)
+        for i in range(0, len(datos), FACTURAS_POR_TAREA)
+    ]
+
+    # Unir varios PDFs requiere pypdf; sin él se renderiza todo en un canvas
+    unir_en_paralelo = salida == "pdf"
+    if unir_en_paralelo:
+        try:
+            import pypdf  # noqa: F401
+        except ImportError:
+            tareas = [(datos, logo_path)] if datos else []
+
+    paralelo = len(datos) >= MIN_LOTE_PARALELO and len(tareas) > 1
+    n_procesos = min(procesos or os.cpu_count() or 1, len(tareas)) if paralelo else 1
+    trabajo = _renderizar_tarea_unida if salida == "pdf" else _renderizar_tarea
+
+    t1 = time.perf_counter()
+    if paralelo and n_procesos > 1:
+        # spawn: el proceso de Streamlit tiene hilos y fork no es seguro
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=n_procesos, mp_context=ctx) as pool:
+            resultados = list(pool.map(trabajo, tareas))
+    else:
+        n_procesos = 1
+        resultados = [trabajo(t) for t in tareas]
+    t_render = time.perf_counter() - t1
+
+    if salida == "zip":
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+            for parte in resultados:
+                for venta_id, pdf in parte:
+                    zf.writestr(f"Factura_{venta_id}.pdf", pdf)
+        contenido = buffer.getvalue()
+    elif len(resultados) == 1:
+        contenido = resultados[0]
+    elif resultados:
+        contenido = _unir_pdfs(resultados)
+    else:
+        contenido = b""
+
+    total = time.perf_counter() - t0
+    estadisticas = {
+        "facturas": len(datos),
+        "procesos": n_procesos,
+        "segundos_consulta": round(t_consulta, 3),
+        "segundos_render": round(t_render, 3),
+        "segundos_total": round(total, 3),
+        "facturas_por_segundo": round(len(datos) / total, 1) if total > 0 else 0.0,
+        "bytes": len(contenido),
+    }
+    return contenido, estadisticas
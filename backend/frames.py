@@ -0,0 +1,85 @@
+# backend/frames.py
+"""
+Resultados de consultas como DataFrames tipados.
+
+Los list_* devuelven por defecto una lista de dicts (un dict por fila). Con
+as_frame=True usan leer_frame(): las filas se leen del cursor por lotes y
+cada lote pasa directamente a un DataFrame columnar, sin dicts
+intermedios. Los tipos se fijan al leer:
+- montos en float64 (los NUMERIC llegan como Decimal)
+- fechas en datetime64
+- estados y tipo de pago como category
+- ids como Int64 (admite NULL)
+
+Funciones públicas:
+- leer_frame(query, params=None, tipos=None, tamano_lote=TAMANO_LOTE)
+- aplicar_tipos(df, tipos)
+"""
+
+from typing import Any, Dict, Optional
+import pandas as pd
+from .db import abrir_stream
+
+TAMANO_LOTE = 5000
+
+# Tipos de las columnas de cada listado
+TIPOS: Dict[str, Dict[str, str]] = {
+    "productos": {
+        "id": "Int64", "nombre": "string", "precio": "float64", "cantidad": "Int64", "categoria_id": "Int64",
+    },
+    "clientes": {"id": "Int64", "nombre": "string", "deuda_total": "float64"},
+    "ventas": {
+        "id": "Int64", "cliente_id": "Int64", "fecha": "datetime64[ns]",
+        "total": "float64", "pagado": "float64", "saldo": "float64", "tipo_pago": "category",
+    },
+    "deudas": {
+        "id": "Int64", "cliente_id": "Int64", "venta_id": "Int64", "fecha": "datetime64[ns]",
+        "monto_total": "float64", "estado": "category",
+    },
+    "detalle_deudas": {
+        "detalle_id": "Int64", "deuda_id": "Int64", "producto_id": "Int64", "cliente_id": "Int64",
+        "cantidad": "float64", "precio_unitario": "float64", "monto": "float64", "monto_total": "float64",
+        "fecha": "datetime64[ns]", "estado": "category", "estado_deuda": "category",
+        "cliente": "string", "producto": "string",
+    },
+}
+
+
+def aplicar_tipos(df: pd.DataFrame, tipos: Optional[Dict[str, str]], categorias: bool = True) -> pd.DataFrame:
+    """Convierte las columnas de `df` presentes en `tipos`; las category solo si `categorias`."""
+    for col, tipo in (tipos or {}).items():
+        if col not in df.columns:
+            continue
+        if tipo.startswith("datetime64"):
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+        elif tipo == "float64":
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+        elif tipo == "category":
+            if categorias:
+                df[col] = df[col].astype("category")
+        else:
+            df[col] = df[col].astype(tipo)
+    return df
+
+
+def leer_frame(query, params: Optional[Dict[str, Any]] = None, tipos: Optional[Dict[str, str]] = None,
+               tamano_lote: int = TAMANO_LOTE) -> pd.DataFrame:
+    """
+    Ejecuta `query` y devuelve un DataFrame con los tipos de `tipos`.
+
+    Cada lote del cursor se convierte y tipa por separado, así los Decimal y
+    las tuplas de un lote se liberan antes de leer el siguiente. Las
+    category se crean al final para que todos los lotes compartan categorías.
+    """
+    with abrir_stream(query, params, tamano_lote) as (columnas, lotes):
+        partes = [
+            aplicar_tipos(pd.DataFrame.from_records(lote, columns=columnas, coerce_float=True), tipos, categorias=False)
+            for lote in lotes
+        ]
+
+    if partes:
+        df = pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+    else:
+        df = aplicar_tipos(pd.DataFrame({c: pd.Series(dtype=object) for c in columnas}), tipos, categorias=False)
+    categorias = [c for c, t in (tipos or {}).items() if t == "category" and c in df.columns]
+    return aplicar_tipos(df, {c: "category" for c in categorias})
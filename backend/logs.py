@@ -1,43 +1,252 @@
 # backend/logs.py
+import atexit
+import fnmatch
+import os
+import random
+import threading
+import time
+from collections import Counter
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from sqlalchemy import text
-import json
 from .db import engine  # Función que devuelve conexión SQLAlchemy
+from .migraciones import asegurar_esquema
+from .paginacion import pagina_keyset
+from . import serializacion
 
 # ---------------------------
-# Registrar un log
+# Niveles, categorías y políticas
+# ---------------------------
+NIVELES = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+NIVEL_MINIMO = os.getenv("LOG_NIVEL_MINIMO", "INFO").upper()
+
+CATEGORIAS = ["seguridad", "auditoria", "consulta", "error", "sistema"]
+
+# Acciones de seguridad: siempre se escriben completas, sin importar la política
+ACCIONES_SEGURIDAD = (
+    "bloqueo_*", "crear_usuario", "eliminar_usuario", "cambiar_password",
+    "cambiar_rol", "activar_usuario", "desactivar_usuario", "login_*",
+)
+
+# Política por acción (patrones fnmatch):
+#   "siempre"  → una fila por llamada
+#   "muestreo" → solo una fracción TASA_MUESTREO de las llamadas
+#   "nunca"    → ninguna fila individual
+# Lo que no se escribe se cuenta y sale en la fila periódica "resumen_logs".
+# LOG_POLITICAS (JSON) permite cambiarlas, p. ej. {"ver_dashboard": "nunca"}.
+POLITICAS: Dict[str, str] = {
+    "ver_dashboard": "muestreo",
+    "reporte_*": "muestreo",
+    "read_json": "nunca",
+    "exception_NotFoundError": "muestreo",
+    "exception_ValidationError": "muestreo",
+}
+POLITICAS.update(serializacion.loads(os.getenv("LOG_POLITICAS", "{}")))
+
+TASA_MUESTREO = float(os.getenv("LOG_TASA_MUESTREO", "0.1"))
+INTERVALO_RESUMEN_SEGUNDOS = int(os.getenv("LOG_INTERVALO_RESUMEN", "300"))
+ESPERA_VOLCADO_SALIDA = float(os.getenv("LOG_ESPERA_VOLCADO_SALIDA", "2"))
+
+_contadores: Counter = Counter()
+_contadores_lock = threading.Lock()
+_resumen_desde = datetime.now()
+_ultimo_volcado = time.monotonic()
+
+# Último mes (año, mes) para el que este proceso comprobó las particiones
+_mes_particiones = None
+
+
+def asegurar_columnas() -> None:
+    """Las columnas nivel y categoria las añade la migración 2 (backend.migraciones)."""
+    asegurar_esquema(2)
+
+
+def _coincide(accion: str, patrones) -> Optional[str]:
+    for patron in patrones:
+        if fnmatch.fnmatchcase(accion, patron):
+            return patron
+    return None
+
+
+def es_seguridad(accion: str) -> bool:
+    return _coincide(accion, ACCIONES_SEGURIDAD) is not None
+
+
+def politica_de(accion: str) -> str:
+    """Política efectiva de una acción ('siempre' si ningún patrón coincide)."""
+    if es_seguridad(accion):
+        return "siempre"
+    if accion in POLITICAS:
+        return POLITICAS[accion]
+    patron = _coincide(accion, POLITICAS)
+    return POLITICAS[patron] if patron else "siempre"
+
+
+def _nivel_por_defecto(accion: str) -> str:
+    if accion.startswith(("exception_", "error_")):
+        return "ERROR"
+    if es_seguridad(accion):
+        return "WARNING"
+    return "INFO"
+
+
+def _categoria_por_defecto(accion: str) -> str:
+    if es_seguridad(accion):
+        return "seguridad"
+    if accion.startswith(("exception_", "error_")):
+        return "error"
+    if accion.startswith(("ver_", "reporte_", "read_")):
+        return "consulta"
+    if accion.startswith(("write_", "resumen_")):
+        return "sistema"
+    return "auditoria"
+
+
+# ---------------------------
+# Resumen periódico
 # ---------------------------
-def registrar_log(usuario: str, accion: str, detalles):
+def volcar_resumen() -> int:
     """
-    Registra una acción en la tabla de logs.
-    Convierte dict o list a JSON string antes de guardar.
+    Escribe una fila "resumen_logs" con los conteos acumulados de las
+    llamadas que no se registraron individualmente y reinicia el contador.
+    Devuelve el total de llamadas resumidas.
     """
+    global _resumen_desde, _ultimo_volcado
+    with _contadores_lock:
+        conteos = dict(_contadores)
+        _contadores.clear()
+        desde, hasta = _resumen_desde, datetime.now()
+        _resumen_desde = hasta
+        _ultimo_volcado = time.monotonic()
 
-    # Convertir detalles a JSON si es dict o list
-    if isinstance(detalles, (dict, list)):
-        detalles = json.dumps(detalles, default=str)
+    if not conteos:
+        return 0
 
-    # Asegurar que usuario sea string
-    if isinstance(usuario, dict):
-        usuario = usuario.get("username", "sistema")
+    total = sum(conteos.values())
+    detalles = {
+        "desde": desde.isoformat(timespec="seconds"),
+        "hasta": hasta.isoformat(timespec="seconds"),
+        "total": total,
+        "acciones": [
+            {"accion": accion, "usuario": usuario, "total": n}
+            for (accion, usuario), n in sorted(conteos.items(), key=lambda x: -x[1])
+        ],
+    }
+    _insertar("sistema", "resumen_logs", serializacion.dumps(detalles), "INFO", "sistema", hasta)
+    return total
+
+
+def _volcar_al_salir() -> None:
+    """
+    Último volcado al cerrar el proceso. Al salir el engine puede estar ya
+    cerrado o la BD no responder: se intenta en un hilo aparte, se espera
+    como mucho ESPERA_VOLCADO_SALIDA segundos y los errores se ignoran
+    (se pierde a lo sumo un intervalo de conteos, que _contar vuelca
+    periódicamente).
+    """
+    def volcar():
+        try:
+            volcar_resumen()
+        except Exception:
+            pass
+
+    hilo = threading.Thread(target=volcar, name="volcado-resumen-logs", daemon=True)
+    hilo.start()
+    hilo.join(ESPERA_VOLCADO_SALIDA)
+
+
+atexit.register(_volcar_al_salir)
+
+
+def _contar(usuario: str, accion: str) -> None:
+    with _contadores_lock:
+        _contadores[(accion, usuario)] += 1
+        toca_volcar = time.monotonic() - _ultimo_volcado >= INTERVALO_RESUMEN_SEGUNDOS
+    if toca_volcar:
+        volcar_resumen()
+
+
+# ---------------------------
+# Registrar un log
+# ---------------------------
+def _asegurar_particion_mes(fecha: datetime) -> None:
+    """
+    Una vez por mes y proceso crea las particiones que falten
+    (backend.retencion_logs), así no dependen de que corra la tarea programada.
+    """
+    global _mes_particiones
+    mes = (fecha.year, fecha.month)
+    if _mes_particiones == mes:
+        return
+    _mes_particiones = mes
+
+    from .retencion_logs import asegurar_particiones
+    try:
+        asegurar_particiones(espera_lock="2s")
+    except Exception:
+        # La fila irá a logs_default; la próxima comprobación (el mes siguiente
+        # o la tarea programada) la moverá a la partición de su mes
+        pass
 
-    fecha = datetime.now()
 
+def _insertar(usuario, accion, detalles, nivel, categoria, fecha):
+    asegurar_columnas()
+    _asegurar_particion_mes(fecha)
     with engine.begin() as conn:
         conn.execute(
             text("""
-                INSERT INTO logs (usuario, accion, detalles, fecha)
-                VALUES (:usuario, :accion, :detalles, :fecha)
+                INSERT INTO logs (usuario, accion, detalles, fecha, nivel, categoria)
+                VALUES (:usuario, :accion, :detalles, :fecha, :nivel, :categoria)
             """),
             {
                 "usuario": usuario,
                 "accion": accion,
                 "detalles": detalles,
-                "fecha": fecha
+                "fecha": fecha,
+                "nivel": nivel,
+                "categoria": categoria
             }
         )
 
+
+def registrar_log(usuario: str, accion: str, detalles=None,
+                  nivel: Optional[str] = None, categoria: Optional[str] = None) -> bool:
+    """
+    Registra una acción en la tabla de logs.
+    Convierte dict o list a JSON string antes de guardar.
+
+    nivel: DEBUG/INFO/WARNING/ERROR/CRITICAL (por defecto se deduce de la acción).
+    categoria: seguridad/auditoria/consulta/error/sistema (ídem).
+
+    Las llamadas por debajo de LOG_NIVEL_MINIMO, o descartadas por la política
+    de la acción, no escriben fila: solo se cuentan para el resumen periódico.
+    Las acciones de seguridad siempre se escriben. Devuelve True si se escribió.
+    """
+
+    # Asegurar que usuario sea string
+    if isinstance(usuario, dict):
+        usuario = usuario.get("username", "sistema")
+
+    nivel = (nivel or _nivel_por_defecto(accion)).upper()
+    categoria = categoria or _categoria_por_defecto(accion)
+
+    if categoria != "seguridad" and not es_seguridad(accion):
+        politica = politica_de(accion)
+        escribir = (
+            NIVELES.get(nivel, 20) >= NIVELES.get(NIVEL_MINIMO, 20)
+            and (politica == "siempre" or (politica == "muestreo" and random.random() < TASA_MUESTREO))
+        )
+        if not escribir:
+            _contar(usuario, accion)
+            return False
+
+    # Convertir detalles a JSON si es dict o list
+    if isinstance(detalles, (dict, list)):
+        detalles = serializacion.dumps(detalles)
+
+    _insertar(usuario, accion, detalles, nivel, categoria, datetime.now())
+    return True
+
 # ---------------------------
 # Listar todos los logs
 # ---------------------------
@@ -58,4 +267,132 @@ def obtener_logs_usuario(username: str):
     """)
     with engine.connect() as conn:
         result = conn.execute(query, {"usuario": username})
-        return [row._asdict() for row in result]
\ No newline at end of file
+        return [row._asdict() for row in result]
+
+# ---------------------------
+# Historial de acciones (consultas agregadas)
+# ---------------------------
+# Módulo derivado del nombre de la acción (crear_producto → Inventario, ...)
+MODULO_SQL = """
+    CASE
+        WHEN accion LIKE 'exception_%' OR accion LIKE 'error_%' THEN 'Errores'
+        WHEN accion LIKE 'reporte_%' OR accion = 'ver_dashboard' THEN 'Reportes'
+        WHEN accion LIKE '%producto%' OR accion LIKE '%stock%' THEN 'Inventario'
+        WHEN accion LIKE '%venta%' THEN 'Ventas'
+        WHEN accion LIKE '%deuda%' OR accion LIKE '%debt%' OR accion LIKE '%comprobante%' THEN 'Deudas'
+        WHEN accion LIKE '%client%' THEN 'Clientes'
+        WHEN accion LIKE '%categoria%' THEN 'Categorías'
+        WHEN accion LIKE '%usuario%' OR accion LIKE '%password%' OR accion LIKE '%rol%' THEN 'Usuarios'
+        ELSE 'Otros'
+    END
+"""
+
+# Tipo de acción derivado del prefijo (crear_, update_, eliminar_, ...)
+TIPO_SQL = """
+    CASE split_part(accion, '_', 1)
+        WHEN 'crear' THEN 'Crear'
+        WHEN 'registrar' THEN 'Crear'
+        WHEN 'editar' THEN 'Editar'
+        WHEN 'update' THEN 'Editar'
+        WHEN 'cambiar' THEN 'Editar'
+        WHEN 'ajustar' THEN 'Editar'
+        WHEN 'activar' THEN 'Editar'
+        WHEN 'desactivar' THEN 'Editar'
+        WHEN 'eliminar' THEN 'Eliminar'
+        WHEN 'delete' THEN 'Eliminar'
+        WHEN 'ver' THEN 'Consultar'
+        WHEN 'reporte' THEN 'Consultar'
+        WHEN 'read' THEN 'Consultar'
+        WHEN 'error' THEN 'Error'
+        WHEN 'exception' THEN 'Error'
+        WHEN 'bloqueo' THEN 'Seguridad'
+        ELSE 'Otra'
+    END
+"""
+
+MODULOS = ["Inventario", "Ventas", "Deudas", "Clientes", "Categorías", "Usuarios", "Reportes", "Errores", "Otros"]
+TIPOS_ACCION = ["Crear", "Editar", "Eliminar", "Consultar", "Error", "Seguridad", "Otra"]
+
+
+def _filtros_historial(desde, hasta, usuario=None, modulo=None, tipo=None):
+    """WHERE común a las consultas del historial; el rango de fechas es semiabierto."""
+    where = f"""
+        WHERE fecha >= :desde AND fecha < CAST(:hasta AS DATE) + 1
+          AND (CAST(:usuario AS TEXT) IS NULL OR usuario = :usuario)
+          AND (CAST(:modulo AS TEXT) IS NULL OR ({MODULO_SQL}) = :modulo)
+          AND (CAST(:tipo AS TEXT) IS NULL OR ({TIPO_SQL}) = :tipo)
+    """
+    params = {"desde": desde, "hasta": hasta, "usuario": usuario, "modulo": modulo, "tipo": tipo}
+    return where, params
+
+
+def consulta_historial(desde, hasta, usuario=None, modulo=None, tipo=None):
+    """SQL y parámetros del historial filtrado (sin paginar), para exportar."""
+    where, params = _filtros_historial(desde, hasta, usuario, modulo, tipo)
+    query = f"""
+        SELECT fecha AS "Fecha", usuario AS "Usuario", {MODULO_SQL} AS "Módulo",
+               {TIPO_SQL} AS "Tipo", accion AS "Acción", detalles AS "Detalle"
+        FROM logs
+        {where}
+        ORDER BY fecha DESC, id DESC
+    """
+    return query, params
+
+
+def pagina_historial(desde, hasta, usuario=None, modulo=None, tipo=None,
+                     despues: Optional[tuple] = None, limite: int = 50):
+    """Una página del historial paginada por keyset (fecha, id). Devuelve (filas, siguiente)."""
+    where, params = _filtros_historial(desde, hasta, usuario, modulo, tipo)
+    query = f"""
+        SELECT id, fecha, usuario, {MODULO_SQL} AS modulo, {TIPO_SQL} AS tipo,
+               accion, detalles
+        FROM logs
+        {where}
+    """
+    return pagina_keyset(query, params, [("fecha", True), ("id", True)], despues, limite)
+
+
+def buscar_historial(desde, hasta, usuario=None, modulo=None, tipo=None,
+                     limite: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+    """Una página del historial, filtrada y ordenada en el servidor."""
+    query, params = consulta_historial(desde, hasta, usuario, modulo, tipo)
+    with engine.connect() as conn:
+        result = conn.execute(
+            text(query + " LIMIT :limite OFFSET :offset"),
+            {**params, "limite": limite, "offset": offset}
+        )
+        return [dict(row._mapping) for row in result]
+
+
+def resumen_historial(desde, hasta, usuario=None, modulo=None, tipo=None) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Conteos por usuario, por módulo y por día en una sola consulta agregada
+    (GROUPING SETS). Devuelve {"usuarios": [...], "modulos": [...], "dias": [...], "total": n}.
+    """
+    where, params = _filtros_historial(desde, hasta, usuario, modulo, tipo)
+    query = text(f"""
+        SELECT usuario, modulo, dia, COUNT(*) AS total,
+               GROUPING(usuario) AS g_usuario, GROUPING(modulo) AS g_modulo, GROUPING(dia) AS g_dia
+        FROM (
+            SELECT usuario, {MODULO_SQL} AS modulo, fecha::date AS dia
+            FROM logs
+            {where}
+        ) l
+        GROUP BY GROUPING SETS ((usuario), (modulo), (dia), ())
+    """)
+    resumen = {"usuarios": [], "modulos": [], "dias": [], "total": 0}
+    with engine.connect() as conn:
+        for r in conn.execute(query, params).mappings():
+            if not r["g_usuario"]:
+                resumen["usuarios"].append({"usuario": r["usuario"], "total": r["total"]})
+            elif not r["g_modulo"]:
+                resumen["modulos"].append({"modulo": r["modulo"], "total": r["total"]})
+            elif not r["g_dia"]:
+                resumen["dias"].append({"dia": r["dia"], "total": r["total"]})
+            else:
+                resumen["total"] = r["total"]
+
+    resumen["usuarios"].sort(key=lambda x: x["total"], reverse=True)
+    resumen["modulos"].sort(key=lambda x: x["total"], reverse=True)
+    resumen["dias"].sort(key=lambda x: x["dia"])
+    return resumen
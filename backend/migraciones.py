@@ -0,0 +1,422 @@
+# backend/migraciones.py
+"""
+Migraciones versionadas del esquema.
+
+Cada migración tiene un número de versión, una lista de sentencias `up` y
+otra `down`. La tabla schema_version guarda las versiones aplicadas; cada
+migración corre en su propia transacción junto con su fila en
+schema_version, protegida por un advisory lock para que dos procesos no
+migren a la vez.
+
+La versión 1 es el esquema base que usa el código (todas las sentencias son
+IF NOT EXISTS, así que se puede aplicar sobre una base ya existente).
+La 2 recoge las tablas auxiliares que antes se creaban al vuelo en cada
+módulo, la 3 los índices de las consultas más frecuentes y la 4 el trigger
+que marca los días de ventas a recalcular en los resúmenes.
+
+Las migraciones se aplican una vez al arrancar (inicializar(), que llaman
+la página principal, el login y protector.requerir_sesion) o desde la línea
+de comandos. Las funciones del backend solo comprueban la versión con
+asegurar_esquema(), que nunca ejecuta DDL: muchas se llaman dentro de la
+transacción de quien las invoca, y un ALTER TABLE desde otra conexión
+esperaría para siempre a un bloqueo que tiene esa misma transacción.
+
+Uso:
+    python -m backend.migraciones            # aplicar todo lo pendiente
+    python -m backend.migraciones --a 2      # subir o bajar hasta la versión 2
+    python -m backend.migraciones --estado
+"""
+
+import argparse
+import threading
+from collections import namedtuple
+from typing import List, Optional
+from sqlalchemy import text
+from .db import engine
+
+Migracion = namedtuple("Migracion", ["version", "nombre", "up", "down"])
+
+# Clave del advisory lock de migraciones
+LOCK_MIGRACIONES = 4_150_001
+
+MIGRACIONES: List[Migracion] = [
+    Migracion(1, "esquema_base", up=[
+        """
+        CREATE TABLE IF NOT EXISTS categorias (
+            id SERIAL PRIMARY KEY,
+            nombre VARCHAR(255) NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS clientes (
+            id SERIAL PRIMARY KEY,
+            nombre VARCHAR(255) NOT NULL,
+            telefono VARCHAR(50),
+            ci VARCHAR(50),
+            chapa VARCHAR(50),
+            direccion TEXT,
+            deuda_total NUMERIC(12,2) NOT NULL DEFAULT 0
+        )
+        """,
+        "ALTER TABLE clientes ADD COLUMN IF NOT EXISTS direccion TEXT",
+        "ALTER TABLE clientes ADD COLUMN IF NOT EXISTS deuda_total NUMERIC(12,2) NOT NULL DEFAULT 0",
+        """
+        CREATE TABLE IF NOT EXISTS productos (
+            id SERIAL PRIMARY KEY,
+            nombre VARCHAR(255) NOT NULL,
+            precio NUMERIC(10,2) NOT NULL,
+            cantidad INT NOT NULL DEFAULT 0,
+            categoria_id INT REFERENCES categorias(id) ON DELETE SET NULL
+        )
+        """,
+        "ALTER TABLE productos ADD COLUMN IF NOT EXISTS categoria_id INT REFERENCES categorias(id) ON DELETE SET NULL",
+        """
+        CREATE TABLE IF NOT EXISTS ventas (
+            id SERIAL PRIMARY KEY,
+            cliente_id INT REFERENCES clientes(id),
+            total NUMERIC(10,2) NOT NULL,
+            pagado NUMERIC(10,2) NOT NULL DEFAULT 0,
+            saldo NUMERIC(10,2) NOT NULL DEFAULT 0,
+            usuario VARCHAR(100),
+            tipo_pago VARCHAR(50),
+            fecha TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            productos_vendidos TEXT NOT NULL DEFAULT '[]',
+            observaciones TEXT,
+            vendedor VARCHAR(255),
+            telefono_vendedor VARCHAR(50),
+            chofer VARCHAR(255),
+            chapa VARCHAR(50)
+        )
+        """,
+        "ALTER TABLE ventas ADD COLUMN IF NOT EXISTS saldo NUMERIC(10,2) NOT NULL DEFAULT 0",
+        "ALTER TABLE ventas ADD COLUMN IF NOT EXISTS usuario VARCHAR(100)",
+        "ALTER TABLE ventas ADD COLUMN IF NOT EXISTS productos_vendidos TEXT NOT NULL DEFAULT '[]'",
+        "ALTER TABLE ventas ADD COLUMN IF NOT EXISTS observaciones TEXT",
+        "ALTER TABLE ventas ADD COLUMN IF NOT EXISTS vendedor VARCHAR(255)",
+        "ALTER TABLE ventas ADD COLUMN IF NOT EXISTS telefono_vendedor VARCHAR(50)",
+        "ALTER TABLE ventas ADD COLUMN IF NOT EXISTS chofer VARCHAR(255)",
+        "ALTER TABLE ventas ADD COLUMN IF NOT EXISTS chapa VARCHAR(50)",
+        """
+        CREATE TABLE IF NOT EXISTS deudas (
+            id SERIAL PRIMARY KEY,
+            cliente_id INT REFERENCES clientes(id),
+            venta_id INT REFERENCES ventas(id) ON DELETE SET NULL,
+            monto_total NUMERIC(10,2) NOT NULL,
+            estado VARCHAR(50) NOT NULL DEFAULT 'pendiente',
+            fecha TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            descripcion TEXT
+        )
+        """,
+        "ALTER TABLE deudas ADD COLUMN IF NOT EXISTS fecha TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP",
+        "ALTER TABLE deudas ADD COLUMN IF NOT EXISTS descripcion TEXT",
+        """
+        CREATE TABLE IF NOT EXISTS deudas_detalle (
+            id SERIAL PRIMARY KEY,
+            deuda_id INT NOT NULL REFERENCES deudas(id) ON DELETE CASCADE,
+            producto_id INT,
+            cantidad NUMERIC(12,2) NOT NULL,
+            precio_unitario NUMERIC(10,2) NOT NULL,
+            estado VARCHAR(50) NOT NULL DEFAULT 'pendiente'
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id SERIAL PRIMARY KEY,
+            username VARCHAR(100) NOT NULL UNIQUE,
+            password VARCHAR(255) NOT NULL,
+            rol VARCHAR(50) NOT NULL DEFAULT 'empleado',
+            activo BOOLEAN NOT NULL DEFAULT TRUE,
+            intentos_fallidos INT NOT NULL DEFAULT 0,
+            bloqueado_hasta TIMESTAMP,
+            requiere_cambio_password BOOLEAN NOT NULL DEFAULT TRUE,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS logs (
+            id SERIAL PRIMARY KEY,
+            usuario VARCHAR(100),
+            accion VARCHAR(255) NOT NULL,
+            detalles TEXT,
+            fecha TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ], down=None),
+
+    Migracion(2, "tablas_auxiliares", up=[
+        # resumenes.py
+        """
+        CREATE TABLE IF NOT EXISTS resumen_ventas_categoria (
+            dia DATE NOT NULL,
+            categoria_id INT NOT NULL,
+            lineas INT NOT NULL DEFAULT 0,
+            unidades NUMERIC(14,2) NOT NULL DEFAULT 0,
+            ingresos NUMERIC(14,2) NOT NULL DEFAULT 0,
+            valor_catalogo NUMERIC(14,2) NOT NULL DEFAULT 0,
+            PRIMARY KEY (dia, categoria_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS resumen_marcas (
+            nombre VARCHAR(100) PRIMARY KEY,
+            ultimo_id INT NOT NULL DEFAULT 0,
+            actualizado TIMESTAMP
+        )
+        """,
+        """
+        INSERT INTO resumen_marcas (nombre, ultimo_id)
+        VALUES ('ventas_categoria', 0)
+        ON CONFLICT (nombre) DO NOTHING
+        """,
+        # deudas.py (comprobantes de pago)
+        "CREATE SEQUENCE IF NOT EXISTS comprobantes_pago_seq",
+        """
+        CREATE TABLE IF NOT EXISTS comprobantes_pago (
+            numero BIGINT PRIMARY KEY,
+            deuda_id INT,
+            cliente_id INT,
+            usuario VARCHAR(100),
+            nombre_archivo VARCHAR(255) NOT NULL,
+            fecha TIMESTAMP NOT NULL DEFAULT NOW(),
+            pdf BYTEA NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_comprobantes_pago_fecha ON comprobantes_pago (fecha)",
+        # deudas.py (antigüedad de deudas)
+        """
+        CREATE INDEX IF NOT EXISTS idx_deudas_detalle_pendiente
+        ON deudas_detalle (deuda_id) INCLUDE (cantidad, precio_unitario)
+        WHERE estado = 'pendiente'
+        """,
+        # conciliacion.py
+        """
+        CREATE TABLE IF NOT EXISTS conciliacion_pendientes (
+            cliente_id INT PRIMARY KEY,
+            marcado TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+        """,
+        # logs.py
+        "ALTER TABLE logs ADD COLUMN IF NOT EXISTS nivel VARCHAR(10) DEFAULT 'INFO'",
+        "ALTER TABLE logs ADD COLUMN IF NOT EXISTS categoria VARCHAR(20)",
+    ], down=[
+        "ALTER TABLE logs DROP COLUMN IF EXISTS categoria",
+        "ALTER TABLE logs DROP COLUMN IF EXISTS nivel",
+        "DROP TABLE IF EXISTS conciliacion_pendientes",
+        "DROP INDEX IF EXISTS idx_deudas_detalle_pendiente",
+        "DROP TABLE IF EXISTS comprobantes_pago",
+        "DROP SEQUENCE IF EXISTS comprobantes_pago_seq",
+        "DROP TABLE IF EXISTS resumen_marcas",
+        "DROP TABLE IF EXISTS resumen_ventas_categoria",
+    ]),
+
+    Migracion(3, "indices_rendimiento", up=[
+        "CREATE INDEX IF NOT EXISTS idx_ventas_fecha ON ventas (fecha)",
+        "CREATE INDEX IF NOT EXISTS idx_ventas_cliente ON ventas (cliente_id)",
+        "CREATE INDEX IF NOT EXISTS idx_deudas_cliente_estado ON deudas (cliente_id, estado)",
+        "CREATE INDEX IF NOT EXISTS idx_deudas_detalle_deuda ON deudas_detalle (deuda_id)",
+        "CREATE INDEX IF NOT EXISTS idx_logs_usuario_fecha ON logs (usuario, fecha)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_productos_nombre ON productos (nombre)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_categorias_nombre ON categorias (lower(nombre))",
+    ], down=[
+        "DROP INDEX IF EXISTS uq_categorias_nombre",
+        "DROP INDEX IF EXISTS uq_productos_nombre",
+        "DROP INDEX IF EXISTS idx_logs_usuario_fecha",
+        "DROP INDEX IF EXISTS idx_deudas_detalle_deuda",
+        "DROP INDEX IF EXISTS idx_deudas_cliente_estado",
+        "DROP INDEX IF EXISTS idx_ventas_cliente",
+        "DROP INDEX IF EXISTS idx_ventas_fecha",
+    ]),
+
+    Migracion(4, "resumen_dias_pendientes", up=[
+        # Días de ventas a recalcular en resumen_ventas_categoria (resumenes.py).
+        # Los marca un trigger, así que la marca se ve cuando la venta hace commit.
+        "CREATE TABLE IF NOT EXISTS resumen_dias_pendientes (dia DATE PRIMARY KEY)",
+        """
+        CREATE OR REPLACE FUNCTION marcar_dia_resumen() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                INSERT INTO resumen_dias_pendientes (dia) VALUES (OLD.fecha::date)
+                ON CONFLICT (dia) DO NOTHING;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO resumen_dias_pendientes (dia) VALUES (NEW.fecha::date)
+                ON CONFLICT (dia) DO NOTHING;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        "DROP TRIGGER IF EXISTS trg_ventas_resumen ON ventas",
+        """
+        CREATE TRIGGER trg_ventas_resumen
+        AFTER INSERT OR DELETE OR UPDATE OF fecha, productos_vendidos ON ventas
+        FOR EACH ROW EXECUTE FUNCTION marcar_dia_resumen()
+        """,
+        # La marca de agua por id podía saltarse ventas: se recalcula todo una vez
+        "INSERT INTO resumen_dias_pendientes (dia) SELECT DISTINCT fecha::date FROM ventas ON CONFLICT (dia) DO NOTHING",
+        "DROP TABLE IF EXISTS resumen_marcas",
+    ], down=[
+        """
+        CREATE TABLE IF NOT EXISTS resumen_marcas (
+            nombre VARCHAR(100) PRIMARY KEY,
+            ultimo_id INT NOT NULL DEFAULT 0,
+            actualizado TIMESTAMP
+        )
+        """,
+        "INSERT INTO resumen_marcas (nombre, ultimo_id) VALUES ('ventas_categoria', 0) ON CONFLICT (nombre) DO NOTHING",
+        "TRUNCATE resumen_ventas_categoria",
+        "DROP TRIGGER IF EXISTS trg_ventas_resumen ON ventas",
+        "DROP FUNCTION IF EXISTS marcar_dia_resumen()",
+        "DROP TABLE IF EXISTS resumen_dias_pendientes",
+    ]),
+]
+
+ULTIMA_VERSION = MIGRACIONES[-1].version
+
+_version_conocida = 0
+_version_lock = threading.Lock()
+_inicio_lock = threading.Lock()
+_inicializado = False
+
+
+# ---------------------------
+# Estado
+# ---------------------------
+def _asegurar_tabla_version(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT PRIMARY KEY,
+            nombre VARCHAR(100) NOT NULL,
+            aplicada TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+    """))
+
+
+def version_actual() -> int:
+    """Versión más alta aplicada (0 si no hay ninguna)."""
+    with engine.begin() as conn:
+        _asegurar_tabla_version(conn)
+        return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+
+
+def _leer_version() -> int:
+    """Como version_actual() pero solo lectura: no crea schema_version si falta."""
+    with engine.connect() as conn:
+        if conn.execute(text("SELECT to_regclass('schema_version')")).scalar() is None:
+            return 0
+        return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+
+
+# ---------------------------
+# Ejecución
+# ---------------------------
+def _duplicados_unicos(conn) -> Optional[str]:
+    """Mensaje legible si hay datos que impiden crear los índices únicos."""
+    productos = conn.execute(text(
+        "SELECT nombre FROM productos GROUP BY nombre HAVING COUNT(*) > 1 LIMIT 5"
+    )).scalars().all()
+    categorias = conn.execute(text(
+        "SELECT lower(nombre) FROM categorias GROUP BY lower(nombre) HAVING COUNT(*) > 1 LIMIT 5"
+    )).scalars().all()
+    partes = []
+    if productos:
+        partes.append(f"productos repetidos: {', '.join(productos)}")
+    if categorias:
+        partes.append(f"categorías repetidas: {', '.join(categorias)}")
+    return "; ".join(partes) or None
+
+
+def migrar(destino: Optional[int] = None) -> List[str]:
+    """
+    Sube o baja el esquema hasta la versión `destino` (la última si es None).
+    Devuelve la lista de pasos ejecutados ("+3 indices_rendimiento", "-3 ...").
+    """
+    global _version_conocida
+    destino = ULTIMA_VERSION if destino is None else destino
+    pasos = []
+
+    while True:
+        with engine.begin() as conn:
+            conn.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": LOCK_MIGRACIONES})
+            _asegurar_tabla_version(conn)
+            actual = conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+
+            if actual < destino:
+                m = next(m for m in MIGRACIONES if m.version == actual + 1)
+                if m.nombre == "indices_rendimiento":
+                    problema = _duplicados_unicos(conn)
+                    if problema:
+                        raise RuntimeError(f"No se pueden crear los índices únicos ({problema}).")
+                for sentencia in m.up:
+                    conn.execute(text(sentencia))
+                conn.execute(
+                    text("INSERT INTO schema_version (version, nombre) VALUES (:v, :n)"),
+                    {"v": m.version, "n": m.nombre}
+                )
+                pasos.append(f"+{m.version} {m.nombre}")
+            elif actual > destino:
+                m = next(m for m in MIGRACIONES if m.version == actual)
+                if m.down is None:
+                    raise RuntimeError(f"La migración {m.version} ({m.nombre}) no se puede revertir.")
+                for sentencia in m.down:
+                    conn.execute(text(sentencia))
+                conn.execute(text("DELETE FROM schema_version WHERE version = :v"), {"v": m.version})
+                pasos.append(f"-{m.version} {m.nombre}")
+            else:
+                break
+
+    with _version_lock:
+        _version_conocida = destino
+    return pasos
+
+
+def asegurar_esquema(version_minima: int = ULTIMA_VERSION) -> None:
+    """
+    Comprueba que el esquema esté al menos en `version_minima`. Solo lee
+    schema_version (y solo la primera vez); si falta alguna migración lanza
+    RuntimeError en vez de aplicarla, porque puede estar llamándose dentro de
+    una transacción abierta.
+    """
+    global _version_conocida
+    if _version_conocida >= version_minima:
+        return
+
+    actual = _leer_version()
+    with _version_lock:
+        _version_conocida = max(_version_conocida, actual)
+    if actual < version_minima:
+        raise RuntimeError(
+            f"El esquema está en la versión {actual} y se necesita la {version_minima}. "
+            "Ejecuta: python -m backend.migraciones"
+        )
+
+
+def inicializar() -> None:
+    """
+    Aplica las migraciones pendientes una sola vez por proceso. Se llama al
+    arrancar, antes de abrir ninguna transacción de negocio.
+    """
+    global _inicializado
+    if _inicializado:
+        return
+    with _inicio_lock:
+        if _inicializado:
+            return
+        migrar()
+        _inicializado = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migraciones del esquema")
+    parser.add_argument("--a", dest="destino", type=int, help="Versión destino (por defecto la última)")
+    parser.add_argument("--estado", action="store_true", help="Mostrar la versión actual y salir")
+    args = parser.parse_args()
+
+    actual = version_actual()
+    if args.estado:
+        print(f"📦 Esquema en la versión {actual} de {ULTIMA_VERSION}")
+        for m in MIGRACIONES:
+            print(f"  {'✅' if m.version <= actual else '⏳'} {m.version} {m.nombre}")
+    else:
+        pasos = migrar(args.destino)
+        print("\n".join(pasos) if pasos else f"✔ Esquema al día (versión {actual})")
@@ -0,0 +1,111 @@
+# backend/paginacion.py
+"""
+Paginación por keyset y conteos baratos para los listados grandes.
+
+Con LIMIT/OFFSET la base de datos tiene que recorrer y descartar todas las
+filas anteriores a la página pedida. Con keyset cada página se pide "a
+partir de" los valores de orden de la última fila de la anterior, así que
+el coste no depende de lo lejos que esté la página.
+
+    filas, siguiente = pagina_keyset(query, params, [("fecha", True), ("id", True)])
+    filas, siguiente = pagina_keyset(query, params, orden, despues=siguiente)
+
+Funciones públicas:
+- pagina_keyset(query, params, orden, despues=None, limite=50)
+- contar_filas(query, params, tope=TOPE_CONTEO)
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import text
+from .db import engine
+from . import serializacion
+
+# Por encima de este número de filas el conteo pasa a ser una estimación
+TOPE_CONTEO = 10000
+
+Orden = Sequence[Tuple[str, bool]]
+
+
+def _condicion_keyset(orden: Orden) -> str:
+    """
+    WHERE que deja solo las filas posteriores al cursor :_k0, :_k1, ...
+    Si todas las columnas van en la misma dirección se usa una comparación
+    de filas, que Postgres resuelve con un índice compuesto.
+    """
+    columnas = [f'q."{col}"' for col, _ in orden]
+    claves = [f":_k{i}" for i in range(len(orden))]
+
+    if len({desc for _, desc in orden}) == 1:
+        op = "<" if orden[0][1] else ">"
+        return f"({', '.join(columnas)}) {op} ({', '.join(claves)})"
+
+    partes = []
+    for i, (_, desc) in enumerate(orden):
+        iguales = [f"{columnas[j]} = {claves[j]}" for j in range(i)]
+        partes.append("(" + " AND ".join(iguales + [f"{columnas[i]} {'<' if desc else '>'} {claves[i]}"]) + ")")
+    return "(" + " OR ".join(partes) + ")"
+
+
+def pagina_keyset(query: str, params: Optional[Dict[str, Any]], orden: Orden,
+                  despues: Optional[tuple] = None, limite: int = 50) -> Tuple[List[Dict[str, Any]], Optional[tuple]]:
+    """
+    Una página de `query` ordenada por `orden`.
+
+    query: SELECT sin ORDER BY ni LIMIT; las columnas de `orden` deben salir
+           con ese nombre y no ser NULL.
+    orden: [(columna, descendente)]; la combinación completa debe ser única
+           (terminar en un id).
+    despues: cursor devuelto por la página anterior, o None para la primera.
+
+    Devuelve (filas, siguiente); `siguiente` es None en la última página.
+    """
+    params = dict(params or {})
+    where = ""
+    if despues is not None:
+        where = f"WHERE {_condicion_keyset(orden)}"
+        params.update({f"_k{i}": valor for i, valor in enumerate(despues)})
+
+    orden_sql = ", ".join(f'q."{col}" {"DESC" if desc else "ASC"}' for col, desc in orden)
+    sql = text(f"""
+        SELECT * FROM ({query}) q
+        {where}
+        ORDER BY {orden_sql}
+        LIMIT :_limite
+    """)
+    # Una fila de más indica si existe página siguiente
+    params["_limite"] = limite + 1
+
+    with engine.connect() as conn:
+        filas = [dict(r._mapping) for r in conn.execute(sql, params)]
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = tuple(filas[-1][col] for col, _ in orden)
+    return filas, siguiente
+
+
+def contar_filas(query: str, params: Optional[Dict[str, Any]] = None,
+                 tope: int = TOPE_CONTEO) -> Tuple[int, bool]:
+    """
+    Número de filas de `query` sin recorrer tablas enteras.
+
+    Cuenta como mucho `tope` + 1 filas; si hay más, devuelve la estimación
+    del planificador de Postgres. Devuelve (total, exacto).
+    """
+    params = dict(params or {})
+    with engine.connect() as conn:
+        total = conn.execute(text(f"""
+            SELECT COUNT(*) FROM (SELECT 1 FROM ({query}) q LIMIT :_tope) t
+        """), {**params, "_tope": tope + 1}).scalar()
+        if total <= tope:
+            return total, True
+
+        if engine.dialect.name != "postgresql":
+            return total, False
+
+        plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) SELECT * FROM ({query}) q"), params).scalar()
+        if isinstance(plan, str):
+            plan = serializacion.loads(plan)
+        estimado = int(plan[0]["Plan"]["Plan Rows"])
+        return max(estimado, total), False
@@ -1,23 +1,60 @@
 # backend/productos.py
-from typing import List, Dict, Any
+from typing import Dict, Any, Optional
 from sqlalchemy import text
 from .db import engine
 from .logs import registrar_log
-from typing import Optional
+from .paginacion import pagina_keyset, contar_filas
+from .frames import leer_frame, TIPOS
 
 
 # ---------------------------
 # LISTAR PRODUCTOS
 # ---------------------------
-def list_products() -> List[Dict[str, Any]]:
+def list_products(as_frame: bool = False):
+    """Todos los productos; con as_frame=True como DataFrame tipado (backend.frames)."""
+    query = "SELECT * FROM productos ORDER BY nombre"
+    if as_frame:
+        return leer_frame(query, tipos=TIPOS["productos"])
     with engine.connect() as conn:
-        result = conn.execute(text("SELECT * FROM productos ORDER BY nombre"))
+        result = conn.execute(text(query))
         return [dict(r._mapping) for r in result]
 
 def map_productos() -> Dict[str, str]:
     with engine.connect() as conn:
         result = conn.execute(text("SELECT id, nombre FROM productos"))
         return {row["id"]: row["nombre"] for row in result.mappings()}
+
+# ---------------------------
+# LISTADO PAGINADO (keyset)
+# ---------------------------
+ORDEN_PRODUCTOS = [("nombre", False), ("id", False)]
+
+
+def _consulta_productos(busqueda: Optional[str] = None):
+    """SELECT del inventario con la búsqueda por nombre, categoría o ID."""
+    query = """
+        SELECT p.id, p.nombre, COALESCE(c.nombre, '') AS categoria, p.cantidad, p.precio
+        FROM productos p
+        LEFT JOIN categorias c ON c.id = p.categoria_id
+        WHERE CAST(:patron AS TEXT) IS NULL
+           OR lower(p.nombre) LIKE :patron
+           OR lower(c.nombre) LIKE :patron
+           OR CAST(p.id AS TEXT) LIKE :patron
+    """
+    busqueda = (busqueda or "").strip().lower()
+    return query, {"patron": f"%{busqueda}%" if busqueda else None}
+
+
+def pagina_productos(busqueda: Optional[str] = None, despues: Optional[tuple] = None, limite: int = 50):
+    """Una página del inventario ordenada por nombre. Devuelve (filas, siguiente)."""
+    query, params = _consulta_productos(busqueda)
+    return pagina_keyset(query, params, ORDEN_PRODUCTOS, despues, limite)
+
+
+def contar_productos(busqueda: Optional[str] = None):
+    """(total, exacto) de productos que coinciden con la búsqueda."""
+    query, params = _consulta_productos(busqueda)
+    return contar_filas(query, params)
 # ---------------------------
 # AGREGAR PRODUCTO
 # ---------------------------
@@ -2,10 +2,10 @@
 import datetime
 from backend.ventas import list_sales
 from collections import Counter
-import json
 from pathlib import Path
 import pandas as pd
 from .logs import registrar_log
+from . import serializacion
 
 
 def ventas_diarias(fecha=None, actor=None):
@@ -46,8 +46,8 @@ def productos_mas_vendidos(actor=None):
     return resultado
 
 def deudas_clientes(actor=None):
-    with open("data/deudas.json", "r") as f:
-        deudas = json.load(f)
+    with open("data/deudas.json", "r", encoding="utf-8") as f:
+        deudas = serializacion.load(f)
     if not deudas:
         df = pd.DataFrame(columns=["id", "cliente_id", "monto", "estado", "fecha"])
     else:
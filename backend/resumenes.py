@@ -0,0 +1,137 @@
+# backend/resumenes.py
+"""
+Resúmenes incrementales de ventas para el dashboard.
+
+Las líneas de cada venta (ventas.productos_vendidos) se agregan por día y
+categoría en la tabla resumen_ventas_categoria. Un trigger sobre ventas
+(migración 4) apunta en resumen_dias_pendientes el día de cada venta
+insertada, editada o borrada; cada refresco recalcula solo esos días desde
+cero, así que nunca recorre todo el historial al cargar una página.
+
+La marca se escribe en la misma transacción que la venta y se ve cuando esta
+hace commit, así que no importa en qué orden se confirmen las ventas. Y como
+cada día se recalcula entero en vez de restarle ventas borradas, un cambio
+posterior de precio o categoría de un producto no deja filas descuadradas.
+
+Funciones públicas:
+- refrescar_resumenes()
+- ventas_por_categoria(grano="dia", desde=None, hasta=None)
+"""
+
+from datetime import date
+from typing import List, Dict, Any, Optional
+from sqlalchemy import text
+from .db import engine
+from .migraciones import asegurar_esquema
+
+GRANOS = {"dia": "day", "semana": "week", "mes": "month"}
+
+# Categoría usada para líneas cuyo producto ya no existe o no tiene categoría
+SIN_CATEGORIA = 0
+
+
+# ---------------------------
+# Esquema
+# ---------------------------
+def asegurar_tablas():
+    """Las tablas de resumen y el trigger los crean las migraciones 2 y 4 (backend.migraciones)."""
+    asegurar_esquema(4)
+
+
+# ---------------------------
+# Agregación
+# ---------------------------
+def _agregar_dias(conn, dias: List[date]) -> None:
+    """
+    Vuelve a calcular el resumen de los `dias` a partir de sus ventas. Todo
+    ocurre en el servidor: se borran las filas de esos días y se insertan
+    las nuevas.
+    """
+    params = {"dias": dias}
+    conn.execute(text("DELETE FROM resumen_ventas_categoria WHERE dia = ANY(CAST(:dias AS DATE[]))"), params)
+    conn.execute(text(f"""
+        INSERT INTO resumen_ventas_categoria
+            (dia, categoria_id, lineas, unidades, ingresos, valor_catalogo)
+        SELECT
+            v.fecha::date,
+            COALESCE(p.categoria_id, {SIN_CATEGORIA}),
+            COUNT(*),
+            SUM(l.cantidad),
+            SUM(l.subtotal),
+            SUM(l.cantidad * COALESCE(p.precio, l.precio_unitario))
+        FROM ventas v
+        CROSS JOIN LATERAL (
+            SELECT
+                (item->>'id_producto')::int AS producto_id,
+                COALESCE((item->>'cantidad')::numeric, 0) AS cantidad,
+                COALESCE((item->>'precio_unitario')::numeric, 0) AS precio_unitario,
+                COALESCE(
+                    (item->>'subtotal')::numeric,
+                    COALESCE((item->>'cantidad')::numeric, 0)
+                        * COALESCE((item->>'precio_unitario')::numeric, 0)
+                ) AS subtotal
+            FROM json_array_elements(COALESCE(v.productos_vendidos::json, '[]'::json)) AS item
+        ) l
+        LEFT JOIN productos p ON p.id = l.producto_id
+        WHERE v.fecha >= CAST(:desde AS DATE) AND v.fecha < CAST(:hasta AS DATE) + 1
+          AND v.fecha::date = ANY(CAST(:dias AS DATE[]))
+        GROUP BY 1, 2
+    """), {**params, "desde": min(dias), "hasta": max(dias)})
+
+
+def refrescar_resumenes() -> int:
+    """
+    Recalcula los días marcados en resumen_dias_pendientes.
+    Devuelve el número de días recalculados.
+    """
+    asegurar_tablas()
+
+    with engine.begin() as conn:
+        # Tomar y borrar las marcas en la misma transacción: otra sesión que
+        # refresque a la vez espera a este commit y ya no las ve.
+        dias = conn.execute(text("DELETE FROM resumen_dias_pendientes RETURNING dia")).scalars().all()
+        if not dias:
+            return 0
+        _agregar_dias(conn, sorted(dias))
+        return len(dias)
+
+
+# ---------------------------
+# Consultas
+# ---------------------------
+def ventas_por_categoria(
+    grano: str = "dia",
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None
+) -> List[Dict[str, Any]]:
+    """
+    Ingresos y margen por categoría agrupados por día, semana o mes.
+
+    El margen se mide contra el precio de catálogo del producto
+    (ingresos - cantidad * productos.precio), ya que no se guarda costo.
+    """
+    if grano not in GRANOS:
+        raise ValueError(f"Grano no válido: {grano}. Usa uno de {list(GRANOS)}")
+
+    refrescar_resumenes()
+
+    query = text(f"""
+        SELECT
+            date_trunc('{GRANOS[grano]}', r.dia)::date AS periodo,
+            r.categoria_id,
+            COALESCE(c.nombre, 'Sin categoría') AS categoria,
+            SUM(r.lineas) AS lineas,
+            SUM(r.unidades) AS unidades,
+            SUM(r.ingresos) AS ingresos,
+            SUM(r.ingresos) - SUM(r.valor_catalogo) AS margen
+        FROM resumen_ventas_categoria r
+        LEFT JOIN categorias c ON c.id = r.categoria_id
+        WHERE (CAST(:desde AS DATE) IS NULL OR r.dia >= :desde)
+          AND (CAST(:hasta AS DATE) IS NULL OR r.dia <= :hasta)
+        GROUP BY 1, 2, 3
+        HAVING SUM(r.lineas) <> 0
+        ORDER BY periodo DESC, ingresos DESC
+    """)
+    with engine.connect() as conn:
+        result = conn.execute(query, {"desde": desde, "hasta": hasta})
+        return [dict(r._mapping) for r in result]
@@ -0,0 +1,412 @@
+# backend/retencion_logs.py
+"""
+Particionado mensual, retención y archivo de la tabla logs.
+
+En PostgreSQL la tabla logs se convierte (una sola vez) en una tabla
+particionada por rango de fecha: la tabla original queda como partición
+logs_legacy con todo el historial hasta fin del mes actual, y a partir de
+ahí hay una partición por mes (logs_pAAAAMM) más una partición por defecto.
+Las particiones de los próximos meses se crean desde registrar_log (una vez
+al mes por proceso) y desde la tarea programada; si algún mes llegó a caer
+en la partición por defecto, sus filas se mueven a la partición nueva.
+
+El trabajo de retención exporta cada partición más antigua que el período de
+retención a un archivo comprimido (Parquet o CSV.gz) y la elimina con
+DETACH + DROP, que no reescribe la tabla. En otros motores (modo local) se
+hace lo mismo por rangos mensuales con DELETE.
+
+consultar_logs() une de forma transparente las filas vivas y las archivadas
+cuando el rango de fechas lo pide.
+
+Uso como tarea programada:
+    python -m backend.retencion_logs --meses 6 --formato parquet
+"""
+
+import argparse
+import csv
+import gzip
+import os
+import re
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from sqlalchemy import text
+from .db import engine
+from . import serializacion
+from .exportar import exportar_consulta
+from .logs import asegurar_columnas
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+ARCHIVO_DIR = Path(os.getenv("LOGS_ARCHIVE_DIR", str(BASE_DIR / "archivo_logs")))
+MANIFIESTO = "manifest.json"
+
+MESES_RETENCION = int(os.getenv("LOGS_MESES_RETENCION", "6"))
+
+# Índices de logs (migración 3) sobre la tabla particionada: Postgres los
+# propaga a todas las particiones, actuales y futuras. Llevan otro nombre
+# porque el índice original sigue en logs_legacy (que Postgres adjunta al
+# nuevo en vez de duplicarlo).
+INDICES_LOGS = [
+    "CREATE INDEX IF NOT EXISTS idx_logs_part_usuario_fecha ON logs (usuario, fecha)",
+]
+
+_RE_LIMITES = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+# ---------------------------
+# Utilidades de fechas
+# ---------------------------
+def _inicio_mes(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def _sumar_meses(d: date, meses: int) -> date:
+    total = d.year * 12 + (d.month - 1) + meses
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def _es_postgres() -> bool:
+    return engine.dialect.name == "postgresql"
+
+
+# ---------------------------
+# Particiones (PostgreSQL)
+# ---------------------------
+def logs_particionada() -> bool:
+    with engine.connect() as conn:
+        return bool(conn.execute(text("""
+            SELECT 1 FROM pg_partitioned_table p
+            JOIN pg_class c ON c.oid = p.partrelid
+            WHERE c.relname = 'logs'
+        """)).scalar())
+
+
+def particionar_logs() -> bool:
+    """
+    Convierte logs en tabla particionada por mes. Idempotente: si ya está
+    particionada no hace nada. Devuelve True si hizo la conversión.
+    """
+    if not _es_postgres() or logs_particionada():
+        return False
+
+    limite = _sumar_meses(_inicio_mes(date.today()), 1)
+    with engine.begin() as conn:
+        conn.execute(text("LOCK TABLE logs IN ACCESS EXCLUSIVE MODE"))
+        conn.execute(text("ALTER TABLE logs RENAME TO logs_legacy"))
+        conn.execute(text("""
+            CREATE TABLE logs (
+                LIKE logs_legacy INCLUDING DEFAULTS
+            ) PARTITION BY RANGE (fecha)
+        """))
+        # El DEFAULT nextval de logs.id usa la secuencia de logs_legacy
+        _reasignar_secuencia(conn, "logs_legacy")
+        # Todo el historial existente queda como una sola partición
+        conn.execute(text(f"""
+            ALTER TABLE logs ATTACH PARTITION logs_legacy
+            FOR VALUES FROM (MINVALUE) TO ('{limite.isoformat()}')
+        """))
+        conn.execute(text("CREATE TABLE IF NOT EXISTS logs_default PARTITION OF logs DEFAULT"))
+        _asegurar_indices(conn)
+
+    asegurar_particiones()
+    return True
+
+
+def _asegurar_indices(conn) -> None:
+    """LIKE ... INCLUDING DEFAULTS no copia índices: se crean en la tabla padre."""
+    for sentencia in INDICES_LOGS:
+        conn.execute(text(sentencia))
+
+
+def _reasignar_secuencia(conn, particion: str) -> None:
+    """
+    Pasa a logs.id la secuencia de ids si todavía pertenece a `particion`.
+    Si no, DROP TABLE de esa partición fallaría porque el DEFAULT de logs.id
+    depende de la secuencia.
+    """
+    secuencia = conn.execute(
+        text("SELECT pg_get_serial_sequence(:tabla, 'id')"), {"tabla": particion}
+    ).scalar()
+    if secuencia:
+        conn.execute(text(f"ALTER SEQUENCE {secuencia} OWNED BY logs.id"))
+
+
+def asegurar_particiones(meses_adelante: int = 2, espera_lock: Optional[str] = None) -> List[str]:
+    """
+    Crea las particiones del mes actual y de los próximos meses si faltan,
+    y las de cualquier mes que haya caído en logs_default (por ejemplo si
+    la tarea estuvo parada). Las filas de ese mes se mueven de logs_default
+    a la partición nueva.
+
+    espera_lock: lock_timeout de la transacción (p. ej. "2s"); si se agota
+    la creación falla en vez de quedarse esperando.
+    """
+    if not _es_postgres() or not logs_particionada():
+        return []
+
+    particiones = listar_particiones()
+    mes = _inicio_mes(date.today())
+    meses = {_sumar_meses(mes, i) for i in range(meses_adelante + 1)}
+    with engine.connect() as conn:
+        en_default = set(conn.execute(text(
+            "SELECT DISTINCT date_trunc('month', fecha)::date FROM logs_default"
+        )).scalars())
+    meses |= en_default
+
+    creadas = []
+    with engine.begin() as conn:
+        if espera_lock:
+            conn.execute(text("SELECT set_config('lock_timeout', :t, true)"), {"t": espera_lock})
+        if not _indices_creados(conn):
+            # Bases convertidas antes de que particionar_logs creara los índices
+            _asegurar_indices(conn)
+        for desde in sorted(meses):
+            if _cubierto(desde, particiones):
+                continue
+            _crear_particion(conn, desde, con_filas=desde in en_default)
+            creadas.append(f"logs_p{desde:%Y%m}")
+    return creadas
+
+
+def _crear_particion(conn, desde: date, con_filas: bool) -> None:
+    """
+    Crea logs_pAAAAMM. Con filas del mes en logs_default hay que sacar antes
+    la partición por defecto (si no, Postgres rechaza la nueva partición),
+    mover las filas y volver a adjuntarla.
+    """
+    hasta = _sumar_meses(desde, 1)
+    nombre = f"logs_p{desde:%Y%m}"
+    rango = {"desde": desde, "hasta": hasta}
+
+    if con_filas:
+        conn.execute(text("ALTER TABLE logs DETACH PARTITION logs_default"))
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {nombre} PARTITION OF logs
+        FOR VALUES FROM ('{desde.isoformat()}') TO ('{hasta.isoformat()}')
+    """))
+    if con_filas:
+        conn.execute(text(f"""
+            INSERT INTO {nombre}
+            SELECT * FROM logs_default WHERE fecha >= :desde AND fecha < :hasta
+        """), rango)
+        conn.execute(text("DELETE FROM logs_default WHERE fecha >= :desde AND fecha < :hasta"), rango)
+        conn.execute(text("ALTER TABLE logs ATTACH PARTITION logs_default DEFAULT"))
+
+
+def _cubierto(dia: date, particiones: List[Dict[str, Any]]) -> bool:
+    """True si alguna partición existente (p. ej. logs_legacy) ya cubre `dia`."""
+    for p in particiones:
+        if p["hasta"] is None:
+            continue
+        if (p["desde"] is None or p["desde"] <= dia) and dia < p["hasta"]:
+            return True
+    return False
+
+
+def _parsear_limite(valor: str) -> Optional[date]:
+    valor = valor.strip().strip("'")
+    if valor.upper() == "MINVALUE" or valor.upper() == "MAXVALUE":
+        return None
+    return datetime.fromisoformat(valor).date()
+
+
+def _indices_creados(conn) -> bool:
+    """True si los índices de INDICES_LOGS ya existen en la tabla padre."""
+    return conn.execute(text("SELECT to_regclass('idx_logs_part_usuario_fecha')")).scalar() is not None
+
+
+def listar_particiones() -> List[Dict[str, Any]]:
+    """Particiones de logs con sus límites [desde, hasta). desde=None es MINVALUE."""
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT c.relname AS nombre, pg_get_expr(c.relpartbound, c.oid) AS limites
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'logs'::regclass
+        """)).mappings().all()
+
+    particiones = []
+    for r in rows:
+        m = _RE_LIMITES.search(r["limites"] or "")
+        if not m:
+            continue  # partición DEFAULT
+        particiones.append({
+            "nombre": r["nombre"],
+            "desde": _parsear_limite(m.group(1)),
+            "hasta": _parsear_limite(m.group(2)),
+        })
+    return sorted(particiones, key=lambda p: p["hasta"] or date.max)
+
+
+# ---------------------------
+# Manifiesto de archivos
+# ---------------------------
+def leer_manifiesto() -> List[Dict[str, Any]]:
+    ruta = ARCHIVO_DIR / MANIFIESTO
+    if not ruta.exists():
+        return []
+    with ruta.open("r", encoding="utf-8") as f:
+        return serializacion.load(f)
+
+
+def _guardar_manifiesto(entradas: List[Dict[str, Any]]) -> None:
+    ARCHIVO_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = ARCHIVO_DIR / f"{MANIFIESTO}.tmp"
+    with tmp.open("w", encoding="utf-8") as f:
+        serializacion.dump(entradas, f)
+    tmp.replace(ARCHIVO_DIR / MANIFIESTO)
+
+
+# ---------------------------
+# Retención
+# ---------------------------
+def _exportar_rango(origen: str, desde: Optional[date], hasta: date, formato: str, nombre: str) -> Dict[str, Any]:
+    filtro = "fecha < :hasta" if desde is None else "fecha >= :desde AND fecha < :hasta"
+    params = {"desde": desde, "hasta": hasta}
+
+    with engine.connect() as conn:
+        filas = conn.execute(text(f"SELECT COUNT(*) FROM {origen} WHERE {filtro}"), params).scalar()
+
+    ARCHIVO_DIR.mkdir(parents=True, exist_ok=True)
+    archivo = ARCHIVO_DIR / f"{nombre}.{formato}"
+    exportar_consulta(
+        f"SELECT id, usuario, accion, detalles, fecha, nivel, categoria FROM {origen} WHERE {filtro} ORDER BY fecha",
+        params, formato=formato, destino=archivo
+    )
+    return {
+        "nombre": nombre,
+        "desde": desde.isoformat() if desde else None,
+        "hasta": hasta.isoformat(),
+        "filas": filas,
+        "archivo": archivo.name,
+        "formato": formato,
+        "archivado": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def archivar_logs(meses: int = MESES_RETENCION, formato: str = "parquet") -> List[Dict[str, Any]]:
+    """
+    Archiva y elimina los logs anteriores al inicio del mes actual menos
+    `meses`. Devuelve las entradas añadidas al manifiesto.
+    """
+    if formato not in ("parquet", "csv.gz"):
+        raise ValueError("formato debe ser 'parquet' o 'csv.gz'")
+    asegurar_columnas()
+
+    corte = _sumar_meses(_inicio_mes(date.today()), -meses)
+    manifiesto = leer_manifiesto()
+    nuevas = []
+
+    if _es_postgres() and logs_particionada():
+        # Particiones completas: exportar, DETACH y DROP (sin reescribir nada)
+        for p in listar_particiones():
+            if p["hasta"] is None or p["hasta"] > corte:
+                continue
+            entrada = _exportar_rango(p["nombre"], p["desde"], p["hasta"], formato, p["nombre"])
+            with engine.begin() as conn:
+                # Bases convertidas antes de que particionar_logs reasignara la secuencia
+                _reasignar_secuencia(conn, p["nombre"])
+                conn.execute(text(f"ALTER TABLE logs DETACH PARTITION {p['nombre']}"))
+                conn.execute(text(f"DROP TABLE {p['nombre']}"))
+            nuevas.append(entrada)
+    else:
+        # Modo local / sin particiones: rotación por meses con DELETE
+        with engine.connect() as conn:
+            minima = conn.execute(text("SELECT MIN(fecha) FROM logs WHERE fecha < :corte"), {"corte": corte}).scalar()
+        if minima:
+            mes = _inicio_mes(minima.date() if isinstance(minima, datetime) else date.fromisoformat(str(minima)[:10]))
+            while mes < corte:
+                siguiente = _sumar_meses(mes, 1)
+                entrada = _exportar_rango("logs", mes, siguiente, formato, f"logs_p{mes:%Y%m}")
+                if entrada["filas"]:
+                    with engine.begin() as conn:
+                        conn.execute(
+                            text("DELETE FROM logs WHERE fecha >= :desde AND fecha < :hasta"),
+                            {"desde": mes, "hasta": siguiente}
+                        )
+                    nuevas.append(entrada)
+                else:
+                    (ARCHIVO_DIR / entrada["archivo"]).unlink(missing_ok=True)
+                mes = siguiente
+
+    if nuevas:
+        _guardar_manifiesto(manifiesto + nuevas)
+    return nuevas
+
+
+# ---------------------------
+# Consulta con archivos
+# ---------------------------
+def _leer_archivo(entrada: Dict[str, Any], desde: datetime, hasta: datetime) -> List[Dict[str, Any]]:
+    ruta = ARCHIVO_DIR / entrada["archivo"]
+    if not ruta.exists():
+        return []
+
+    if entrada["formato"] == "parquet":
+        import pyarrow.parquet as pq
+
+        filas = pq.read_table(
+            str(ruta), filters=[("fecha", ">=", desde), ("fecha", "<", hasta)]
+        ).to_pylist()
+    else:
+        filas = []
+        with gzip.open(ruta, "rt", encoding="utf-8-sig", newline="") as f:
+            for fila in csv.DictReader(f):
+                fila["fecha"] = datetime.fromisoformat(fila["fecha"])
+                if desde <= fila["fecha"] < hasta:
+                    filas.append(fila)
+    return filas
+
+
+def consultar_logs(desde: date, hasta: date, usuario: Optional[str] = None,
+                   incluir_archivo: bool = True) -> List[Dict[str, Any]]:
+    """
+    Logs entre `desde` y `hasta` (ambos inclusive), más recientes primero.
+    Si el rango llega a meses ya archivados, se leen también esos archivos.
+    """
+    inicio = datetime.combine(desde, datetime.min.time())
+    fin = datetime.combine(_sumar_dia(hasta), datetime.min.time())
+
+    asegurar_columnas()
+    with engine.connect() as conn:
+        filas = [dict(r._mapping) for r in conn.execute(text("""
+            SELECT id, usuario, accion, detalles, fecha, nivel, categoria FROM logs
+            WHERE fecha >= :desde AND fecha < :hasta
+              AND (CAST(:usuario AS TEXT) IS NULL OR usuario = :usuario)
+        """), {"desde": inicio, "hasta": fin, "usuario": usuario})]
+
+    if incluir_archivo:
+        for entrada in leer_manifiesto():
+            ent_desde = date.fromisoformat(entrada["desde"]) if entrada["desde"] else date.min
+            ent_hasta = date.fromisoformat(entrada["hasta"])
+            if ent_hasta <= desde or ent_desde > hasta:
+                continue
+            for fila in _leer_archivo(entrada, inicio, fin):
+                if usuario is None or fila.get("usuario") == usuario:
+                    filas.append(fila)
+
+    filas.sort(key=lambda f: f["fecha"], reverse=True)
+    return filas
+
+
+def _sumar_dia(d: date) -> date:
+    return date.fromordinal(d.toordinal() + 1)
+
+
+# ---------------------------
+# Tarea programada
+# ---------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Particiones y retención de logs")
+    parser.add_argument("--meses", type=int, default=MESES_RETENCION)
+    parser.add_argument("--formato", choices=["parquet", "csv.gz"], default="parquet")
+    parser.add_argument("--particionar", action="store_true", help="Convertir logs en tabla particionada")
+    args = parser.parse_args()
+
+    if args.particionar and particionar_logs():
+        print("✅ Tabla logs convertida a particionada por mes")
+    creadas = asegurar_particiones()
+    if creadas:
+        print(f"📅 Particiones creadas: {', '.join(creadas)}")
+    for e in archivar_logs(args.meses, args.formato):
+        print(f"📦 {e['nombre']}: {e['filas']} filas → {e['archivo']}")
@@ -0,0 +1,128 @@
+# backend/serializacion.py
+"""
+Codificación JSON común para todo el backend.
+
+productos_vendidos de cada venta, los detalles de los logs y los
+manifiestos de respaldo pasan por aquí. Si orjson está instalado se usa
+(varias veces más rápido que el módulo estándar); si no, se usa json con
+la misma salida compacta, así que el texto guardado no depende del motor.
+
+Ambos motores entienden datetime/date (ISO 8601), Decimal (como número),
+UUID, set y tipos numpy; cualquier otro objeto se guarda con str(). NaN e
+Infinity se guardan como null en los dos (el módulo estándar escribiría
+NaN, que no es JSON válido y rompe los productos_vendidos::json).
+
+El motor se elige con JSON_BACKEND=orjson|stdlib (por defecto orjson si
+está disponible) o en tiempo de ejecución con usar_motor().
+
+Funciones públicas:
+- dumps(obj, ordenar=False, indentar=False) -> str
+- loads(texto)
+- dump(obj, f, indentar=True) / load(f)
+- usar_motor(nombre) / motor_actual()
+"""
+
+import json
+import math
+import os
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Optional
+from uuid import UUID
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+# orjson.JSONDecodeError hereda de json.JSONDecodeError: un solo except sirve para ambos
+JSONDecodeError = json.JSONDecodeError
+
+MOTORES = ("orjson", "stdlib")
+
+_motor = "orjson" if orjson is not None else "stdlib"
+
+
+def usar_motor(nombre: Optional[str] = None) -> str:
+    """Fija el motor ("orjson" o "stdlib"); None elige el mejor disponible. Devuelve el activo."""
+    global _motor
+    if nombre is None:
+        nombre = "orjson" if orjson is not None else "stdlib"
+    if nombre not in MOTORES:
+        raise ValueError(f"Motor JSON no soportado: {nombre}. Usa uno de {list(MOTORES)}")
+    if nombre == "orjson" and orjson is None:
+        raise RuntimeError("El motor JSON 'orjson' requiere instalar 'orjson'.")
+    _motor = nombre
+    return _motor
+
+
+def motor_actual() -> str:
+    return _motor
+
+
+def _sin_nan(obj: Any):
+    """Copia de `obj` con los float NaN/Infinity cambiados por None (como hace orjson)."""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _sin_nan(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_sin_nan(v) for v in obj]
+    return obj
+
+
+def _por_defecto(obj: Any):
+    """Tipos que ninguno de los dos motores serializa por sí solo."""
+    if isinstance(obj, Decimal):
+        return float(obj) if obj.is_finite() else None
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, UUID):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, "tolist"):  # numpy
+        return _sin_nan(obj.tolist())
+    return str(obj)
+
+
+# ---------------------------
+# Codificar / decodificar
+# ---------------------------
+def dumps(obj: Any, ordenar: bool = False, indentar: bool = False) -> str:
+    """Texto JSON compacto (UTF-8 sin escapar); `ordenar` ordena las claves."""
+    if _motor == "orjson":
+        opciones = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if ordenar:
+            opciones |= orjson.OPT_SORT_KEYS
+        if indentar:
+            opciones |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_por_defecto, option=opciones).decode("utf-8")
+
+    # default= no se llama para float: los NaN se quitan antes de codificar
+    return json.dumps(
+        _sin_nan(obj), default=_por_defecto, sort_keys=ordenar, ensure_ascii=False, allow_nan=False,
+        indent=2 if indentar else None, separators=None if indentar else (",", ":")
+    )
+
+
+def loads(texto) -> Any:
+    """Acepta str, bytes o memoryview."""
+    if _motor == "orjson":
+        return orjson.loads(texto)
+    if isinstance(texto, (bytes, bytearray, memoryview)):
+        texto = bytes(texto).decode("utf-8")
+    return json.loads(texto)
+
+
+def dump(obj: Any, f, indentar: bool = True) -> None:
+    """Escribe `obj` en el archivo de texto `f`."""
+    f.write(dumps(obj, indentar=indentar))
+
+
+def load(f) -> Any:
+    return loads(f.read())
+
+
+if os.getenv("JSON_BACKEND"):
+    usar_motor(os.getenv("JSON_BACKEND"))
@@ -0,0 +1,145 @@
+# backend/sesiones.py
+"""
+Sesiones firmadas y caché de permisos en memoria.
+
+Al iniciar sesión se emite un token firmado con HMAC (usuario + expiración).
+Las páginas validan el token y consultan el rol en una caché con TTL de
+(username → rol, activo, requiere_cambio_password), así que una comprobación
+de permisos no hace ningún viaje a la BD. Las funciones de usuarios.py que
+cambian rol, estado o borran usuarios invalidan la entrada correspondiente,
+por lo que el cambio se aplica en la siguiente interacción.
+
+Funciones públicas:
+- emitir_token(username)
+- verificar_token(token)
+- estado_usuario(username)
+- autorizar(token, rol=None)
+- invalidar_usuario(username=None)
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from typing import Any, Dict, Optional
+from sqlalchemy import text
+from .db import engine
+
+# Sin SESSION_SECRET cada proceso usa una clave aleatoria (los tokens no
+# sobreviven a un reinicio, igual que st.session_state)
+SESSION_SECRET = (os.getenv("SESSION_SECRET") or secrets.token_hex(32)).encode()
+
+TOKEN_TTL_SEGUNDOS = int(os.getenv("SESSION_TTL_HORAS", "12")) * 3600
+CACHE_TTL_SEGUNDOS = int(os.getenv("ROLES_CACHE_TTL", "60"))
+
+_cache: Dict[str, tuple] = {}
+_cache_lock = threading.Lock()
+
+# Generación por usuario (y global para invalidar_usuario(None)). Una lectura
+# de la BD solo se guarda si ninguna invalidación ocurrió mientras corría.
+_generaciones: Dict[str, int] = {}
+_generacion_global = 0
+
+
+# ---------------------------
+# Tokens firmados
+# ---------------------------
+def _firmar(payload: bytes) -> str:
+    firma = hmac.new(SESSION_SECRET, payload, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(firma).decode().rstrip("=")
+
+
+def emitir_token(username: str, ttl: int = TOKEN_TTL_SEGUNDOS) -> str:
+    """Devuelve un token 'payload.firma' válido durante `ttl` segundos."""
+    expira = int(time.time()) + ttl
+    payload = base64.urlsafe_b64encode(f"{username}|{expira}".encode()).decode().rstrip("=")
+    return f"{payload}.{_firmar(payload.encode())}"
+
+
+def verificar_token(token: Optional[str]) -> Optional[str]:
+    """Devuelve el username si el token es auténtico y no expiró; si no, None."""
+    if not token or "." not in token:
+        return None
+
+    payload, firma = token.rsplit(".", 1)
+    if not hmac.compare_digest(firma, _firmar(payload.encode())):
+        return None
+
+    try:
+        relleno = "=" * (-len(payload) % 4)
+        username, expira = base64.urlsafe_b64decode(payload + relleno).decode().rsplit("|", 1)
+        if int(expira) < time.time():
+            return None
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return username
+
+
+# ---------------------------
+# Caché de roles
+# ---------------------------
+def estado_usuario(username: str) -> Optional[Dict[str, Any]]:
+    """
+    (rol, activo, requiere_cambio_password) de un usuario desde la caché.
+    Solo consulta la BD si la entrada no existe o superó el TTL.
+    """
+    ahora = time.monotonic()
+    with _cache_lock:
+        entrada = _cache.get(username)
+        if entrada and entrada[0] > ahora:
+            return entrada[1]
+        generacion = (_generacion_global, _generaciones.get(username, 0))
+
+    with engine.connect() as conn:
+        row = conn.execute(
+            text("SELECT rol, activo, requiere_cambio_password FROM usuarios WHERE username=:u"),
+            {"u": username}
+        ).mappings().first()
+
+    estado = None
+    if row:
+        estado = {
+            "rol": row["rol"],
+            "activo": bool(row["activo"]),
+            "requiere_cambio_password": bool(row["requiere_cambio_password"]),
+        }
+
+    with _cache_lock:
+        # Si se invalidó durante la consulta, el resultado puede ser anterior al cambio
+        if generacion == (_generacion_global, _generaciones.get(username, 0)):
+            _cache[username] = (ahora + CACHE_TTL_SEGUNDOS, estado)
+    return estado
+
+
+def invalidar_usuario(username: Optional[str] = None) -> None:
+    """Borra un usuario de la caché (o toda la caché si username es None)."""
+    global _generacion_global
+    with _cache_lock:
+        if username is None:
+            _generacion_global += 1
+            _cache.clear()
+        else:
+            _generaciones[username] = _generaciones.get(username, 0) + 1
+            _cache.pop(username, None)
+
+
+def autorizar(token: Optional[str], rol: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Valida el token y el estado del usuario. Devuelve
+    {"username", "rol", "requiere_cambio_password"} o None si el token no
+    es válido, el usuario no existe o está desactivado, o no tiene el rol pedido.
+    """
+    username = verificar_token(token)
+    if not username:
+        return None
+
+    estado = estado_usuario(username)
+    if not estado or not estado["activo"]:
+        return None
+    if rol and estado["rol"] != rol:
+        return None
+
+    return {"username": username, **{k: v for k, v in estado.items() if k != "activo"}}
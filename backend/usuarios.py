@@ -1,9 +1,41 @@
 # backend/usuarios.py
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import bcrypt
 from sqlalchemy import text
 from backend.db import engine
 from .logs import registrar_log
+from .sesiones import estado_usuario, invalidar_usuario
+
+# ============================================
+# 🔐 Configuración de bcrypt
+# ============================================
+# Coste de bcrypt para hashes nuevos; los hashes con otro coste se
+# regeneran de forma transparente en el siguiente login correcto.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# bcrypt libera el GIL, así que varios logins se verifican en paralelo
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_bcrypt_pool = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+
+
+def hash_password(password: str, rounds: int = None) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds or BCRYPT_ROUNDS)).decode()
+
+
+def verificar_password(password: str, hashed: str) -> bool:
+    """Verifica un password en el pool de bcrypt, sin ocupar conexiones de la BD."""
+    return _bcrypt_pool.submit(bcrypt.checkpw, password.encode(), hashed.encode()).result()
+
+
+def coste_hash(hashed: str) -> int:
+    """Extrae el coste de un hash bcrypt ($2b$12$...)."""
+    try:
+        return int(hashed.split("$")[2])
+    except (IndexError, ValueError):
+        return 0
 
 # ============================================
 # 🚀 Funciones de Usuarios (Optimizada)
@@ -11,7 +43,7 @@ from .logs import registrar_log
 
 def crear_usuario(username, password, rol="empleado", actor=None):
     """Crea un usuario con password encriptado."""
-    hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    hashed = hash_password(password)
     query = text("""
         INSERT INTO usuarios (username, password, rol)
         VALUES (:username, :password, :rol)
@@ -26,56 +58,88 @@ def crear_usuario(username, password, rol="empleado", actor=None):
 
 # --------------------------------------------
 def autenticar_usuario(username, password, max_intentos=5, bloqueo_min=15):
-    """Autentica usuario, maneja intentos fallidos y bloqueo temporal."""
+    """
+    Autentica usuario, maneja intentos fallidos y bloqueo temporal.
+
+    La fila se lee y la conexión se libera antes de verificar el hash, que
+    corre en el pool de bcrypt. Los contadores de intentos se actualizan con
+    un único UPDATE condicional, sin leer-modificar-escribir.
+    """
     now = datetime.now()
     q_select = text("""
-        SELECT password, activo, intentos_fallidos, bloqueado_hasta, rol 
+        SELECT password, activo, intentos_fallidos, bloqueado_hasta, rol
         FROM usuarios WHERE username=:username
     """)
-    q_reset = text("""
-        UPDATE usuarios 
-        SET intentos_fallidos=0, bloqueado_hasta=NULL 
+    q_exito = text("""
+        UPDATE usuarios
+        SET intentos_fallidos=0,
+            bloqueado_hasta=NULL,
+            password=CASE WHEN password=:hash_actual THEN COALESCE(:hash_nuevo, password) ELSE password END
         WHERE username=:username
+          AND (intentos_fallidos <> 0 OR bloqueado_hasta IS NOT NULL
+               OR (CAST(:hash_nuevo AS TEXT) IS NOT NULL AND password=:hash_actual))
     """)
-    q_update = text("""
-        UPDATE usuarios 
-        SET intentos_fallidos=:intentos, bloqueado_hasta=:bloqueado 
+    q_fallo = text("""
+        UPDATE usuarios
+        SET intentos_fallidos = COALESCE(intentos_fallidos, 0) + 1,
+            bloqueado_hasta = CASE
+                WHEN COALESCE(intentos_fallidos, 0) + 1 >= :max_intentos THEN :bloqueado
+                ELSE bloqueado_hasta
+            END
         WHERE username=:username
+          AND (bloqueado_hasta IS NULL OR bloqueado_hasta <= :now)
+        RETURNING intentos_fallidos, bloqueado_hasta
     """)
 
-    with engine.begin() as conn:
+    with engine.connect() as conn:
         row = conn.execute(q_select, {"username": username}).mappings().first()
-        if not row or not row["activo"]:
-            return None  # Usuario no existe o está desactivado
-
-        # Si está bloqueado
-        if row["bloqueado_hasta"] and row["bloqueado_hasta"] > now:
-            return {"bloqueado": True, "bloqueado_hasta": row["bloqueado_hasta"].isoformat()}
-
-        # Contraseña correcta
-        if bcrypt.checkpw(password.encode(), row["password"].encode()):
-            if row["intentos_fallidos"] or row["bloqueado_hasta"]:
-                conn.execute(q_reset, {"username": username})
-            return {"username": username, "rol": row["rol"]}
-
-        # Contraseña incorrecta → aumentar intentos
-        intentos = (row["intentos_fallidos"] or 0) + 1
-        bloqueado = None
-        if intentos >= max_intentos:
-            bloqueado = now + timedelta(minutes=bloqueo_min)
-            registrar_log(usuario=username, accion="bloqueo_usuario",
-                          detalles={"motivo": "intentos fallidos", "bloqueado_hasta": bloqueado.isoformat()})
-        conn.execute(q_update, {"intentos": intentos, "bloqueado": bloqueado, "username": username})
+
+    if not row or not row["activo"]:
+        return None  # Usuario no existe o está desactivado
+
+    # Si está bloqueado
+    if row["bloqueado_hasta"] and row["bloqueado_hasta"] > now:
+        return {"bloqueado": True, "bloqueado_hasta": row["bloqueado_hasta"].isoformat()}
+
+    # Contraseña correcta
+    if verificar_password(password, row["password"]):
+        hash_nuevo = None
+        if coste_hash(row["password"]) != BCRYPT_ROUNDS:
+            hash_nuevo = _bcrypt_pool.submit(hash_password, password).result()
+
+        if row["intentos_fallidos"] or row["bloqueado_hasta"] or hash_nuevo:
+            with engine.begin() as conn:
+                conn.execute(q_exito, {
+                    "username": username,
+                    "hash_actual": row["password"],
+                    "hash_nuevo": hash_nuevo
+                })
+        return {"username": username, "rol": row["rol"]}
+
+    # Contraseña incorrecta → aumentar intentos
+    bloqueado = now + timedelta(minutes=bloqueo_min)
+    with engine.begin() as conn:
+        res = conn.execute(q_fallo, {
+            "username": username,
+            "max_intentos": max_intentos,
+            "bloqueado": bloqueado,
+            "now": now
+        }).mappings().first()
+
+    if res and res["intentos_fallidos"] >= max_intentos:
+        registrar_log(usuario=username, accion="bloqueo_usuario",
+                      detalles={"motivo": "intentos fallidos", "bloqueado_hasta": bloqueado.isoformat()})
     return None
 
 # --------------------------------------------
 def cambiar_password(username, new_password, actor=None):
-    hashed = bcrypt.hashpw(new_password.encode(), bcrypt.gensalt()).decode()
+    hashed = hash_password(new_password)
     with engine.begin() as conn:
         conn.execute(
             text("UPDATE usuarios SET password=:p, requiere_cambio_password=FALSE WHERE username=:u"),
             {"p": hashed, "u": username}
         )
+    invalidar_usuario(username)
     registrar_log(usuario=actor or username, accion="cambiar_password", detalles={"username": username})
     return True
 
@@ -87,6 +151,7 @@ def cambiar_rol(username, nuevo_rol, actor=None):
             text("UPDATE usuarios SET rol=:r WHERE username=:u"),
             {"r": nuevo_rol, "u": username}
         )
+    invalidar_usuario(username)
     registrar_log(usuario=actor or username, accion="cambiar_rol",
                   detalles={"username": username, "rol_anterior": old_rol, "rol_nuevo": nuevo_rol})
     return True
@@ -99,6 +164,7 @@ def set_estado_usuario(username, activo: bool, actor=None):
             text("UPDATE usuarios SET activo=:a WHERE username=:u"),
             {"a": activo, "u": username}
         )
+    invalidar_usuario(username)
     accion = "activar_usuario" if activo else "desactivar_usuario"
     registrar_log(usuario=actor or username, accion=accion, detalles={"username": username})
     return True
@@ -123,20 +189,13 @@ def listar_usuarios():
 
 # --------------------------------------------
 def requiere_cambio_password(username):
-    with engine.connect() as conn:
-        row = conn.execute(
-            text("SELECT requiere_cambio_password FROM usuarios WHERE username=:u"),
-            {"u": username}
-        ).scalar()
-    return bool(row)
+    estado = estado_usuario(username)
+    return bool(estado and estado["requiere_cambio_password"])
 
 # --------------------------------------------
 def get_rol(username):
-    with engine.connect() as conn:
-        return conn.execute(
-            text("SELECT rol FROM usuarios WHERE username=:u"),
-            {"u": username}
-        ).scalar()
+    estado = estado_usuario(username)
+    return estado["rol"] if estado else None
 
 # --------------------------------------------
 def obtener_logs_usuario(username):
@@ -157,5 +216,6 @@ def eliminar_usuario(username, actor=None):
             text("DELETE FROM usuarios WHERE username=:u"),
             {"u": username}
         )
+    invalidar_usuario(username)
     registrar_log(usuario=actor or username, accion="eliminar_usuario", detalles={"username": username})
     return True 
\ No newline at end of file
@@ -6,12 +6,12 @@ Incluye lectura/escritura atómica, bloqueo de archivo (FileLock), generación d
 
 
 from pathlib import Path
-import json
 from filelock import FileLock, Timeout
 import tempfile
 from typing import Any, List, Dict
 import datetime
 from .logs import registrar_log
+from . import serializacion
 
 # Ruta base de datos (data/)
 BASE_DIR = Path(__file__).resolve().parents[1]
@@ -40,7 +40,7 @@ def read_json(filename: str, actor=None) -> List[Dict[str, Any]]:
     try:
         with lock.acquire(timeout=LOCK_TIMEOUT):
             with path.open("r", encoding="utf-8") as f:
-                data = json.load(f)
+                data = serializacion.load(f)
             registrar_log(
                 usuario=actor or "sistema",
                 accion="read_json",
@@ -61,7 +61,7 @@ def write_json_atomic(filename: str, data: List[Dict[str, Any]], actor=None) ->
         with lock.acquire(timeout=LOCK_TIMEOUT):
             # escribir en archivo temporal y mover
             with tempfile.NamedTemporaryFile("w", delete=False, dir=str(DATA_DIR), encoding="utf-8") as tmp:
-                json.dump(data, tmp, indent=4, ensure_ascii=False)
+                serializacion.dump(data, tmp)
                 tmp_path = Path(tmp.name)
             tmp_path.replace(path)
         registrar_log(
@@ -5,8 +5,10 @@ from sqlalchemy import text
 from backend.db import engine
 from .productos import  get_product, update_product, increment_stock
 from .logs import registrar_log
-import copy
-import json
+from .paginacion import pagina_keyset
+from .frames import leer_frame, TIPOS
+from .facturas import generar_factura_pdf, invalidar_factura
+from . import serializacion
 
 # ------------------------------
 # Registrar venta
@@ -83,7 +85,7 @@ def register_sale(cliente_id, total, pagado, usuario, tipo_pago, productos=None)
             "usuario": usuario,
             "tipo_pago": tipo_pago,
             "fecha": fecha,
-            "productos_vendidos": json.dumps(productos_data)
+            "productos_vendidos": serializacion.dumps(productos_data)
         }).scalar()
 
         # ----------------------------
@@ -145,6 +147,7 @@ def editar_venta_extra(
         }).mappings().first()
 
         if updated:
+            invalidar_factura(sale_id)
             registrar_log(usuario or "sistema", "editar_venta_extra", dict(updated))
             return dict(updated)
 
@@ -154,26 +157,120 @@ def editar_venta_extra(
 # ----------------------------
 # Listar ventas
 # ----------------------------
-def list_sales():
+def _leer_productos_vendidos(valor):
+    if isinstance(valor, str):
+        try:
+            return serializacion.loads(valor or "[]")
+        except serializacion.JSONDecodeError:
+            return []
+    return valor or []
+
+
+def list_sales(as_frame: bool = False):
+    """
+    Todas las ventas con productos_vendidos ya decodificado.
+    as_frame=True devuelve un DataFrame tipado (backend.frames).
+    """
+    if as_frame:
+        df = leer_frame("SELECT * FROM ventas ORDER BY fecha DESC", tipos=TIPOS["ventas"])
+        df["productos_vendidos"] = df["productos_vendidos"].map(_leer_productos_vendidos)
+        return df
+
     query = text("SELECT * FROM ventas ORDER BY fecha DESC")
     with engine.connect() as conn:
         resultados = conn.execute(query).mappings().all()
 
     ventas_list = []
     for r in resultados:
-        productos_vendidos = r.get("productos_vendidos") or "[]"
-        if isinstance(productos_vendidos, str):
-            try:
-                productos_vendidos = json.loads(productos_vendidos)
-            except json.JSONDecodeError:
-                productos_vendidos = []
-
         r_dict = dict(r)
-        r_dict["productos_vendidos"] = productos_vendidos
+        r_dict["productos_vendidos"] = _leer_productos_vendidos(r.get("productos_vendidos"))
         ventas_list.append(r_dict)
 
     return ventas_list
 
+# ----------------------------
+# Líneas de venta por rango (keyset)
+# ----------------------------
+# Una fila por producto vendido; las ventas sin productos salen con una
+# línea vacía (linea = 0) para que no desaparezcan del listado.
+LINEAS_VENTA_SQL = """
+    SELECT v.id, v.fecha, COALESCE(item.linea, 0) AS linea,
+           COALESCE(cl.nombre, 'Desconocido') AS cliente,
+           COALESCE(cl.telefono, '') AS telefono,
+           COALESCE(item.valor->>'nombre', '') AS producto,
+           COALESCE((item.valor->>'cantidad')::numeric, 0) AS cantidad,
+           COALESCE((item.valor->>'precio_unitario')::numeric, 0) AS precio_unitario,
+           COALESCE((item.valor->>'subtotal')::numeric, 0) AS subtotal,
+           v.total, v.pagado,
+           GREATEST(v.total - v.pagado, 0) AS saldo,
+           CASE WHEN v.pagado >= v.total THEN 'Pagada' ELSE 'Pendiente' END AS estado
+    FROM ventas v
+    LEFT JOIN clientes cl ON cl.id = v.cliente_id
+    LEFT JOIN LATERAL json_array_elements(COALESCE(v.productos_vendidos::json, '[]'::json))
+         WITH ORDINALITY AS item(valor, linea) ON TRUE
+    WHERE v.fecha >= :desde AND v.fecha < CAST(:hasta AS DATE) + 1
+      AND (CAST(:estado AS TEXT) IS NULL
+           OR CASE WHEN v.pagado >= v.total THEN 'Pagada' ELSE 'Pendiente' END = :estado)
+"""
+
+ORDEN_LINEAS_VENTA = [("fecha", True), ("id", True), ("linea", True)]
+
+
+def pagina_lineas_venta(desde, hasta, estado: Optional[str] = None,
+                        despues: Optional[tuple] = None, limite: int = 50):
+    """Una página de líneas de venta del rango, de la más reciente a la más antigua."""
+    params = {"desde": desde, "hasta": hasta, "estado": estado}
+    return pagina_keyset(LINEAS_VENTA_SQL, params, ORDEN_LINEAS_VENTA, despues, limite)
+
+
+def resumen_ventas(desde, hasta) -> Dict:
+    """
+    Totales del rango en una sola consulta: ventas, líneas y montos, también
+    separados en pagadas y pendientes. Los montos se suman por venta, no por línea.
+    """
+    query = text("""
+        SELECT COUNT(*) AS ventas,
+               COALESCE(SUM(lineas), 0) AS lineas,
+               COALESCE(SUM(unidades), 0) AS unidades,
+               COALESCE(SUM(pagado), 0) AS pagado,
+               COALESCE(SUM(GREATEST(total - pagado, 0)), 0) AS deuda,
+               COUNT(*) FILTER (WHERE pagado >= total) AS ventas_pagadas,
+               COALESCE(SUM(lineas) FILTER (WHERE pagado >= total), 0) AS lineas_pagadas,
+               COALESCE(SUM(pagado) FILTER (WHERE pagado >= total), 0) AS pagado_pagadas,
+               COUNT(*) FILTER (WHERE pagado < total) AS ventas_pendientes,
+               COALESCE(SUM(lineas) FILTER (WHERE pagado < total), 0) AS lineas_pendientes
+        FROM (
+            SELECT v.total, v.pagado,
+                   GREATEST(json_array_length(COALESCE(v.productos_vendidos::json, '[]'::json)), 1) AS lineas,
+                   (SELECT SUM((e->>'cantidad')::numeric)
+                    FROM json_array_elements(COALESCE(v.productos_vendidos::json, '[]'::json)) e) AS unidades
+            FROM ventas v
+            WHERE v.fecha >= :desde AND v.fecha < CAST(:hasta AS DATE) + 1
+        ) x
+    """)
+    with engine.connect() as conn:
+        row = conn.execute(query, {"desde": desde, "hasta": hasta}).mappings().first()
+    return {k: (float(v) if k in ("unidades", "pagado", "deuda", "pagado_pagadas") else int(v))
+            for k, v in row.items()}
+
+
+def productos_mas_vendidos(desde, hasta, limite: int = 50):
+    """Unidades por producto en el rango, con el precio actual del producto."""
+    query = text(f"""
+        SELECT l.producto, SUM(l.cantidad) AS cantidad, p.precio,
+               SUM(l.cantidad) * p.precio AS total_vendido
+        FROM ({LINEAS_VENTA_SQL}) l
+        LEFT JOIN productos p ON p.nombre = l.producto
+        WHERE l.producto <> ''
+        GROUP BY l.producto, p.precio
+        ORDER BY cantidad DESC
+        LIMIT :limite
+    """)
+    params = {"desde": desde, "hasta": hasta, "estado": None, "limite": limite}
+    with engine.connect() as conn:
+        return [dict(r._mapping) for r in conn.execute(query, params)]
+
+
 def get_sale(sale_id: str) -> Optional[Dict]:
     """Devuelve una venta por su ID"""
     query = text("SELECT * FROM ventas WHERE id = :id")
@@ -182,18 +279,7 @@ def get_sale(sale_id: str) -> Optional[Dict]:
 
     if result:
         r = dict(result)
-        productos = r.get("productos_vendidos")
-
-        # ✅ Solo hacer json.loads si es string
-        if isinstance(productos, str):
-            try:
-                r["productos_vendidos"] = json.loads(productos)
-            except json.JSONDecodeError:
-                r["productos_vendidos"] = []
-        else:
-            # Si ya es lista/dict, dejarlo como está
-            r["productos_vendidos"] = productos or []
-
+        r["productos_vendidos"] = _leer_productos_vendidos(r.get("productos_vendidos"))
         return r
 
     return None
@@ -209,18 +295,13 @@ def delete_sale(sale_id: str, usuario: Optional[str] = None) -> bool:
         increment_stock(item["id_producto"], item["cantidad"])
 
     # Eliminar la venta de la BD
+    # El trigger de ventas marca el día para recalcular el resumen (backend.resumenes)
     with engine.begin() as conn:
         conn.execute(text("DELETE FROM ventas WHERE id = :id"), {"id": sale_id})
+    invalidar_factura(sale_id)
 
-    # 🔹 Preparar datos para el log sin que falle JSON
-    log_detalles = copy.deepcopy(sale)
-
-    # Convertir cualquier lista/dict anidado a string JSON
-    for key, value in log_detalles.items():
-        if isinstance(value, (list, dict)):
-            log_detalles[key] = json.dumps(value)
-
-    registrar_log(usuario or "sistema", "eliminar_venta", {"venta_id": sale_id, "venta": log_detalles})
+    # El codec de logs ya serializa fechas, Decimal y listas anidadas
+    registrar_log(usuario or "sistema", "eliminar_venta", {"venta_id": sale_id, "venta": sale})
 
     return True
 
@@ -228,175 +309,3 @@ def listar_ventas_dict():
     ventas = list_sales()
     ventas_dict = {f"ID {v['id']} - Cliente {v['cliente_id']} - Total ${v['total']}": v for v in ventas}
     return ventas_dict
-
-
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import Table, TableStyle
-from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
-from io import BytesIO
-import os
-
-def generar_factura_pdf(venta, cliente, productos_vendidos, gestor_info=None, logo_path="assets/logo.png"):
-    """
-    Genera una factura profesional en PDF mostrando todos los productos de la venta,
-    duplicada en la misma hoja (para cliente y archivo interno).
-
-    venta: dict con info de la venta
-    cliente: dict con info del cliente
-    productos_vendidos: lista de dicts {nombre, cantidad, precio_unitario}
-    gestor_info: dict opcional con datos del vendedor/chofer
-    logo_path: ruta local a logo de la empresa
-    """
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-    line_height = 15
-
-    # Cargar logo local
-    logo = None
-    if os.path.exists(logo_path):
-        try:
-            logo = ImageReader(logo_path)
-        except Exception as e:
-            print(f"No se pudo cargar el logo: {e}")
-
-    def draw_multiline_text(c, text, x, y, max_width, line_height=12, font_name="Helvetica", font_size=10):
-        """
-        Dibuja texto ajustándolo automáticamente al ancho máximo permitido.
-        Devuelve la nueva coordenada Y después de escribir el texto.
-        """
-        c.setFont(font_name, font_size)
-
-        words = str(text).split()
-        lines = []
-        current_line = ""
-
-        for word in words:
-            test_line = f"{current_line} {word}".strip()
-            if c.stringWidth(test_line, font_name, font_size) <= max_width:
-                current_line = test_line
-            else:
-                lines.append(current_line)
-                current_line = word
-
-        if current_line:
-            lines.append(current_line)
-
-        for line in lines:
-            c.drawString(x, y, line)
-            y -= line_height
-
-        return y
-
-    def dibujar_factura(y_offset=0):
-        nonlocal c
-
-        # ---------------- Logo ----------------
-        if logo:
-            c.drawImage(logo, 40, height - 85 - y_offset, width=80, height=70, preserveAspectRatio=True)
-
-        # ------------- Empresa ----------------
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(130, height - 50 - y_offset, "Omar Galíndez Ramirez. CI: 85082506984")
-        c.setFont("Helvetica", 10)
-        c.drawString(130, height - 65 - y_offset, f"Factura N°: {venta.get('numero', venta.get('id',''))}")
-        c.drawString(130, height - 80 - y_offset, f"Fecha: {venta.get('fecha','')}")
-
-        # ------------- Columnas ----------------
-        col1_x = 40
-        col2_x = 320
-        row_y = height - 110 - y_offset
-
-        # Campos cliente, vacíos si no hay info
-        cliente_nombre = cliente.get("nombre") or ""
-        cliente_ci = cliente.get("ci") or ""
-        cliente_chapa = cliente.get("chapa") or ""
-        cliente_direccion = cliente.get("direccion") or ""
-        cliente_telefono = cliente.get("telefono") or ""
-
-        c.drawString(col1_x, row_y, f"Cliente: {cliente_nombre}"); row_y -= line_height
-        c.drawString(col1_x, row_y, f"Carnet/ID: {cliente_ci}"); row_y -= line_height
-        c.drawString(col1_x, row_y, f"Chapa: {cliente_chapa}"); row_y -= line_height
-        row_y = draw_multiline_text(
-            c,
-            f"Dirección: {cliente_direccion}",
-            col1_x,
-            row_y,
-            max_width=250,  
-            line_height=line_height
-        )
-        c.drawString(col1_x, row_y, f"Teléfono: {cliente_telefono}"); row_y -= line_height
-
-        # Totales y pagos
-        total = float(venta.get("total") or 0)
-        pagado_usd = float(venta.get("pagado") or 0)
-        saldo = float(venta.get("saldo") or 0)
-        metodo_pago = venta.get("tipo_pago") or ""
-        vendedor = gestor_info.get("vendedor","") if gestor_info else ""
-        chofer = gestor_info.get("chofer","") if gestor_info else ""
-        chapa_vehiculo = gestor_info.get("chapa","") if gestor_info else ""
-        observaciones = venta.get("observaciones","")
-
-        tasa_cup = 120
-        pagado_cup = pagado_usd * tasa_cup
-        pagado_str = f"(USD) {pagado_usd:,.2f} - (CUP) {pagado_cup:,.2f}"
-
-        row_y2 = height - 110 - y_offset
-        c.drawString(col2_x, row_y2, f"Total: ${total:.2f}"); row_y2 -= line_height
-        c.drawString(col2_x, row_y2, f"Pagado: {pagado_str}"); row_y2 -= line_height
-        c.drawString(col2_x, row_y2, f"Saldo pendiente: ${saldo:.2f}"); row_y2 -= line_height
-        c.drawString(col2_x, row_y2, f"Método de pago: {metodo_pago}"); row_y2 -= line_height
-        if observaciones:
-            row_y2 = draw_multiline_text(
-                c,
-                f"Observaciones: {observaciones}",
-                col2_x,
-                row_y2,
-                max_width=220,
-                line_height=line_height
-            )
-        c.drawString(col2_x, row_y2, f"Vendedor: {vendedor}"); row_y2 -= line_height
-        c.drawString(col2_x, row_y2, f"Chofer: {chofer}"); row_y2 -= line_height
-        c.drawString(col2_x, row_y2, f"Chapa: {chapa_vehiculo}"); row_y2 -= line_height
-
-        # ------------- Tabla de productos ----------------
-        table_y_start = row_y - 40
-        table_data = [["Producto", "Cantidad", "Precio Unitario", "Subtotal"]]
-        for p in productos_vendidos:
-            nombre = p.get("nombre","")
-            cantidad = float(p.get("cantidad") or 0)
-            precio_unitario = float(p.get("precio_unitario") or 0)
-            subtotal = cantidad * precio_unitario
-            table_data.append([nombre, str(int(cantidad)), f"${precio_unitario:.2f}", f"${subtotal:.2f}"])
-
-        table = Table(table_data, colWidths=[200, 80, 100, 100])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0,0), (-1,0), colors.gray),
-            ('TEXTCOLOR',(0,0),(-1,0),colors.whitesmoke),
-            ('ALIGN',(1,1),(-1,-1),'CENTER'),
-            ('GRID', (0,0), (-1,-1), 1, colors.black),
-            ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold')
-        ]))
-        table.wrapOn(c, 50, table_y_start - 20)
-        table.drawOn(c, 50, table_y_start - len(table_data)*18 - 20)
-
-        # ------------- Firma doble ----------------
-        firma_y = table_y_start - len(table_data)*18 - 60
-        c.drawString(40, firma_y -30, "__________________________")
-        c.drawString(40, firma_y - 40, "Firma Cliente")
-        c.drawString(320, firma_y -30 ,"__________________________")
-        c.drawString(320, firma_y - 40, "Firma Vendedor")
-
-    # Dibujar dos facturas en la misma hoja
-    dibujar_factura(y_offset=0)
-    c.setStrokeColor(colors.gray)
-    c.setLineWidth(1)
-    c.line(40, height/2, width-40, height/2)
-    dibujar_factura(y_offset=height/2)
-
-    c.showPage()
-    c.save()
-    buffer.seek(0)
-    return buffer.getvalue()
@@ -0,0 +1,56 @@
+# benchmarks/bench_conciliacion.py
+"""
+Benchmark de la conciliación de clientes.deuda_total.
+
+Mide la pasada completa (todos los clientes, una sola consulta agregada) y la
+incremental (solo clientes marcados) en modo informe, sin corregir nada.
+Con --marcar N se marcan N clientes antes de cada pasada incremental para
+simular la actividad de un día.
+
+Uso:
+    python benchmarks/bench_conciliacion.py --repeticiones 5 --marcar 50
+"""
+
+import argparse
+import statistics
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import text  # noqa: E402
+from backend.db import engine  # noqa: E402
+from backend import conciliacion  # noqa: E402
+
+
+def marcar(n):
+    with engine.begin() as conn:
+        ids = conn.execute(text("SELECT id FROM clientes ORDER BY random() LIMIT :n"), {"n": n}).scalars().all()
+        conciliacion.marcar_clientes(conn, ids)
+    return len(ids)
+
+
+def bench(repeticiones, n_marcar):
+    completos, incrementales = [], []
+    for _ in range(repeticiones):
+        r = conciliacion.conciliar_deudas()
+        completos.append(r["segundos"])
+
+        if n_marcar:
+            marcar(n_marcar)
+        r_inc = conciliacion.conciliar_deudas(solo_tocados=True)
+        incrementales.append(r_inc["segundos"])
+
+    print(f"🧮 {r['revisados']} clientes, {len(r['diferencias'])} con diferencias")
+    print(f"{'modo':>12} {'p50 (ms)':>10} {'máx (ms)':>10}")
+    for nombre, tiempos in (("completo", completos), (f"incr. ({n_marcar})", incrementales)):
+        print(f"{nombre:>12} {statistics.median(tiempos) * 1000:>10.1f} {max(tiempos) * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de conciliación de deudas")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--marcar", type=int, default=50)
+    args = parser.parse_args()
+
+    bench(args.repeticiones, args.marcar)
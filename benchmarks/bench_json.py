@@ -0,0 +1,86 @@
+# benchmarks/bench_json.py
+"""
+Benchmark del codec JSON (backend.serializacion).
+
+Codifica y decodifica el productos_vendidos de ventas de 1 a 200 líneas,
+más los detalles de log de eliminar_venta (la venta completa con fecha y
+montos Decimal), con cada motor disponible. Como referencia se incluye el
+json.dumps(default=str) que se usaba antes.
+
+No necesita base de datos.
+
+Uso:
+    python benchmarks/bench_json.py --repeticiones 2000 --lineas 1 10 50 200
+"""
+
+import argparse
+import importlib.util
+import json
+import timeit
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+# Se carga el módulo suelto: importar el paquete backend abriría la conexión a la BD
+_ruta = Path(__file__).resolve().parents[1] / "backend" / "serializacion.py"
+_spec = importlib.util.spec_from_file_location("serializacion", _ruta)
+serializacion = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(serializacion)
+
+
+def venta(lineas):
+    productos = [
+        {
+            "id_producto": 1000 + i,
+            "nombre": f"Producto de prueba número {i} con descripción",
+            "cantidad": (i % 7) + 1,
+            "precio_unitario": round(12.5 + i * 0.75, 2),
+            "subtotal": round(((i % 7) + 1) * (12.5 + i * 0.75), 2),
+        }
+        for i in range(lineas)
+    ]
+    registro = {
+        "id": 123456, "cliente_id": 42, "usuario": "cajero1", "tipo_pago": "efectivo",
+        "fecha": datetime(2025, 6, 1, 10, 30, 15),
+        "total": Decimal("1234.50"), "pagado": Decimal("1000.00"), "saldo": Decimal("234.50"),
+        "productos_vendidos": productos,
+    }
+    return productos, registro
+
+
+def medir(func, repeticiones):
+    return min(timeit.repeat(func, number=repeticiones, repeat=3)) / repeticiones * 1e6
+
+
+def bench(repeticiones, lineas):
+    motores = [m for m in serializacion.MOTORES if m != "orjson" or serializacion.orjson is not None]
+    if "orjson" not in motores:
+        print("⚠️ orjson no está instalado: solo se mide el módulo estándar.")
+
+    print(f"{'líneas':>6} {'motor':>8} {'dumps µs':>10} {'loads µs':>10} {'log µs':>10} {'bytes':>8}")
+    for n in lineas:
+        productos, registro = venta(n)
+        texto = json.dumps(productos)
+
+        antes_dumps = medir(lambda: json.dumps(productos), repeticiones)
+        antes_loads = medir(lambda: json.loads(texto), repeticiones)
+        antes_log = medir(lambda: json.dumps(registro, default=str), repeticiones)
+        print(f"{n:>6} {'antes':>8} {antes_dumps:>10.1f} {antes_loads:>10.1f} {antes_log:>10.1f} {len(texto):>8}")
+
+        for motor in motores:
+            serializacion.usar_motor(motor)
+            texto_motor = serializacion.dumps(productos)
+            d = medir(lambda: serializacion.dumps(productos), repeticiones)
+            l = medir(lambda: serializacion.loads(texto_motor), repeticiones)
+            g = medir(lambda: serializacion.dumps(registro), repeticiones)
+            print(f"{n:>6} {motor:>8} {d:>10.1f} {l:>10.1f} {g:>10.1f} {len(texto_motor.encode()):>8}")
+
+    serializacion.usar_motor()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del codec JSON")
+    parser.add_argument("--repeticiones", type=int, default=2000)
+    parser.add_argument("--lineas", type=int, nargs="+", default=[1, 10, 50, 100, 200])
+    args = parser.parse_args()
+    bench(args.repeticiones, args.lineas)
@@ -0,0 +1,83 @@
+# benchmarks/bench_login.py
+"""
+Benchmark de login.
+
+Mide cuánto tarda verificar N contraseñas con bcrypt en serie y a través del
+pool de backend.usuarios, para distintos costes. Con --usuario/--password
+además lanza N autenticaciones completas concurrentes contra la BD.
+
+Uso:
+    python benchmarks/bench_login.py --logins 8 --costes 10 12
+    python benchmarks/bench_login.py --usuario cajero1 --password secreto
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import bcrypt  # noqa: E402
+from backend import usuarios  # noqa: E402
+
+
+def medir(func, n):
+    t0 = time.perf_counter()
+    func(n)
+    return time.perf_counter() - t0
+
+
+def bench_hash(logins, costes):
+    password = "contraseña-de-prueba"
+    print(f"🔐 bcrypt: {logins} logins, pool de {usuarios.BCRYPT_WORKERS} hilos")
+    print(f"{'coste':>6} {'serie (s)':>10} {'pool (s)':>10} {'ms/login':>10} {'aceleración':>12}")
+
+    for coste in costes:
+        hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt(coste)).decode()
+
+        def serie(n):
+            for _ in range(n):
+                bcrypt.checkpw(password.encode(), hashed.encode())
+
+        def pool(n):
+            # Simula n cajeros entrando a la vez, cada uno desde su hilo de sesión
+            with ThreadPoolExecutor(max_workers=n) as sesiones:
+                list(sesiones.map(lambda _: usuarios.verificar_password(password, hashed), range(n)))
+
+        t_serie = medir(serie, logins)
+        t_pool = medir(pool, logins)
+        print(f"{coste:>6} {t_serie:>10.3f} {t_pool:>10.3f} {t_pool / logins * 1000:>10.1f} "
+              f"{t_serie / t_pool if t_pool else 0:>11.1f}x")
+
+
+def bench_db(logins, username, password):
+    def login(_):
+        t0 = time.perf_counter()
+        resultado = usuarios.autenticar_usuario(username, password)
+        return time.perf_counter() - t0, resultado
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=logins) as sesiones:
+        resultados = list(sesiones.map(login, range(logins)))
+    total = time.perf_counter() - t0
+
+    tiempos = sorted(t for t, _ in resultados)
+    ok = sum(1 for _, r in resultados if r and not r.get("bloqueado"))
+    print(f"🗄️ autenticar_usuario x{logins}: total {total:.3f}s, "
+          f"p50 {tiempos[len(tiempos) // 2] * 1000:.0f} ms, máx {tiempos[-1] * 1000:.0f} ms, "
+          f"correctos {ok}/{logins}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de login con bcrypt")
+    parser.add_argument("--logins", type=int, default=8)
+    parser.add_argument("--costes", type=int, nargs="+", default=[10, usuarios.BCRYPT_ROUNDS])
+    parser.add_argument("--usuario")
+    parser.add_argument("--password")
+    args = parser.parse_args()
+
+    bench_hash(args.logins, args.costes)
+    if args.usuario and args.password:
+        bench_db(args.logins, args.usuario, args.password)
@@ -1,60 +1,68 @@
 import streamlit as st
 from backend.usuarios import autenticar_usuario
+from backend.sesiones import emitir_token
+from backend.migraciones import inicializar
+from ui import perfilador as perfil
 from datetime import datetime
 
 st.set_page_config(page_title="Login | ElectroGalíndez", layout="centered")
 
-# ─────────────────────────────────────────────
-# Inicializar sesión
-# ─────────────────────────────────────────────
-usuario = st.session_state.get("usuario", None)
+# Migraciones pendientes: una vez por proceso, antes de cualquier escritura
+inicializar()
+with perfil.pagina("Login"):
 
-# ─────────────────────────────────────────────
-# Si ya está logueado → no volver a pedir login
-# ─────────────────────────────────────────────
-if usuario:
-    st.sidebar.write(f"👤 Usuario: **{usuario['username']}**")
-    st.sidebar.write(f"Rol: **{usuario['rol']}**")
+    # ─────────────────────────────────────────────
+    # Inicializar sesión
+    # ─────────────────────────────────────────────
+    usuario = st.session_state.get("usuario", None)
 
-    st.success(f"Bienvenido, {usuario['username']} ({usuario['rol']})")
+    # ─────────────────────────────────────────────
+    # Si ya está logueado → no volver a pedir login
+    # ─────────────────────────────────────────────
+    if usuario:
+        st.sidebar.write(f"👤 Usuario: **{usuario['username']}**")
+        st.sidebar.write(f"Rol: **{usuario['rol']}**")
 
-    if st.button("Cerrar sesión"):
-        st.session_state.clear()
-        st.rerun()
+        st.success(f"Bienvenido, {usuario['username']} ({usuario['rol']})")
 
-    st.stop()  # ← evita renderizar la parte del login
+        if st.button("Cerrar sesión"):
+            st.session_state.clear()
+            st.rerun()
 
+        st.stop()  # ← evita renderizar la parte del login
 
-# ─────────────────────────────────────────────
-# UI de Login
-# ─────────────────────────────────────────────
-st.title("🔒 Iniciar sesión")
 
-username = st.text_input("Usuario", placeholder="Ingresa tu usuario")
-password = st.text_input("Contraseña", type="password", placeholder="Ingresa tu contraseña")
+    # ─────────────────────────────────────────────
+    # UI de Login
+    # ─────────────────────────────────────────────
+    st.title("🔒 Iniciar sesión")
 
-login_btn = st.button("Ingresar", use_container_width=True)
+    username = st.text_input("Usuario", placeholder="Ingresa tu usuario")
+    password = st.text_input("Contraseña", type="password", placeholder="Ingresa tu contraseña")
 
-# ─────────────────────────────────────────────
-# Procesar intento de login
-# ─────────────────────────────────────────────
-if login_btn:
+    login_btn = st.button("Ingresar", use_container_width=True)
 
-    with st.spinner("Verificando credenciales..."):
-        user = autenticar_usuario(username, password)
+    # ─────────────────────────────────────────────
+    # Procesar intento de login
+    # ─────────────────────────────────────────────
+    if login_btn:
 
-    if isinstance(user, dict) and user.get("bloqueado"):
-        try:
-            blk = datetime.fromisoformat(user["bloqueado_hasta"])
-            st.error(f"⚠️ Usuario bloqueado hasta: **{blk.strftime('%Y-%m-%d %H:%M')}**")
-        except:
-            st.error("⚠️ Usuario bloqueado temporalmente.")
-        st.stop()
+        with st.spinner("Verificando credenciales..."):
+            user = autenticar_usuario(username, password)
 
-    if user:
-        st.session_state.usuario = user
-        st.success(f"¡Bienvenido, {user['username']}!")
-        st.rerun()
+        if isinstance(user, dict) and user.get("bloqueado"):
+            try:
+                blk = datetime.fromisoformat(user["bloqueado_hasta"])
+                st.error(f"⚠️ Usuario bloqueado hasta: **{blk.strftime('%Y-%m-%d %H:%M')}**")
+            except:
+                st.error("⚠️ Usuario bloqueado temporalmente.")
+            st.stop()
 
-    else:
-        st.error("❌ Usuario o contraseña incorrectos")
+        if user:
+            user["token"] = emitir_token(user["username"])
+            st.session_state.usuario = user
+            st.success(f"¡Bienvenido, {user['username']}!")
+            st.rerun()
+
+        else:
+            st.error("❌ Usuario o contraseña incorrectos")
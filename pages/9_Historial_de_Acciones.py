@@ -1,6 +1,12 @@
 import streamlit as st
 import pandas as pd
-from io import BytesIO
+from backend import logs
+from backend.exportar import exportar_consulta
+from backend.usuarios import listar_usuarios
+from ui.exportar import boton_descarga
+from ui.tablas import tabla_keyset
+from protector import requerir_sesion
+from ui import perfilador as perfil
 
 # =============================
 # ⚙️ Configuración de la página
@@ -11,99 +17,98 @@ st.title("📜 Historial de Acciones")
 # ---------------------------
 # Verificar sesión y rol
 # ---------------------------
-if "usuario" not in st.session_state or st.session_state.usuario is None:
-    st.warning("Debes iniciar sesión para acceder a esta página.")
-    st.stop()
-if st.session_state.usuario["rol"] != "admin":
-    st.error("Solo usuarios con rol admin pueden acceder.")
-    st.stop()
-
-# =============================
-# 🧠 Carga de datos (ejemplo)
-# =============================
-@st.cache_data
-def cargar_historial():
-    """
-    Simula la carga de un historial de acciones.
-    Reemplaza esta función por una consulta real a la base de datos.
-    """
-    data = {
-        "Fecha": pd.date_range("2025-01-01", periods=15, freq="D"),
-        "Usuario": ["admin", "omar", "maria", "admin", "omar"] * 3,
-        "Módulo": ["Clientes", "Deudas", "Pagos", "Usuarios", "Reportes"] * 3,
-        "Acción": [
-            "Creó cliente", "Actualizó deuda", "Registró pago",
-            "Eliminó usuario", "Generó reporte"
-        ] * 3,
-        "Detalle": [
-            "Cliente Juan Pérez", "Deuda #45", "Pago de $50",
-            "Usuario Pedro", "Reporte de ventas"
-        ] * 3
-    }
-    df = pd.DataFrame(data)
-    df["Fecha"] = pd.to_datetime(df["Fecha"]).dt.strftime("%Y-%m-%d %H:%M:%S")
-    return df
-
-df_historial = cargar_historial()
-
-# =============================
-# 🔍 Filtros interactivos
-# =============================
-col1, col2, col3 = st.columns(3)
-
-usuarios = ["Todos"] + sorted(df_historial["Usuario"].unique().tolist())
-modulos = ["Todos"] + sorted(df_historial["Módulo"].unique().tolist())
-
-usuario_filtro = col1.selectbox("👤 Usuario", usuarios)
-modulo_filtro = col2.selectbox("📦 Módulo", modulos)
-fecha_min = col3.date_input("📅 Desde", pd.to_datetime(df_historial["Fecha"]).min())
-fecha_max = col3.date_input("📅 Hasta", pd.to_datetime(df_historial["Fecha"]).max())
-
-# =============================
-# 📊 Aplicar filtros
-# =============================
-df_filtrado = df_historial.copy()
-
-df_filtrado["Fecha_dt"] = pd.to_datetime(df_filtrado["Fecha"])
-df_filtrado = df_filtrado[
-    (df_filtrado["Fecha_dt"].dt.date >= fecha_min) &
-    (df_filtrado["Fecha_dt"].dt.date <= fecha_max)
-]
-
-if usuario_filtro != "Todos":
-    df_filtrado = df_filtrado[df_filtrado["Usuario"] == usuario_filtro]
-
-if modulo_filtro != "Todos":
-    df_filtrado = df_filtrado[df_filtrado["Módulo"] == modulo_filtro]
-
-df_filtrado.drop(columns="Fecha_dt", inplace=True)
-
-# =============================
-# 📈 Mostrar resultados
-# =============================
-st.subheader("📋 Resultados del historial")
-st.dataframe(df_filtrado, use_container_width=True)
-
-# =============================
-# 💾 Exportar a Excel
-# =============================
-def exportar_excel(df):
-    buffer = BytesIO()
-    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-        df.to_excel(writer, index=False, sheet_name="Historial")
-    buffer.seek(0)
-    return buffer
-
-excel_buffer = exportar_excel(df_filtrado)
-st.download_button(
-    label="⬇️ Descargar historial filtrado (Excel)",
-    data=excel_buffer,
-    file_name="historial_acciones.xlsx",
-    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-)
-
-# =============================
-# ✅ Optimización visual
-# =============================
-st.caption(f"Mostrando {len(df_filtrado)} registros filtrados de {len(df_historial)} totales.")
-st.markdown("---")
\ No newline at end of file
+requerir_sesion(rol="admin")
+with perfil.pagina("Historial de Acciones"):
+
+    # =============================
+    # 🧠 Carga de datos (consultas en el servidor)
+    # =============================
+    @st.cache_data(ttl=300)
+    def cargar_usuarios():
+        return sorted({u["username"] for u in listar_usuarios()} | {"sistema"})
+
+    @st.cache_data(ttl=30)
+    def cargar_resumen(desde, hasta, usuario, modulo, tipo):
+        return logs.resumen_historial(desde, hasta, usuario, modulo, tipo)
+
+    @st.cache_data(ttl=30)
+    def cargar_pagina(desde, hasta, usuario, modulo, tipo, cursor, limite):
+        return logs.pagina_historial(desde, hasta, usuario, modulo, tipo, cursor, limite)
+
+    # =============================
+    # 🔍 Filtros interactivos
+    # =============================
+    col1, col2, col3, col4 = st.columns(4)
+
+    usuario_filtro = col1.selectbox("👤 Usuario", ["Todos"] + cargar_usuarios())
+    modulo_filtro = col2.selectbox("📦 Módulo", ["Todos"] + logs.MODULOS)
+    tipo_filtro = col3.selectbox("⚙️ Acción", ["Todas"] + logs.TIPOS_ACCION)
+    fecha_min = col4.date_input("📅 Desde", pd.Timestamp.today() - pd.Timedelta(days=30))
+    fecha_max = col4.date_input("📅 Hasta", pd.Timestamp.today())
+
+    if fecha_min > fecha_max:
+        st.error("La fecha de inicio no puede ser mayor que la fecha final")
+        st.stop()
+
+    filtros = (
+        fecha_min,
+        fecha_max,
+        None if usuario_filtro == "Todos" else usuario_filtro,
+        None if modulo_filtro == "Todos" else modulo_filtro,
+        None if tipo_filtro == "Todas" else tipo_filtro,
+    )
+
+    # =============================
+    # 📊 Conteos agregados
+    # =============================
+    resumen = cargar_resumen(*filtros)
+    total = resumen["total"]
+
+    c1, c2, c3 = st.columns(3)
+    c1.metric("🧮 Registros", f"{total:,}")
+    c2.metric("👥 Usuarios", len(resumen["usuarios"]))
+    c3.metric("📦 Módulos", len(resumen["modulos"]))
+
+    if total == 0:
+        st.info("No hay acciones registradas con esos filtros.")
+        st.stop()
+
+    g1, g2 = st.columns(2)
+    with g1:
+        st.caption("Acciones por usuario")
+        st.bar_chart(pd.DataFrame(resumen["usuarios"]).set_index("usuario")["total"])
+    with g2:
+        st.caption("Acciones por módulo")
+        st.bar_chart(pd.DataFrame(resumen["modulos"]).set_index("modulo")["total"])
+
+    st.caption("Acciones por día")
+    st.line_chart(pd.DataFrame(resumen["dias"]).set_index("dia")["total"])
+
+    # =============================
+    # 📈 Mostrar resultados (paginados)
+    # =============================
+    st.subheader("📋 Resultados del historial")
+    tabla_keyset(
+        clave="historial",
+        cargar=lambda cursor, limite: cargar_pagina(*filtros, cursor, limite),
+        filtros=filtros,
+        total=total,
+        columnas={
+            "fecha": "Fecha", "usuario": "Usuario", "modulo": "Módulo",
+            "tipo": "Tipo", "accion": "Acción", "detalles": "Detalle",
+        },
+    )
+
+    # =============================
+    # 💾 Exportar a Excel
+    # =============================
+    query_export, params_export = logs.consulta_historial(*filtros)
+    boton_descarga(
+        clave="historial",
+        etiqueta="historial filtrado (Excel)",
+        generar=lambda: exportar_consulta(query_export, params_export, nombre_hoja="Historial"),
+        version=filtros + (total,),
+        nombre_archivo="historial_acciones.xlsx"
+    )
+
+    st.markdown("---")
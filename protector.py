@@ -1,6 +1,7 @@
 import streamlit as st
 import streamlit.components.v1 as components
 import time
+from backend import migraciones, sesiones
 
 # ---------------------------
 # Configuración de tiempo de inactividad (por defecto 15 min)
@@ -52,3 +53,30 @@ def cerrar_sesion_al_cerrar():
         });
         </script>
     ''', height=0)
+
+
+def requerir_sesion(rol: str = None):
+    """
+    Exige una sesión válida (token firmado y usuario activo) y, si se pasa
+    `rol`, que el usuario lo tenga. El rol se toma de la caché de sesiones,
+    así que un cambio hecho por un admin se aplica en la siguiente interacción.
+    Devuelve st.session_state.usuario.
+    """
+    migraciones.inicializar()
+    usuario = st.session_state.get("usuario")
+    if not usuario:
+        st.warning("Debes iniciar sesión para acceder a esta página.")
+        st.stop()
+
+    estado = sesiones.autorizar(usuario.get("token"))
+    if estado is None:
+        st.session_state.usuario = None
+        st.warning("⚠️ Tu sesión expiró o tu usuario fue desactivado. Inicia sesión nuevamente.")
+        st.stop()
+
+    usuario["rol"] = estado["rol"]
+    if rol and estado["rol"] != rol:
+        st.error(f"Solo usuarios con rol {rol} pueden acceder.")
+        st.stop()
+
+    return usuario
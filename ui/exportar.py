@@ -0,0 +1,73 @@
+import io
+from pathlib import Path
+from typing import Any, Callable, Hashable, Union
+import pandas as pd
+import streamlit as st
+from backend.exportar import FORMATOS
+
+MIME_XLSX = FORMATOS["xlsx"]
+
+_STATE_KEY = "_descargas_preparadas"
+
+
+def _a_bytes(resultado: Union[bytes, bytearray, Path]) -> bytes:
+    """Acepta bytes o la ruta devuelta por backend.exportar."""
+    if isinstance(resultado, (bytes, bytearray)):
+        return bytes(resultado)
+    ruta = Path(resultado)
+    try:
+        return ruta.read_bytes()
+    finally:
+        ruta.unlink(missing_ok=True)
+
+
+def df_a_excel(df: pd.DataFrame, nombre_hoja: str = "Reporte") -> bytes:
+    """Convierte un DataFrame ya cargado en un libro Excel."""
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
+        df.to_excel(writer, index=False, sheet_name=nombre_hoja[:31])
+    return output.getvalue()
+
+
+def boton_descarga(
+    clave: str,
+    etiqueta: str,
+    generar: Callable[[], Any],
+    version: Hashable,
+    nombre_archivo: str,
+    mime: str = MIME_XLSX
+):
+    """
+    Botón de descarga diferido.
+
+    El archivo solo se genera cuando el usuario pulsa "Preparar". Los bytes se
+    guardan en la sesión junto con `version` y se reutilizan en los reruns
+    siguientes mientras la versión no cambie. Así las interacciones normales
+    de la página no hacen ningún trabajo de exportación.
+
+    generar: función sin argumentos que devuelve bytes o una ruta de archivo.
+    version: cualquier valor hashable que identifique los datos exportados
+             (filtros, número de filas, última modificación...).
+    """
+    preparadas = st.session_state.setdefault(_STATE_KEY, {})
+    cache = preparadas.get(clave)
+
+    if cache is None or cache["version"] != version:
+        if cache is not None:
+            # Los datos cambiaron: descartar los bytes viejos
+            preparadas.pop(clave, None)
+
+        if not st.button(f"⚙️ Preparar {etiqueta}", key=f"preparar_{clave}"):
+            return
+
+        with st.spinner("Generando archivo..."):
+            cache = {"version": version, "data": _a_bytes(generar())}
+        preparadas[clave] = cache
+
+    st.download_button(
+        label=f"📥 Descargar {etiqueta}",
+        data=cache["data"],
+        file_name=nombre_archivo,
+        mime=mime,
+        key=f"descargar_{clave}"
+    )
@@ -0,0 +1,258 @@
+"""
+Perfilador de reruns de páginas Streamlit.
+
+Uso en una página (todas las páginas envuelven así su cuerpo):
+
+    with perfil.pagina("Deudas"):
+        ...
+        with perfil.seccion("tabla general"):
+            ...
+
+o decorando funciones con @perfil.perfilar(). Si el rerun se corta con
+st.stop(), st.rerun() o un error, el perfil se guarda como interrumpido y la
+captura SQL se detiene igualmente. Además de las secciones se
+registran las consultas SQL del rerun (agrupadas por función de backend).
+Cada rerun se guarda en una base SQLite local y, si el perfil está activo,
+se muestra en la barra lateral junto con los peores reruns de la página.
+
+Se activa con PERFIL_PAGINAS=1 o añadiendo ?perfil=1 a la URL. Desactivado,
+todas las funciones son no-ops.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import pandas as pd
+import streamlit as st
+from backend.db import iniciar_captura, detener_captura
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+PERFIL_DB = Path(os.getenv("PERFIL_DB", str(BASE_DIR / "perfiles.sqlite")))
+PERFIL_PAGINAS = os.getenv("PERFIL_PAGINAS", "0") == "1"
+
+_STATE_KEY = "_perfil_rerun"
+_db_lock = threading.Lock()
+_db_listo = False
+
+
+# ---------------------------
+# Almacén SQLite
+# ---------------------------
+def _conectar() -> sqlite3.Connection:
+    global _db_listo
+    conn = sqlite3.connect(str(PERFIL_DB), timeout=5)
+    if not _db_listo:
+        conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS reruns (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                pagina TEXT NOT NULL,
+                usuario TEXT,
+                fecha TEXT NOT NULL,
+                total_ms REAL NOT NULL,
+                sql_ms REAL NOT NULL,
+                consultas INTEGER NOT NULL,
+                interrumpido INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_reruns_pagina_total ON reruns (pagina, total_ms);
+            CREATE TABLE IF NOT EXISTS secciones (
+                rerun_id INTEGER NOT NULL,
+                orden INTEGER NOT NULL,
+                nombre TEXT NOT NULL,
+                ms REAL NOT NULL,
+                consultas INTEGER NOT NULL,
+                sql_ms REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS llamadas_backend (
+                rerun_id INTEGER NOT NULL,
+                funcion TEXT NOT NULL,
+                consultas INTEGER NOT NULL,
+                ms REAL NOT NULL
+            );
+        """)
+        _db_listo = True
+    return conn
+
+
+def _guardar(perfil: Dict[str, Any], interrumpido: bool) -> None:
+    fin = perfil["ultimo"] if interrumpido else time.perf_counter()
+    consultas = perfil["consultas"]
+    por_funcion = defaultdict(lambda: [0, 0.0])
+    for _, ms, _, funcion, _ in consultas:
+        por_funcion[funcion][0] += 1
+        por_funcion[funcion][1] += ms
+
+    with _db_lock:
+        conn = _conectar()
+        try:
+            cur = conn.execute(
+                "INSERT INTO reruns (pagina, usuario, fecha, total_ms, sql_ms, consultas, interrumpido) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (perfil["pagina"], perfil["usuario"], perfil["fecha"], (fin - perfil["inicio"]) * 1000,
+                 sum(c[1] for c in consultas), len(consultas), int(interrumpido))
+            )
+            rerun_id = cur.lastrowid
+            conn.executemany(
+                "INSERT INTO secciones VALUES (?, ?, ?, ?, ?, ?)",
+                [(rerun_id, i, *s) for i, s in enumerate(perfil["secciones"])]
+            )
+            conn.executemany(
+                "INSERT INTO llamadas_backend VALUES (?, ?, ?, ?)",
+                [(rerun_id, f, n, ms) for f, (n, ms) in por_funcion.items()]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def peores_reruns(pagina: Optional[str] = None, limite: int = 10) -> List[Dict[str, Any]]:
+    """Reruns más lentos guardados (de una página o de todas)."""
+    with _db_lock:
+        conn = _conectar()
+        try:
+            conn.row_factory = sqlite3.Row
+            filas = conn.execute(
+                "SELECT id, pagina, usuario, fecha, total_ms, sql_ms, consultas, interrumpido FROM reruns "
+                "WHERE ? IS NULL OR pagina = ? ORDER BY total_ms DESC LIMIT ?",
+                (pagina, pagina, limite)
+            ).fetchall()
+            return [dict(f) for f in filas]
+        finally:
+            conn.close()
+
+
+# ---------------------------
+# API para páginas
+# ---------------------------
+def activo() -> bool:
+    return PERFIL_PAGINAS or st.query_params.get("perfil") == "1"
+
+
+def iniciar(pagina: str) -> None:
+    """Empieza a perfilar el rerun actual de `pagina`."""
+    # Una captura que quedó abierta (rerun cortado) no debe sumar consultas ajenas
+    detener_captura()
+    if not activo():
+        return
+
+    pendiente = st.session_state.pop(_STATE_KEY, None)
+    if pendiente:
+        # El rerun anterior terminó con st.stop()/st.rerun() antes de finalizar()
+        _guardar(pendiente, interrumpido=True)
+
+    usuario = st.session_state.get("usuario") or {}
+    ahora = time.perf_counter()
+    st.session_state[_STATE_KEY] = {
+        "pagina": pagina,
+        "usuario": usuario.get("username") if isinstance(usuario, dict) else None,
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "inicio": ahora,
+        "ultimo": ahora,
+        "secciones": [],
+        "consultas": iniciar_captura(),
+    }
+
+
+@contextmanager
+def seccion(nombre: str):
+    """Mide un bloque del rerun y las consultas SQL lanzadas dentro."""
+    perfil = st.session_state.get(_STATE_KEY)
+    if perfil is None:
+        yield
+        return
+
+    n0 = len(perfil["consultas"])
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        fin = time.perf_counter()
+        nuevas = perfil["consultas"][n0:]
+        perfil["secciones"].append((nombre, (fin - t0) * 1000, len(nuevas), sum(c[1] for c in nuevas)))
+        perfil["ultimo"] = fin
+
+
+def perfilar(nombre: Optional[str] = None):
+    """Decorador: cada llamada a la función cuenta como una sección."""
+    def decorador(func):
+        etiqueta = nombre or func.__name__
+
+        @wraps(func)
+        def envoltura(*args, **kwargs):
+            with seccion(etiqueta):
+                return func(*args, **kwargs)
+
+        # Conservar .clear() de las funciones con st.cache_data
+        if hasattr(func, "clear"):
+            envoltura.clear = func.clear
+        return envoltura
+    return decorador
+
+
+def finalizar(mostrar: bool = True) -> None:
+    """Cierra el perfil del rerun, lo guarda y (opcionalmente) lo muestra en la barra lateral."""
+    perfil = st.session_state.pop(_STATE_KEY, None)
+    if perfil is None:
+        return
+    detener_captura()
+    _guardar(perfil, interrumpido=False)
+    if mostrar:
+        _mostrar_sidebar(perfil)
+
+
+def _interrumpir() -> None:
+    perfil = st.session_state.pop(_STATE_KEY, None)
+    detener_captura()
+    if perfil is not None:
+        _guardar(perfil, interrumpido=True)
+
+
+@contextmanager
+def pagina(nombre: str, mostrar: bool = True):
+    """iniciar() + finalizar() alrededor del cuerpo de una página."""
+    iniciar(nombre)
+    try:
+        yield
+    except BaseException:
+        # st.stop()/st.rerun() también llegan aquí como excepciones
+        _interrumpir()
+        raise
+    finalizar(mostrar)
+
+
+def _mostrar_sidebar(perfil: Dict[str, Any]) -> None:
+    total_ms = (time.perf_counter() - perfil["inicio"]) * 1000
+    consultas = perfil["consultas"]
+
+    with st.sidebar.expander("🐞 Perfil de la página", expanded=False):
+        st.metric("Rerun", f"{total_ms:,.0f} ms",
+                  f"{len(consultas)} consultas · {sum(c[1] for c in consultas):,.0f} ms SQL", delta_color="off")
+
+        if perfil["secciones"]:
+            st.caption("Secciones")
+            st.dataframe(
+                pd.DataFrame(perfil["secciones"], columns=["Sección", "ms", "Consultas", "SQL ms"]).round(1),
+                hide_index=True, use_container_width=True
+            )
+
+        if consultas:
+            por_funcion = pd.DataFrame(
+                [(c[3], c[1]) for c in consultas], columns=["Función", "ms"]
+            ).groupby("Función")["ms"].agg(["count", "sum"]).sort_values("sum", ascending=False)
+            st.caption("Backend")
+            st.dataframe(por_funcion.round(1), use_container_width=True)
+
+        peores = peores_reruns(perfil["pagina"], limite=5)
+        if peores:
+            st.caption("Peores reruns guardados")
+            st.dataframe(
+                pd.DataFrame(peores)[["fecha", "usuario", "total_ms", "sql_ms", "consultas"]].round(0),
+                hide_index=True, use_container_width=True
+            )
@@ -0,0 +1,190 @@
+"""
+Render de tablas grandes sin Styler completo.
+
+Un Styler de pandas se convierte en HTML celda por celda, así que con unos
+miles de filas cada rerun se vuelve lento. mostrar_tabla() en cambio:
+
+  - formatea números y monedas con st.column_config (lo hace el navegador),
+  - pagina en el servidor: solo la página visible viaja al navegador,
+  - aplica el resaltado (si lo hay) únicamente a las filas de esa página.
+
+Para listados que crecen sin límite, tabla_keyset() pide a la base de datos
+solo la página visible (paginación por keyset, ver backend.paginacion), con
+selector de tamaño de página y el total exacto o estimado en el pie.
+
+Uso:
+
+    mostrar_tabla(
+        df, clave="inventario",
+        formatos={"Precio": "moneda", "Cantidad": "entero"},
+        resaltar={"Cantidad": lambda v: "background-color:#ffcccc" if v <= 5 else ""},
+    )
+"""
+
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+import pandas as pd
+import streamlit as st
+
+FILAS_POR_PAGINA = 50
+TAMANOS_PAGINA = [25, 50, 100, 200]
+
+# nombre → (formato printf para column_config, formato Python para Styler)
+FORMATOS = {
+    "moneda": ("$%.2f", "${:,.2f}"),
+    "moneda_entera": ("$%.0f", "${:,.0f}"),
+    "entero": ("%d", "{:,.0f}"),
+    "decimal": ("%.2f", "{:,.2f}"),
+}
+FORMATO_FECHA = "YYYY-MM-DD HH:mm"
+
+
+def configurar_columnas(df: pd.DataFrame, formatos: Optional[Dict[str, str]] = None) -> Dict[str, object]:
+    """column_config para `df`: formatos numéricos pedidos y fechas legibles."""
+    config = {}
+    for col, nombre in (formatos or {}).items():
+        if col in df.columns:
+            config[col] = st.column_config.NumberColumn(col, format=FORMATOS[nombre][0])
+    for col in df.columns:
+        if col not in config and pd.api.types.is_datetime64_any_dtype(df[col]):
+            config[col] = st.column_config.DatetimeColumn(col, format=FORMATO_FECHA)
+    return config
+
+
+def _pagina_actual(clave: str, total_paginas: int) -> int:
+    key = f"{clave}_pagina"
+    # El valor inicial va en session_state y no en value=: Streamlit avisa si
+    # un widget recibe ambos
+    st.session_state.setdefault(key, 1)
+    # Si los datos se reducen, no dejar la página fuera de rango
+    if st.session_state[key] > total_paginas:
+        st.session_state[key] = total_paginas
+    return int(st.number_input(
+        "Página", min_value=1, max_value=total_paginas, step=1, key=key
+    ))
+
+
+def mostrar_tabla(
+    df: pd.DataFrame,
+    clave: str,
+    formatos: Optional[Dict[str, str]] = None,
+    resaltar: Optional[Dict[str, Callable[[object], str]]] = None,
+    filas_por_pagina: Optional[int] = FILAS_POR_PAGINA,
+    altura: Optional[int] = None,
+    mostrar_indice: bool = False,
+) -> pd.DataFrame:
+    """
+    Muestra `df` paginado con formatos de st.column_config.
+
+    formatos: {columna: "moneda" | "moneda_entera" | "entero" | "decimal"}.
+    resaltar: {columna: función(valor) -> css}; solo se evalúa sobre la página visible.
+    filas_por_pagina: None para mostrar `df` tal cual (p. ej. si ya viene paginado de la BD).
+
+    Devuelve el fragmento de `df` mostrado.
+    """
+    total = len(df)
+    visible = df
+    if filas_por_pagina and total > filas_por_pagina:
+        total_paginas = (total - 1) // filas_por_pagina + 1
+        pagina = _pagina_actual(clave, total_paginas)
+        inicio = (pagina - 1) * filas_por_pagina
+        visible = df.iloc[inicio:inicio + filas_por_pagina]
+        st.caption(f"Página {pagina} de {total_paginas} · {total:,} filas")
+
+    datos = visible
+    if resaltar:
+        # Styler solo sobre la ventana visible: coste acotado por filas_por_pagina
+        datos = visible.style
+        for col, funcion in resaltar.items():
+            if col in visible.columns:
+                datos = datos.map(funcion, subset=[col])
+        formatos_py = {c: FORMATOS[n][1] for c, n in (formatos or {}).items() if c in visible.columns}
+        if formatos_py:
+            # Con Styler los valores mostrados salen del Styler, no de column_config
+            datos = datos.format(formatos_py)
+
+    kwargs = {"height": altura} if altura else {}
+    st.dataframe(
+        datos,
+        column_config=configurar_columnas(visible, formatos),
+        use_container_width=True,
+        hide_index=not mostrar_indice,
+        **kwargs
+    )
+    return visible
+
+
+# ---------------------------
+# Tabla paginada por keyset
+# ---------------------------
+def _ir_primera(estado: Dict[str, Any]) -> None:
+    del estado["cursores"][1:]
+
+
+def _ir_anterior(estado: Dict[str, Any]) -> None:
+    if len(estado["cursores"]) > 1:
+        estado["cursores"].pop()
+
+
+def _ir_siguiente(estado: Dict[str, Any], cursor: tuple) -> None:
+    estado["cursores"].append(cursor)
+
+
+def tabla_keyset(
+    clave: str,
+    cargar: Callable[[Optional[tuple], int], Tuple[List[Dict[str, Any]], Optional[tuple]]],
+    filtros: Hashable = None,
+    total: Optional[int] = None,
+    exacto: bool = True,
+    columnas: Optional[Dict[str, str]] = None,
+    formatos: Optional[Dict[str, str]] = None,
+    resaltar: Optional[Dict[str, Callable[[object], str]]] = None,
+    altura: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Tabla que solo carga y envía al navegador la página visible.
+
+    cargar: función (cursor, limite) -> (filas, siguiente), p. ej. un
+            pagina_* del backend envuelto en st.cache_data.
+    filtros: valor hashable con los filtros activos; si cambia se vuelve a
+             la primera página.
+    total / exacto: conteo para el pie (backend.paginacion.contar_filas).
+    columnas: {columna del backend: título}; fija también el orden y oculta el resto.
+    formatos / resaltar: como en mostrar_tabla, con los títulos ya renombrados.
+
+    En sesión solo se guarda la pila de cursores de las páginas visitadas.
+    """
+    estado = st.session_state.setdefault(f"_keyset_{clave}", {"filtros": None, "cursores": [None]})
+
+    limite = st.selectbox(
+        "Filas por página", TAMANOS_PAGINA,
+        index=TAMANOS_PAGINA.index(FILAS_POR_PAGINA), key=f"{clave}_limite"
+    )
+    if estado["filtros"] != (filtros, limite):
+        estado["filtros"] = (filtros, limite)
+        estado["cursores"] = [None]
+
+    filas, siguiente = cargar(estado["cursores"][-1], limite)
+    df = pd.DataFrame(filas)
+    if columnas and not df.empty:
+        df = df[list(columnas)].rename(columns=columnas)
+
+    if df.empty:
+        st.info("No hay filas para mostrar.")
+    else:
+        mostrar_tabla(df, clave, formatos=formatos, resaltar=resaltar, filas_por_pagina=None, altura=altura)
+
+    pagina = len(estado["cursores"])
+    primera = (pagina - 1) * limite + 1
+    rango = f"{primera:,}–{primera + len(df) - 1:,}" if len(df) else "0"
+    if total is not None:
+        rango += f" de {'' if exacto else '≈ '}{total:,}"
+
+    c1, c2, c3, c4 = st.columns([1, 1, 1, 3])
+    c1.button("⏮ Primera", key=f"{clave}_primera", disabled=pagina == 1,
+              on_click=_ir_primera, args=(estado,))
+    c2.button("◀ Anterior", key=f"{clave}_anterior", disabled=pagina == 1,
+              on_click=_ir_anterior, args=(estado,))
+    c3.button("Siguiente ▶", key=f"{clave}_siguiente", disabled=siguiente is None,
+              on_click=_ir_siguiente, args=(estado, siguiente))
+    c4.caption(f"Página {pagina} · filas {rango}")
+    return df